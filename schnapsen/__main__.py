@@ -1,8 +1,5 @@
 """Main file (test for now)."""
-from schnapsen.ai.better_player import BetterPlayer
-from schnapsen.ai.mcts.mcts import MctsPlayer
-from schnapsen.ai.neural_network.simple_linear.nn_linear_player import NNSimpleLinearPlayer
-from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.ai.player_registry import create_player
 from schnapsen.core.human_player import HumanPlayer
 from schnapsen.gui.gui import GUI
 from schnapsen.logs import basic_logger
@@ -14,13 +11,9 @@ def main() -> None:
     logger.debug('Starting main')
 
     human_player = HumanPlayer()
-    player_2 = BetterPlayer(name="Betty")    # Only the last player is actually used. A bit of a linting hack..
-    player_2 = RandomPlayer(name="Randy")
-    player_2 = NNSimpleLinearPlayer("Simple Neural Net")
-    player_2 = MctsPlayer(number_of_searches_per_move=80)
-
-    if player_2.requires_model_load:
-        player_2.load_model()
+    # Any name from schnapsen.ai.player_registry, e.g. "better", "random" or "nn_simple". Only the chosen player's
+    # module is imported.
+    player_2 = create_player('mcts', number_of_searches_per_move=80)
 
     ui = GUI(human_player=human_player, opponent=player_2)
     ui.window.mainloop()
@@ -0,0 +1,164 @@
+"""Information Set Monte Carlo Tree Search.
+
+Unlike the plain MCTS (whose tree is built from the true state and so peeks at hidden cards), every iteration here
+samples a fresh determinisation of the hidden information and walks a tree shared by all determinisations. Tree nodes
+correspond to the searching player's information sets: the sequence of actions taken plus the cards the player holds.
+Statistics are therefore pooled across determinisations rather than rebuilt from scratch, and nothing the searching
+player couldn't know is leaked into the tree.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+import math
+from random import choice
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.actions import get_action_index
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+
+
+@dataclass
+class IsmctsNode:
+    """A node in an information set tree, reached by taking action_id."""
+    parent: IsmctsNode = None
+    action_id: int = None
+    # The player that took action_id. Values are stored from this player's perspective.
+    player: Player = None
+    visit_count: int = 0
+    # How many times this node's action was legal when its parent was visited (used in place of parent visits in UCB
+    # as the set of legal actions differs between determinisations).
+    availability_count: int = 0
+    value_sum: float = 0
+    # Children grouped by the searching player's observation after this action (i.e. their hand, which changes as they
+    # draw cards), then by action id.
+    outcomes: Dict[int, Dict[int, IsmctsNode]] = field(default_factory=dict)
+    c: float = math.sqrt(2)
+
+    def get_ucb(self) -> float:
+        """Determine the UCB score, from the perspective of the player taking this node's action.
+
+        Returns:
+            float: The calculated ucb score.
+        """
+        q_value = ((self.value_sum / self.visit_count) + 1) / 2
+        return q_value + self.c * math.sqrt(math.log(self.availability_count) / self.visit_count)
+
+    def back_propagate(self, state: MatchState) -> None:
+        """Update this node and its ancestors with the value of a terminal state.
+
+        Args:
+            state (MatchState): Terminal state reached by the iteration.
+        """
+        value, _ = state.normalised_value_is_terminal()
+        node = self
+        while node.parent is not None:
+            node.visit_count += 1
+            node.value_sum += value if state.round_winner == node.player else -value
+            node = node.parent
+
+
+@dataclass
+class ISMCTS:
+    """Single observer Information Set Monte Carlo Tree Search implementation."""
+
+    match_controller: MatchController
+
+    def search(self, state: MatchState, number_of_searches: int) -> List[float]:
+        """Explore problem space, sampling a determinisation of the hidden cards per iteration.
+
+        Args:
+            state (MatchState): Current match state.
+            number_of_searches (int): How many searches (iterations) to perform.
+
+        Returns:
+            List[float]: Visit frequencies for each action under ALL_GAME_ACTIONS.
+        """
+        root_player = state.active_player
+        root_node = IsmctsNode()
+
+        for _ in range(number_of_searches):
+            determinised_state = state.clone()
+            self.match_controller.shuffle_imperfect_information(determinised_state, root_player)
+            node = self._select_and_expand(root_node, determinised_state, root_player)
+            self._rollout(determinised_state)
+            node.back_propagate(determinised_state)
+
+        action_frequency = np.zeros(len(ALL_GAME_ACTIONS))
+        for children in root_node.outcomes.values():
+            for child in children.values():
+                action_frequency[child.action_id] = child.visit_count
+        return action_frequency / np.sum(action_frequency)
+
+    def _select_and_expand(self, node: IsmctsNode, state: MatchState, root_player: Player) -> IsmctsNode:
+        # Descend the tree with the determinised state, expanding (at most) one new node.
+        while state.round_winner is None:
+            children = node.outcomes.setdefault(self._observation(state, root_player), {})
+            legal_actions = self.match_controller.get_valid_actions(state)
+            untried_actions = []
+            available_children = []
+            for action in legal_actions:
+                child = children.get(get_action_index(action))
+                if child is None:
+                    untried_actions.append(action)
+                else:
+                    child.availability_count += 1
+                    available_children.append((child, action))
+
+            if untried_actions:
+                action = choice(untried_actions)
+                child = IsmctsNode(parent=node, action_id=get_action_index(action), player=state.active_player,
+                                   availability_count=1)
+                children[child.action_id] = child
+                self.match_controller.perform_action(state, action)
+                return child
+
+            node, action = max(available_children, key=lambda child_action: child_action[0].get_ucb())
+            self.match_controller.perform_action(state, action)
+        return node
+
+    def _rollout(self, state: MatchState) -> None:
+        # The state is already determinised, so simply play at random until the round ends.
+        while state.round_winner is None:
+            self.match_controller.perform_action(state, choice(self.match_controller.get_valid_actions(state)))
+
+    @staticmethod
+    def _observation(state: MatchState, root_player: Player) -> int:
+        # The searching player's private view: the cards in their hand.
+        return cards_mask(state.player_states[root_player].hand)
+
+
+class IsmctsPlayer(Player):
+    """Information set monte carlo player."""
+
+    def __init__(self, number_of_searches_per_move: int, name: Optional[str] = "Izzy") -> None:
+        """Initialise Player object.
+
+        Args:
+            number_of_searches_per_move (int): How many searches (determinisations) to perform per move.
+            name (Optional[str], optional): Player name. Defaults to "Izzy".
+        """
+        super().__init__(name=name)
+        self.number_of_searches = number_of_searches_per_move
+        self.ismcts = ISMCTS(match_controller=MatchController())
+
+    def select_action(self, state: MatchState, legal_actions: List[Action]) -> Action:  # noqa:U100
+        """Select a player action using the ISMCTS search.
+
+        Args:
+            state (MatchState): Current match state.
+            legal_actions (List[Action]): Current legal actions.
+
+        Returns:
+            Action: Selected action.
+        """
+        action_frequencies = self.ismcts.search(state=state, number_of_searches=self.number_of_searches)
+        return ACTIONS[np.argmax(action_frequencies)]
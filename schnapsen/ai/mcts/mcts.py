@@ -1,21 +1,39 @@
 """Monte Carlo Trial."""
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from dataclasses import field
+from enum import Enum
 import math
+import multiprocessing
+import random
 from random import choice
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
 from schnapsen.ai.better_player import BetterPlayer
+from schnapsen.ai.mcts.transposition_table import TranspositionTable
+from schnapsen.ai.perfect_information import active_player
+from schnapsen.ai.perfect_information import can_solve
+from schnapsen.ai.perfect_information import compact_state
+from schnapsen.ai.perfect_information import CompactState
+from schnapsen.ai.perfect_information import legal_actions
+from schnapsen.ai.perfect_information import MAX_VALUE
+from schnapsen.ai.perfect_information import PerfectInformationSolver
+from schnapsen.ai.perfect_information import perform_action
 from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
 from schnapsen.core.actions import ALL_GAME_ACTIONS
 from schnapsen.core.actions import get_action_index
 from schnapsen.core.match_controller import MatchController
 from schnapsen.core.match_helpers import play_automated_matches
 from schnapsen.core.player import Player
 from schnapsen.core.state import MatchState
+from schnapsen.core.zobrist import zobrist_hash
 
 
 @dataclass
@@ -24,9 +42,13 @@ class Node:
     match_controller: MatchController
     state: MatchState
     root_player: Player
+    # The node this node was first expanded from and the action taken. With a transposition table a node can have
+    # several parents, so searches track their path rather than relying on these.
     parent: Node = None
     action_id: int = None
     children: List[Node] = None
+    # The action id leading to each child.
+    child_action_ids: List[int] = None
     expandable_moves: List[Action] = None
     visit_count: int = 0
     value_sum: float = 0
@@ -36,6 +58,7 @@ class Node:
         """Initialise node state."""
         self.expandable_moves = self.match_controller.get_valid_actions(state=self.state)
         self.children = []
+        self.child_action_ids = []
 
     def is_fully_expanded(self) -> bool:
         """Check if node has been fully expanded.
@@ -82,9 +105,14 @@ class Node:
             q_value = 1 - q_value
         return q_value + self.c * math.sqrt(math.log(self.visit_count) / child.visit_count)
 
-    def expand(self) -> Node:
+    def expand(self, transposition_table: Optional[TranspositionTable] = None) -> Node:
         """Expand node at random, updating children state and returning new expansion.
 
+        Args:
+            transposition_table (Optional[TranspositionTable], optional): If set, a node already reached through
+                another path is reused as the child (sharing its statistics), and new children are added to the table.
+                Defaults to None.
+
         Returns:
             Node: Newly added child.
         """
@@ -94,13 +122,20 @@ class Node:
         action = self.expandable_moves.pop(action_ix)
 
         # Set up a child state. We setup the game state assuming
-        child_state = self.state.copy()
+        child_state = self.state.clone()
         self.match_controller.perform_action(child_state, action)
-        # Note that we don't use the match controller to progress game states as we now want random exploration!
-        child = Node(match_controller=self.match_controller,
-                     state=child_state, root_player=self.root_player, parent=self,
-                     action_id=get_action_index(action))
+        action_id = get_action_index(action)
+        child = None
+        if transposition_table is not None:
+            child = transposition_table.get(child_state.zobrist_hash)
+        if child is None:
+            # Note that we don't use the match controller to progress game states as we now want random exploration!
+            child = Node(match_controller=self.match_controller,
+                         state=child_state, root_player=self.root_player, parent=self, action_id=action_id)
+            if transposition_table is not None:
+                transposition_table.put(child_state.zobrist_hash, child)
         self.children.append(child)
+        self.child_action_ids.append(action_id)
         return child
 
     def simulate(self) -> float:
@@ -109,40 +144,110 @@ class Node:
         Returns:
             float: A value score for path.
         """
-        rollout_state = self.state.copy()
-        current_player = self.state.active_player
-        # Update the imperfect knowledge in the state.
-        # Without doing this, we end up exploring states with the knowledge of what's to come which is a naughty
-        # abuse of game state access!
-        self.match_controller.shuffle_imperfect_information(rollout_state, self.root_player)
-
-        # Progress the game at random until it ends!
-        while True:
-            # Pick random move
-            action = choice(self.match_controller.get_valid_actions(rollout_state))
-            # Update game state
-            self.match_controller.perform_action(rollout_state, action)
-            # Stop if/when we have a winner
-            value, is_terminal = rollout_state.normalised_value_is_terminal()
-            if is_terminal:
-                # Adjust value if the "winner" is not the player at the start of the simulation.
-                if rollout_state.round_winner != current_player:
-                    value *= -1
-                return value
+        return rollout(self.match_controller, self.state, self.root_player)
+
+
+def _back_propagate(path: List[Node], value: float) -> None:
+    # Update the nodes along a search path, from the leaf up. The path is followed rather than Node.parent, as nodes
+    # shared through a transposition table have more than one parent.
+    child = None
+    for node in reversed(path):
+        if child is not None and node.state.active_player != child.state.active_player:
+            value *= -1
+        node.value_sum += value
+        node.visit_count += 1
+        child = node
+
+
+def _subtree_nodes(root_node: Node) -> List[Node]:
+    # All nodes reachable from root_node, breadth first (so nearer nodes come first). Shared nodes are listed once.
+    nodes = [root_node]
+    seen = {id(root_node)}
+    queue = deque(nodes)
+    while queue:
+        for child in queue.popleft().children:
+            if id(child) not in seen:
+                seen.add(id(child))
+                nodes.append(child)
+                queue.append(child)
+    return nodes
+
+
+def _find_node(root_node: Node, position_hash: int) -> Optional[Node]:
+    # Find the node for a position (e.g. reached by the moves played since the tree was searched) in a tree.
+    for node in _subtree_nodes(root_node):
+        if node.state.zobrist_hash == position_hash:
+            return node
+    return None
+
+
+def rollout(match_controller: MatchController, state: MatchState, root_player: Player) -> float:
+    """Play a round out at random from a state.
+
+    Args:
+        match_controller (MatchController): Controller used to progress the rollout.
+        state (MatchState): State to roll out from (not modified).
+        root_player (Player): The player whose knowledge is fixed when shuffling imperfect information.
+
+    Returns:
+        float: The round value from the perspective of the state's active player.
+    """
+    rollout_state = state.clone()
+    current_player = state.active_player
+    # Update the imperfect knowledge in the state.
+    # Without doing this, we end up exploring states with the knowledge of what's to come which is a naughty
+    # abuse of game state access!
+    match_controller.shuffle_imperfect_information(rollout_state, root_player)
+
+    # Progress the game at random until it ends!
+    while True:
+        # Pick random move
+        action = choice(match_controller.get_valid_actions(rollout_state))
+        # Update game state
+        match_controller.perform_action(rollout_state, action)
+        # Stop if/when we have a winner
+        value, is_terminal = rollout_state.normalised_value_is_terminal()
+        if is_terminal:
+            # Adjust value if the "winner" is not the player at the start of the simulation.
+            if rollout_state.round_winner != current_player:
+                value *= -1
+            return value
 
-    def back_propagate(self, value: int) -> None:
-        """Update parent node based on child visit.
 
-        Args:
-            value (int): Node value to back-propagate.
-        """
-        self.value_sum += value
-        self.visit_count += 1
+def _compact_rollout(state: CompactState) -> float:
+    # As rollout, but from a compact determinisation (see schnapsen.ai.perfect_information).
+    player = active_player(state)
+    while True:
+        acting_player = active_player(state)
+        state = perform_action(state, choice(legal_actions(state)))
+        if isinstance(state, int):
+            return (state if acting_player == player else -state) / MAX_VALUE
+
+
+def _seeded_rollouts(determinisations: List[CompactState], seed: int) -> float:
+    # Process pool entry point for leaf parallel rollouts, returning the sum of the rollout values. Each task is seeded
+    # from the parent, so results are reproducible and independent of which worker runs which rollouts.
+    random.seed(seed)
+    return sum(_compact_rollout(determinisation) for determinisation in determinisations)
+
+
+def _seeded_visit_counts(mcts: MCTS, state: MatchState, number_of_searches: int, seed: int) -> np.ndarray:
+    # Process pool entry point for root parallel searches.
+    random.seed(seed)
+    return mcts._visit_counts(state=state, number_of_searches=number_of_searches, reuse_tree=False)
 
-        if self.parent is not None:
-            if self.parent.state.active_player != self.state.active_player:
-                value *= -1
-            self.parent.back_propagate(value)
+
+# Default transposition table size of the MctsPlayer. A tree has at most one node per search, so this only bounds
+# memory use for very large searches.
+TRANSPOSITION_TABLE_SIZE = 100000
+
+
+class ParallelMode(str, Enum):
+    """Parallelisation strategies for MCTS."""
+    # N independent trees, each over a different determinisation of the hidden cards, with visit counts merged.
+    ROOT = 'root'
+    # A single tree where each leaf is evaluated by a batch of rollouts spread across workers.
+    LEAF = 'leaf'
 
 
 @dataclass
@@ -150,30 +255,124 @@ class MCTS:
     """Monte Carlo Tress Search Implementation."""
 
     match_controller: MatchController
+    # Number of rollouts averaged per leaf evaluation. These run concurrently when an executor is provided.
+    rollouts_per_leaf: int = 1
+    # Number of tasks a leaf's rollouts are split into when an executor is provided, normally its number of workers.
+    leaf_tasks: int = 1
+    # Maximum number of positions held in the transposition table of each search. None to search without one.
+    transposition_table_size: Optional[int] = None
+    # If True, the tree is kept after each search (other than root parallel searches). The next search starts from
+    # the retained node matching its state, if any, so the simulations already spent below it aren't wasted.
+    reuse_tree: bool = False
+    # If True, leaves where the deck is closed (or exhausted) are evaluated by exactly solving a determinisation of the
+    # rest of the round rather than with random rollouts.
+    solve_endgames: bool = False
+    # The tree (and its transposition table) retained for reuse.
+    _root_node: Optional[Node] = field(default=None, init=False, repr=False)
+    _transposition_table: Optional[TranspositionTable] = field(default=None, init=False, repr=False)
+    # Created on first use, its memoised positions are kept between searches.
+    _endgame_solver: Optional[PerfectInformationSolver] = field(default=None, init=False, repr=False)
+
+    def __getstate__(self) -> Dict:
+        """Support pickling without the retained tree and solver table, which can be large.
+
+        Returns:
+            Dict: Picklable object state.
+        """
+        object_state = self.__dict__.copy()
+        object_state['_root_node'] = None
+        object_state['_transposition_table'] = None
+        object_state['_endgame_solver'] = None
+        return object_state
 
-    def search(self, state: MatchState, number_of_searches: int) -> List[float]:
+    def search(self, state: MatchState, number_of_searches: int, executor: Optional[Executor] = None) -> List[float]:
         """Explore problem space with Monte Carlo Tree Search.
 
         Args:
             state (MatchState): Current match state.
             number_of_searches (int): How many searches to perform.
+            executor (Optional[Executor], optional): If set, leaf rollouts are distributed across this executor (leaf
+                parallelisation). Defaults to None.
 
         Returns:
             List[float]: A set of win probabilities for each action. This is effectively a policy function that returns
                 win probabilities for each action under ALL_GAME_ACTIONS.
         """
-        root_node = Node(match_controller=MatchController(), state=state, root_player=state.active_player)
+        action_frequency = self.visit_counts(state=state, number_of_searches=number_of_searches, executor=executor)
+        # Return as a probability density of winning per action in ACTIONS list.
+        return action_frequency / np.sum(action_frequency)
+
+    def root_parallel_search(self, state: MatchState, number_of_searches: int, number_of_trees: int,
+                             executor: Optional[Executor] = None) -> List[float]:
+        """Search several independent trees, each over a different determinisation, and merge their visit counts.
+
+        The search budget is split across the trees so the per move cost is unchanged, but with an executor the trees
+        are searched concurrently.
+
+        Args:
+            state (MatchState): Current match state.
+            number_of_searches (int): Total number of searches across all trees.
+            number_of_trees (int): Number of independent trees.
+            executor (Optional[Executor], optional): Executor (e.g. a process pool) to search trees on. If None, trees
+                are searched serially. Defaults to None.
+
+        Returns:
+            List[float]: Merged win probabilities for each action under ALL_GAME_ACTIONS.
+        """
+        searches_per_tree = max(1, math.ceil(number_of_searches / number_of_trees))
+        determinised_states = []
+        for _ in range(number_of_trees):
+            determinised_state = state.clone()
+            self.match_controller.shuffle_imperfect_information(determinised_state, state.active_player)
+            determinised_states.append(determinised_state)
+
+        if executor is None:
+            tree_visit_counts = [self._visit_counts(determinised_state, searches_per_tree, reuse_tree=False)
+                                 for determinised_state in determinised_states]
+        else:
+            futures = [executor.submit(_seeded_visit_counts, self, determinised_state, searches_per_tree,
+                                       random.randrange(2**32))
+                       for determinised_state in determinised_states]
+            tree_visit_counts = [future.result() for future in futures]
+
+        action_frequency = np.sum(tree_visit_counts, axis=0)
+        return action_frequency / np.sum(action_frequency)
+
+    def visit_counts(self, state: MatchState, number_of_searches: int,
+                     executor: Optional[Executor] = None) -> np.ndarray:
+        """Run the tree search and return the root's visit counts.
+
+        With reuse_tree, searching continues from the retained tree where possible, so the counts include the visits
+        from earlier searches that passed through the state.
+
+        Args:
+            state (MatchState): Current match state.
+            number_of_searches (int): How many searches to perform.
+            executor (Optional[Executor], optional): Executor for leaf parallel rollouts. Defaults to None.
+
+        Returns:
+            np.ndarray: Visit counts for each action under ALL_GAME_ACTIONS.
+        """
+        return self._visit_counts(state, number_of_searches, executor, reuse_tree=self.reuse_tree)
+
+    def _visit_counts(self, state: MatchState, number_of_searches: int, executor: Optional[Executor] = None,
+                      reuse_tree: Optional[bool] = False) -> np.ndarray:
+        root_node, transposition_table = self._get_root_node(state, reuse_tree)
+        if reuse_tree:
+            self._root_node, self._transposition_table = root_node, transposition_table
 
         # Traverse our node tree a number of times
         for _ in range(number_of_searches):
 
             # Start each search from the root node.
             node = root_node
+            path = [node]
 
             # If a current node is fully expanded, select a child (assumed not fully expanded)
             while node.is_fully_expanded():
                 # We select a child node from anywhere in our explored hierarchy.
                 node = node.select()
+                path.append(node)
 
             # Newly seleced node might be terminal
             value, is_terminal = node.state.normalised_value_is_terminal()
@@ -185,7 +384,8 @@ class MCTS:
                     value *= -1
             else:
                 # Expansion
-                node = node.expand()
+                node = node.expand(transposition_table)
+                path.append(node)
                 # Newly expanded node might be terminal
                 value, is_terminal = node.state.normalised_value_is_terminal()
                 if is_terminal:
@@ -193,33 +393,133 @@ class MCTS:
                         value *= -1
                 else:
                     # Simulation
-                    value = node.simulate()
+                    value = self._simulate(node, executor)
 
             # Now a terminal value is determined, update node tree accordingly.
-            node.back_propagate(value)
+            _back_propagate(path, value)
 
         # return visit_counts
         # This will effectively become a policy now so need to consider all possible game moves even if invalid.
         action_frequency = np.zeros(len(ALL_GAME_ACTIONS))
-        for child in root_node.children:
-            action_frequency[child.action_id] = child.visit_count
-
-        # Return as a probability density of winning per action in ACTIONS list.
-        return action_frequency / np.sum(action_frequency)
+        for action_id, child in zip(root_node.child_action_ids, root_node.children):
+            action_frequency[action_id] = child.visit_count
+        return action_frequency
+
+    def _get_root_node(self, state: MatchState, reuse_tree: bool) -> Tuple[Node, Optional[TranspositionTable]]:
+        if reuse_tree or self.transposition_table_size is not None:
+            # Don't rely on the caller's state having an up to date hash (e.g. if it wasn't set up by a controller).
+            state = state.clone()
+            state.zobrist_hash = zobrist_hash(state)
+        root_node = None
+        if reuse_tree and self._root_node is not None and self._root_node.root_player is state.active_player:
+            root_node = _find_node(self._root_node, state.zobrist_hash)
+        if root_node is None:
+            root_node = Node(match_controller=MatchController(), state=state, root_player=state.active_player)
+        else:
+            # Detach the retained subtree so the rest of the old tree can be freed.
+            root_node.parent = None
+            root_node.action_id = None
+
+        transposition_table = None
+        if self.transposition_table_size is not None:
+            transposition_table = TranspositionTable(self.transposition_table_size)
+            for node in _subtree_nodes(root_node):
+                transposition_table.put(node.state.zobrist_hash, node)
+        return root_node, transposition_table
+
+    def _simulate(self, node: Node, executor: Optional[Executor]) -> float:
+        if self.solve_endgames and can_solve(node.state):
+            return self._solve_endgame(node)
+        if self.rollouts_per_leaf == 1:
+            return node.simulate()
+        if executor is None:
+            value_sum = sum(node.simulate() for _ in range(self.rollouts_per_leaf))
+        else:
+            value_sum = self._parallel_rollouts(node, executor)
+        return value_sum / self.rollouts_per_leaf
+
+    def _parallel_rollouts(self, node: Node, executor: Executor) -> float:
+        # Determinise here and send the workers compact states, as pickling a MatchState (players and all) costs almost
+        # half as much as a rollout. Each task runs its share of the rollouts and returns their sum.
+        determinisations = []
+        for _ in range(self.rollouts_per_leaf):
+            state = node.state.clone()
+            self.match_controller.shuffle_imperfect_information(state, node.root_player)
+            determinisations.append(compact_state(state))
+        number_of_tasks = min(self.leaf_tasks, len(determinisations))
+        futures = [executor.submit(_seeded_rollouts, determinisations[task::number_of_tasks], random.randrange(2**32))
+                   for task in range(number_of_tasks)]
+        return sum(future.result() for future in futures)
+
+    def _solve_endgame(self, node: Node) -> float:
+        if self._endgame_solver is None:
+            self._endgame_solver = PerfectInformationSolver()
+        # As for rollouts, shuffle the cards the root player can't know. Once the deck is exhausted they're all known.
+        state = node.state.clone()
+        self.match_controller.shuffle_imperfect_information(state, node.root_player)
+        return self._endgame_solver.solve(compact_state(state))[1] / MAX_VALUE
 
 
 class MctsPlayer(Player):
     """Simple monty carlo player."""
 
-    def __init__(self, number_of_searches_per_move: int) -> None:
+    def __init__(self, number_of_searches_per_move: int, parallel_mode: Optional[ParallelMode] = None,  # noqa:CFQ002
+                 workers: Optional[int] = 1, number_of_trees: Optional[int] = None,
+                 rollouts_per_leaf: Optional[int] = None, solve_endgames: Optional[bool] = False) -> None:
         """Initialise Player object.
 
         Args:
             number_of_searches_per_move (int): How many monte carlo searches to perform per move.
+            parallel_mode (Optional[ParallelMode], optional): Root or leaf parallelisation. Defaults to None (a single
+                serial tree).
+            workers (Optional[int], optional): Size of the process pool used for parallel modes. With 1 worker the
+                parallel modes still apply but run serially in process. Defaults to 1.
+            number_of_trees (Optional[int], optional): Number of trees for root parallelisation. Defaults to workers.
+            rollouts_per_leaf (Optional[int], optional): Number of rollouts per leaf for leaf parallelisation. Defaults
+                to workers.
+            solve_endgames (Optional[bool], optional): If True, leaves where the deck is closed (or exhausted) are
+                valued by exactly solving a determinisation of the rest of the round instead of a random rollout. More
+                accurate but more costly per search, see MCTS.solve_endgames. Defaults to False.
         """
         super().__init__(name="Monty")
         self.number_of_searches = number_of_searches_per_move
-        self.mcts = MCTS(match_controller=MatchController())
+        self.parallel_mode = parallel_mode
+        self.workers = workers
+        self.number_of_trees = workers if number_of_trees is None else number_of_trees
+        if parallel_mode is ParallelMode.LEAF:
+            rollouts_per_leaf = workers if rollouts_per_leaf is None else rollouts_per_leaf
+        else:
+            rollouts_per_leaf = 1
+        # Root parallel trees are searched over fresh determinisations, so there's no tree to reuse.
+        self.mcts = MCTS(match_controller=MatchController(), rollouts_per_leaf=rollouts_per_leaf, leaf_tasks=workers,
+                         transposition_table_size=TRANSPOSITION_TABLE_SIZE,
+                         reuse_tree=parallel_mode is not ParallelMode.ROOT, solve_endgames=solve_endgames)
+        self._executor = None   # Process pool, created on first use
+
+    def __getstate__(self) -> Dict:
+        """Support pickling (e.g. for parallel tournaments) by dropping the process pool.
+
+        Returns:
+            Dict: Picklable object state.
+        """
+        object_state = self.__dict__.copy()
+        object_state['_executor'] = None
+        return object_state
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.parallel_mode is None or self.workers <= 1:
+            return None
+        if self._executor is None:
+            # The pool lives for the lifetime of the player, so avoid forking a (by then) multi-threaded process.
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the process pool, if any. A later parallel search starts a new one."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
     def select_action(self, state: MatchState, legal_actions: List[Action]) -> Action:  # noqa:U100
         """Select a player action using the MCTS search.
@@ -231,8 +531,14 @@ class MctsPlayer(Player):
         Returns:
             Action: Selected action.
         """
-        action_win_probabilities = self.mcts.search(state=state, number_of_searches=self.number_of_searches)
-        return ALL_GAME_ACTIONS[np.argmax(action_win_probabilities)]
+        if self.parallel_mode is ParallelMode.ROOT:
+            action_win_probabilities = self.mcts.root_parallel_search(
+                state=state, number_of_searches=self.number_of_searches, number_of_trees=self.number_of_trees,
+                executor=self._get_executor())
+        else:
+            action_win_probabilities = self.mcts.search(
+                state=state, number_of_searches=self.number_of_searches, executor=self._get_executor())
+        return ACTIONS[np.argmax(action_win_probabilities)]
 
 
 if __name__ == "__main__":
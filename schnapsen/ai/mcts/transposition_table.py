@@ -0,0 +1,60 @@
+"""Bounded transposition table for tree searches.
+
+Different move orders often reach the same position in Schnapsen (e.g. the same tricks won in a different order), more
+so towards the end of a round. A transposition table maps a position's Zobrist hash (see schnapsen.core.zobrist) to the
+search node already created for it, so statistics gathered along one path are shared with every other path reaching the
+same position. The table holds at most max_size entries and replaces the least recently used entry when full. Nodes
+evicted from the table are still part of the tree, they just stop being shared with new paths.
+"""
+from collections import OrderedDict
+from typing import Optional
+
+
+class TranspositionTable:
+    """LRU map from position hashes to search nodes."""
+
+    def __init__(self, max_size: int) -> None:
+        """Create an empty table.
+
+        Args:
+            max_size (int): Most entries held.
+        """
+        self.max_size = max_size
+        # Number of successful lookups, for monitoring.
+        self.hits = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: int) -> Optional[object]:
+        """Look up a position, marking it as recently used.
+
+        Args:
+            key (int): Position hash.
+
+        Returns:
+            Optional[object]: The stored node, None if the position isn't held.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def put(self, key: int, entry: object) -> None:
+        """Store a position's node, evicting the least recently used entry if the table is full.
+
+        Args:
+            key (int): Position hash.
+            entry (object): Node to store.
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Get the number of entries held.
+
+        Returns:
+            int: Number of entries.
+        """
+        return len(self._entries)
@@ -0,0 +1,43 @@
+"""Vectorised legal action masks over ALL_GAME_ACTIONS.
+
+These are computed directly from the hand and table (via MatchController.get_valid_action_mask) without creating Action
+objects. Only NumPy is required here so the module is usable without torch.
+"""
+from typing import Sequence
+
+import numpy as np
+
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.state import MatchState
+
+NUMBER_OF_ACTIONS = len(ALL_GAME_ACTIONS)
+
+_ACTION_BITS = np.left_shift(1, np.arange(NUMBER_OF_ACTIONS, dtype=np.int64))
+_match_controller = MatchController()
+
+
+def legal_action_mask(state: MatchState) -> np.ndarray:
+    """Get the legal action mask for the active player of a single state.
+
+    Args:
+        state (MatchState): Current match state.
+
+    Returns:
+        np.ndarray: Bool array of shape (len(ALL_GAME_ACTIONS),).
+    """
+    return (_match_controller.get_valid_action_mask(state) & _ACTION_BITS) != 0
+
+
+def legal_action_masks(states: Sequence[MatchState]) -> np.ndarray:
+    """Get the legal action masks for a batch of states.
+
+    Args:
+        states (Sequence[MatchState]): Match states.
+
+    Returns:
+        np.ndarray: Bool array of shape (len(states), len(ALL_GAME_ACTIONS)).
+    """
+    action_bits = np.fromiter((_match_controller.get_valid_action_mask(state) for state in states),
+                              dtype=np.int64, count=len(states))
+    return (action_bits[:, None] & _ACTION_BITS) != 0
@@ -0,0 +1,141 @@
+"""Batched model inference shared by many concurrently played games.
+
+Games running in separate threads submit their encoded states to an InferenceBroker and block for the result. A single
+worker thread collects pending requests until either max_batch_size are waiting or max_latency has passed since the
+first, then evaluates them all in one forward pass. Many single row forward passes (each dominated by torch dispatch
+overhead) become a few large ones, and torch releases the GIL while computing so the games progress in the meantime.
+
+Example, playing matches in 64 threads through an NN player (e.g. NNSimpleLinearPlayer) with a broker:
+
+    with InferenceBroker(player.model) as broker, ThreadPoolExecutor(max_workers=64) as executor:
+        player.broker = broker
+        futures = match_helpers.submit_automated_matches(executor, player, opponent, number_of_matches=1000)
+        results = match_helpers.collect_automated_matches(player, opponent, futures)
+
+Note that match batches seed the shared random module, so results played in threads aren't reproducible.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from types import TracebackType
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+_STOP = None
+
+
+class InferenceBroker:
+    """Evaluates a model on inputs submitted from many threads, in batches."""
+
+    def __init__(self, model: torch.nn.Module, max_batch_size: Optional[int] = 256,
+                 max_latency: Optional[float] = 0.001) -> None:
+        """Create the broker. Call start (or use it as a context manager) before submitting.
+
+        Args:
+            model (torch.nn.Module): Model taking a (B, inputs) float32 tensor. Only used from the worker thread.
+            max_batch_size (Optional[int], optional): Most inputs evaluated in one forward pass. Defaults to 256.
+            max_latency (Optional[float], optional): Longest time in seconds to wait for a batch to fill once a request
+                is pending. Defaults to 0.001.
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        # Number of forward passes and inputs evaluated, for monitoring.
+        self.number_of_batches = 0
+        self.number_of_inputs = 0
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread = None
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='InferenceBroker', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker thread once pending requests are evaluated."""
+        if self._thread is not None:
+            self._requests.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, inputs: np.ndarray) -> Future:
+        """Queue a single input for evaluation.
+
+        Args:
+            inputs (np.ndarray): (inputs,) float32 array. It must not be modified until the result is available.
+
+        Returns:
+            Future: Resolves to the (outputs,) model output array.
+        """
+        future = Future()
+        self._requests.put((inputs, future))
+        return future
+
+    def evaluate(self, inputs: np.ndarray) -> np.ndarray:
+        """Evaluate a single input, blocking until its batch has been evaluated.
+
+        Args:
+            inputs (np.ndarray): (inputs,) float32 array.
+
+        Returns:
+            np.ndarray: (outputs,) model output.
+        """
+        return self.submit(inputs).result()
+
+    def __enter__(self) -> InferenceBroker:
+        """Start the broker for the duration of a with block.
+
+        Returns:
+            InferenceBroker: This broker.
+        """
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc_value: Optional[BaseException],  # noqa:U100
+                 traceback: Optional[TracebackType]) -> None:  # noqa:U100
+        """Stop the broker.
+
+        Args:
+            exc_type (Optional[type]): Unused.
+            exc_value (Optional[BaseException]): Unused.
+            traceback (Optional[TracebackType]): Unused.
+        """
+        self.stop()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            request = self._requests.get()
+            if request is _STOP:
+                break
+            batch = [request]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                try:
+                    request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+            self._evaluate(batch)
+
+    def _evaluate(self, batch: List[Tuple[np.ndarray, Future]]) -> None:
+        try:
+            with torch.no_grad():
+                outputs = self.model(torch.from_numpy(np.stack([inputs for inputs, _ in batch]))).numpy()
+        except Exception as error:  # Passed on to the waiting callers.
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        self.number_of_batches += 1
+        self.number_of_inputs += len(batch)
+        for (_, future), output in zip(batch, outputs):
+            future.set_result(output)
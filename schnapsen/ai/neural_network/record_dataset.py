@@ -0,0 +1,107 @@
+"""Stream training samples from game record files (see schnapsen.core.game_record), e.g. for imitation learning.
+
+Rounds are read a chunk at a time and replayed move by move on a single state, so each sample costs one action and one
+encoding rather than a re-simulation from the deal. Samples are (encoded state, action index, legal action mask) from
+the perspective of the player acting, encoded with the StateEncoder (i.e. IOHelpers) layout. Shuffling uses a bounded
+buffer: every sample read replaces a random buffered sample, which is emitted instead. Memory use therefore depends on
+the buffer size and not on the corpus size, while samples from the same round end up spread across many batches. Only
+NumPy is required here so the module is usable without torch (wrap batches with torch.from_numpy).
+"""
+import random
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from schnapsen.ai.neural_network.action_masks import legal_action_mask
+from schnapsen.ai.neural_network.action_masks import NUMBER_OF_ACTIONS
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.core.actions import get_action_index
+from schnapsen.core.game_record import read_rounds
+from schnapsen.core.game_record import replay_round
+
+# States (B, NUMBER_OF_FEATURES) float32, action indices (B,) int64 and legal action masks (B, NUMBER_OF_ACTIONS) bool.
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class _SampleArrays:
+    """Preallocated sample storage, used for both the shuffle buffer and batches."""
+
+    def __init__(self, size: int) -> None:
+        self.states = np.zeros((size, NUMBER_OF_FEATURES), dtype=np.float32)
+        self.actions = np.zeros(size, dtype=np.int64)
+        self.legal_masks = np.zeros((size, NUMBER_OF_ACTIONS), dtype=bool)
+
+    def copy_row(self, row: int, source: '_SampleArrays', source_row: int) -> None:
+        self.states[row] = source.states[source_row]
+        self.actions[row] = source.actions[source_row]
+        self.legal_masks[row] = source.legal_masks[source_row]
+
+    def batch(self, rows: Union[slice, np.ndarray] = slice(None)) -> Batch:
+        return self.states[rows], self.actions[rows], self.legal_masks[rows]
+
+
+def record_batches(files: Union[str, Sequence[str]], batch_size: int, shuffle_buffer_size: Optional[int] = 100000,
+                   players: Sequence[int] = (0, 1), seed: Optional[int] = None,
+                   drop_last: Optional[bool] = False) -> Iterator[Batch]:
+    """Stream shuffled mini-batches of samples from game record files, in a single pass.
+
+    Args:
+        files (Union[str, Sequence[str]]): Record file path(s). Files are read in a random order.
+        batch_size (int): Samples per batch.
+        shuffle_buffer_size (Optional[int], optional): Samples held for shuffling. Larger buffers shuffle better but
+            take more memory (about 700 bytes per sample). Defaults to 100000.
+        players (Sequence[int], optional): Positions (0 for player 1, 1 for player 2 of the recorded matches) of the
+            players whose actions are sampled, e.g. only those of the player to imitate. Defaults to (0, 1).
+        seed (Optional[int], optional): Seed for the file order and shuffling. Defaults to None.
+        drop_last (Optional[bool], optional): If True, a final batch with fewer than batch_size samples is dropped.
+            Defaults to False.
+
+    Yields:
+        Batch: States, action indices and legal action masks. The arrays are new for each batch.
+    """
+    rng = np.random.default_rng(seed)
+    files = [files] if isinstance(files, str) else list(files)
+    random.Random(seed).shuffle(files)
+
+    encoder = StateEncoder()
+    buffer = _SampleArrays(shuffle_buffer_size)
+    buffer_size = 0
+    batch = _SampleArrays(batch_size)
+    batch_position = 0
+
+    for file in files:
+        for record in read_rounds(file):
+            for state, action in replay_round(record):
+                if state.players.index(state.active_player) not in players:
+                    continue
+                if buffer_size < shuffle_buffer_size:
+                    row = buffer_size
+                    buffer_size += 1
+                else:
+                    # Emit a random buffered sample and replace it with the new one.
+                    row = rng.integers(shuffle_buffer_size)
+                    batch.copy_row(batch_position, buffer, row)
+                    batch_position += 1
+                    if batch_position == batch_size:
+                        yield batch.batch()
+                        batch = _SampleArrays(batch_size)
+                        batch_position = 0
+                encoder.encode(state, out=buffer.states[row])
+                buffer.actions[row] = get_action_index(action)
+                buffer.legal_masks[row] = legal_action_mask(state)
+
+    # Drain the buffer in a random order.
+    remaining = rng.permutation(buffer_size)
+    first_batch_size = min(batch_size - batch_position, buffer_size)
+    for row, source_row in enumerate(remaining[:first_batch_size], start=batch_position):
+        batch.copy_row(row, buffer, source_row)
+    batch_position += first_batch_size
+    if batch_position == batch_size:
+        yield batch.batch()
+        for start in range(first_batch_size, buffer_size, batch_size):
+            rows = remaining[start:start + batch_size]
+            if len(rows) == batch_size or not drop_last:
+                yield buffer.batch(rows)
+    elif batch_position and not drop_last:
+        yield batch.batch(slice(batch_position))
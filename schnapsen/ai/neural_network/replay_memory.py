@@ -1,26 +1,371 @@
 from collections import namedtuple
-import random
+import os
+from typing import Tuple
+
+import numpy as np
+import torch
 
 Transition = namedtuple('Transition',
                         ('state', 'action', 'next_state', 'next_legal_actions', 'reward'))
 
 
-class ReplayMemory():
+class TensorReplayMemory:
+    """Replay memory backed by one contiguous preallocated tensor per Transition field.
+
+    Pushing writes rows in place (as a ring buffer) and sampling gathers rows by index, so batches are returned ready
+    to use without concatenating per transition tensors. Sampled transitions are returned as a Transition of batched
+    tensors: states (B, state_size) float, actions (B, 1) long, next states, next legal actions (B, number_of_actions)
+    bool and rewards (B,) float.
+    """
+
+    def __init__(self, capacity: int, state_size: int, number_of_actions: int,
+                 state_dtype: torch.dtype = torch.float32) -> None:
+        """Create the memory, allocating all storage up front.
 
-    def __init__(self, capacity):
+        Args:
+            capacity (int): Maximum number of transitions retained. The oldest are overwritten first.
+            state_size (int): Number of features per state.
+            number_of_actions (int): Width of the legal action masks.
+            state_dtype (torch.dtype, optional): Storage type for the states, e.g. torch.float16 (or torch.uint8 for
+                encodings with 0/1 features only) to reduce memory. States are converted back to float32 when
+                sampled. Defaults to torch.float32.
+        """
         self.capacity = capacity
-        self.memory = []
+        self.states = torch.zeros((capacity, state_size), dtype=state_dtype)
+        self.actions = torch.zeros((capacity, 1), dtype=torch.long)
+        self.next_states = torch.zeros((capacity, state_size), dtype=state_dtype)
+        self.next_legal_actions = torch.zeros((capacity, number_of_actions), dtype=torch.bool)
+        self.rewards = torch.zeros(capacity, dtype=torch.float32)
         self.position = 0
+        self.size = 0
+
+    def push(self, state: torch.Tensor, action: torch.Tensor, next_state: torch.Tensor,
+             next_legal_actions: torch.Tensor, reward: torch.Tensor) -> None:
+        """Save a single transition.
+
+        Args:
+            state (torch.Tensor): (state_size,) state.
+            action (torch.Tensor): Action id (any shape with a single element).
+            next_state (torch.Tensor): (state_size,) state reached.
+            next_legal_actions (torch.Tensor): (number_of_actions,) legal action mask of the state reached (any shape
+                with number_of_actions elements).
+            reward (torch.Tensor): Reward (any shape with a single element).
+        """
+        self.push_batch(Transition(state.view(1, -1), action.view(1, 1), next_state.view(1, -1),
+                                   next_legal_actions.view(1, -1), reward.view(1)))
+
+    def push_batch(self, transitions: Transition) -> None:
+        """Save a batch of transitions.
+
+        Args:
+            transitions (Transition): Batched tensors, each with a leading (N,) dimension.
+        """
+        number_of_transitions = len(transitions.action)
+        # Write in at most two contiguous slices either side of the wrap around point.
+        start = 0
+        while start < number_of_transitions:
+            count = min(number_of_transitions - start, self.capacity - self.position)
+            rows = slice(self.position, self.position + count)
+            batch = slice(start, start + count)
+            self.states[rows] = transitions.state[batch]
+            self.actions[rows] = transitions.action[batch].view(-1, 1)
+            self.next_states[rows] = transitions.next_state[batch]
+            self.next_legal_actions[rows] = transitions.next_legal_actions[batch].view(count, -1)
+            self.rewards[rows] = transitions.reward[batch].view(-1)
+            self.position = (self.position + count) % self.capacity
+            start += count
+        self.size = min(self.size + number_of_transitions, self.capacity)
+
+    def sample(self, batch_size: int) -> Transition:
+        """Sample a batch of transitions uniformly (with replacement).
+
+        Args:
+            batch_size (int): Number of transitions.
+
+        Returns:
+            Transition: Batched tensors.
+        """
+        return self.get(torch.randint(self.size, (batch_size,)))
+
+    def get(self, indices: torch.Tensor) -> Transition:
+        """Gather transitions by index.
+
+        Args:
+            indices (torch.Tensor): (B,) long indices into the memory.
+
+        Returns:
+            Transition: Batched tensors.
+        """
+        return Transition(self.states[indices].float(), self.actions[indices], self.next_states[indices].float(),
+                          self.next_legal_actions[indices], self.rewards[indices])
+
+    def __len__(self) -> int:
+        """Number of transitions currently held.
+
+        Returns:
+            int: Transition count.
+        """
+        return self.size
+
+
+class MemmapReplayMemory(TensorReplayMemory):
+    """TensorReplayMemory whose storage lives in memory-mapped .npy files in a directory.
+
+    Each Transition field is a fixed size (capacity, ...) array in its own file, with the write position and size kept
+    in a small counters file, so the memory persists as it's written and can be reopened to resume training. Capacity
+    is limited by disk rather than RAM (the OS pages rows in and out as required), allowing tens of millions of
+    transitions. Pushing and sampling operate on torch views of the mapped arrays exactly as TensorReplayMemory does.
+    """
+
+    _FIELDS = ('states', 'actions', 'next_states', 'next_legal_actions', 'rewards')
+
+    def __init__(self, path: str, capacity: int, state_size: int, number_of_actions: int,
+                 state_dtype: torch.dtype = torch.float32) -> None:
+        """Open the memory in path, creating it if it doesn't exist.
+
+        Args:
+            path (str): Directory holding the memory files.
+            capacity (int): See TensorReplayMemory.
+            state_size (int): See TensorReplayMemory.
+            number_of_actions (int): See TensorReplayMemory.
+            state_dtype (torch.dtype, optional): See TensorReplayMemory. Defaults to torch.float32.
+
+        Raises:
+            ValueError: If an existing memory in path has a different layout.
+        """
+        self.path = path
+        self.capacity = capacity
+        numpy_state_dtype = torch.empty(0, dtype=state_dtype).numpy().dtype
+        layouts = {
+            'states': ((capacity, state_size), numpy_state_dtype),
+            'actions': ((capacity, 1), np.int64),
+            'next_states': ((capacity, state_size), numpy_state_dtype),
+            'next_legal_actions': ((capacity, number_of_actions), np.bool_),
+            'rewards': ((capacity,), np.float32),
+            # Write position and size.
+            'counters': ((2,), np.int64),
+        }
+        create = not os.path.exists(self._file('counters'))
+        os.makedirs(path, exist_ok=True)
+        self._arrays = {}
+        for name, (shape, dtype) in layouts.items():
+            if create:
+                array = np.lib.format.open_memmap(self._file(name), mode='w+', dtype=dtype, shape=shape)
+            else:
+                array = np.lib.format.open_memmap(self._file(name), mode='r+')
+                if array.shape != shape or array.dtype != dtype:
+                    raise ValueError(f'Replay memory in {path} has {name} {array.dtype}{array.shape}, '
+                                     f'expected {np.dtype(dtype)}{shape}')
+            self._arrays[name] = array
+        for name in self._FIELDS:
+            setattr(self, name, torch.from_numpy(self._arrays[name]))
+        self._counters = self._arrays['counters']
+
+    @property
+    def position(self) -> int:
+        """Index of the next row to write.
+
+        Returns:
+            int: Row index.
+        """
+        return int(self._counters[0])
+
+    @position.setter
+    def position(self, value: int) -> None:
+        self._counters[0] = value
+
+    @property
+    def size(self) -> int:
+        """Number of transitions currently held.
+
+        Returns:
+            int: Transition count.
+        """
+        return int(self._counters[1])
+
+    @size.setter
+    def size(self, value: int) -> None:
+        self._counters[1] = value
+
+    def sample(self, batch_size: int) -> Transition:
+        """Sample a batch of transitions uniformly (with replacement).
+
+        Indices are sorted so rows are read in file order, which matters once the memory no longer fits in the page
+        cache. The order within a batch is irrelevant to training.
+
+        Args:
+            batch_size (int): Number of transitions.
+
+        Returns:
+            Transition: Batched tensors.
+        """
+        return self.get(torch.randint(self.size, (batch_size,)).sort().values)
+
+    def flush(self) -> None:
+        """Write any changes held in memory out to the files."""
+        for array in self._arrays.values():
+            array.flush()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.npy')
+
+
+class SumTree:
+    """Binary tree where each node holds the sum of its children's values, over a fixed number of leaves.
+
+    Updating leaves and finding the leaf at a cumulative value (i.e. sampling proportionally to the leaf values) are
+    O(log n). Both are vectorised over batches of leaves/values.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Create a tree with all leaves zero.
+
+        Args:
+            capacity (int): Number of leaves.
+        """
+        self.capacity = capacity
+        # Leaves are padded to a power of two so all leaves share the same depth. Node 1 is the root; node i has
+        # children 2i and 2i + 1.
+        self.leaf_offset = 1 << max(0, (capacity - 1).bit_length())
+        self.tree = np.zeros(2 * self.leaf_offset)
+
+    @property
+    def total(self) -> float:
+        """Sum of all leaves.
+
+        Returns:
+            float: The root value.
+        """
+        return self.tree[1]
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        """Get leaf values.
+
+        Args:
+            indices (np.ndarray): Leaf indices.
+
+        Returns:
+            np.ndarray: Leaf values.
+        """
+        return self.tree[np.asarray(indices) + self.leaf_offset]
+
+    def update(self, indices: np.ndarray, values: np.ndarray) -> None:
+        """Set leaf values and update their ancestors.
+
+        Args:
+            indices (np.ndarray): Leaf indices.
+            values (np.ndarray): New values.
+        """
+        nodes = np.asarray(indices) + self.leaf_offset
+        self.tree[nodes] = values
+        for _ in range(self.leaf_offset.bit_length() - 1):
+            nodes = nodes // 2
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Find, for each value, the leaf whose cumulative sum range contains it.
+
+        Args:
+            values (np.ndarray): Values in the range [0, total).
+
+        Returns:
+            np.ndarray: Leaf indices.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.leaf_offset.bit_length() - 1):
+            left_values = self.tree[2 * nodes]
+            go_right = values >= left_values
+            values -= np.where(go_right, left_values, 0)
+            nodes = 2 * nodes + go_right
+        # Guard against rounding errors stepping into the zero padding leaves.
+        return np.minimum(nodes - self.leaf_offset, self.capacity - 1)
+
+
+class PrioritisedReplayMemory(TensorReplayMemory):
+    """TensorReplayMemory sampling transitions in proportion to their (TD error based) priority.
+
+    Follows "Prioritized Experience Replay" (Schaul et al.) with proportional prioritisation: transition i is sampled
+    with probability p_i^alpha / sum_k p_k^alpha, where p_i = |TD error| + epsilon. New transitions get the highest
+    priority seen so far so each is replayed at least once. Importance sampling weights correct the bias this
+    introduces, with beta annealed towards 1 as training progresses.
+    """
+
+    def __init__(self, capacity: int, state_size: int, number_of_actions: int,
+                 state_dtype: torch.dtype = torch.float32, alpha: float = 0.6, beta: float = 0.4,
+                 beta_increment: float = 0.0, epsilon: float = 0.01) -> None:
+        """Create the memory.
+
+        Args:
+            capacity (int): See TensorReplayMemory.
+            state_size (int): See TensorReplayMemory.
+            number_of_actions (int): See TensorReplayMemory.
+            state_dtype (torch.dtype, optional): See TensorReplayMemory. Defaults to torch.float32.
+            alpha (float, optional): How strongly priorities skew sampling (0 is uniform). Defaults to 0.6.
+            beta (float, optional): Initial importance sampling correction (1 is full correction). Defaults to 0.4.
+            beta_increment (float, optional): Added to beta (up to 1) on every sample. Defaults to 0.0.
+            epsilon (float, optional): Added to TD errors so no transition has zero priority. Defaults to 0.01.
+        """
+        super().__init__(capacity, state_size, number_of_actions, state_dtype)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.priorities = SumTree(capacity)
+        self.max_priority = 1.0
+
+    def push_batch(self, transitions: Transition) -> None:
+        """Save a batch of transitions, with maximum priority.
+
+        Args:
+            transitions (Transition): Batched tensors, each with a leading (N,) dimension.
+        """
+        indices = (self.position + np.arange(len(transitions.action))) % self.capacity
+        super().push_batch(transitions)
+        self.priorities.update(indices, self.max_priority)
+
+    def sample(self, batch_size: int) -> Transition:
+        """Sample a batch of transitions by priority, ignoring the importance sampling weights.
+
+        Args:
+            batch_size (int): Number of transitions.
+
+        Returns:
+            Transition: Batched tensors.
+        """
+        return self.sample_with_weights(batch_size)[0]
+
+    def sample_with_weights(self, batch_size: int) -> Tuple[Transition, torch.Tensor, torch.Tensor]:
+        """Sample a batch of transitions by priority.
+
+        The priority range is split into batch_size equal segments with one transition sampled from each.
+
+        Args:
+            batch_size (int): Number of transitions.
+
+        Returns:
+            Tuple[Transition, torch.Tensor, torch.Tensor]: Batched tensors, their indices (for update_priorities) and
+                their (B,) importance sampling weights, normalised to a maximum of 1.
+        """
+        total = self.priorities.total
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * (total / batch_size)
+        indices = np.minimum(self.priorities.find(values), self.size - 1)
+
+        probabilities = self.priorities.get(indices) / total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
 
-    def push(self, *args):
-        """Saves a transition."""
-        if len(self.memory) < self.capacity:
-            self.memory.append(None)
-        self.memory[self.position] = Transition(*args)
-        self.position = (self.position + 1) % self.capacity
+        indices = torch.from_numpy(indices)
+        return self.get(indices), indices, torch.from_numpy(weights).float()
 
-    def sample(self, batch_size):
-        return random.sample(self.memory, batch_size)
+    def update_priorities(self, indices: torch.Tensor, td_errors: torch.Tensor) -> None:
+        """Update the priorities of sampled transitions.
 
-    def __len__(self):
-        return len(self.memory)
+        Args:
+            indices (torch.Tensor): Indices returned by sample_with_weights.
+            td_errors (torch.Tensor): (B,) TD errors of the transitions.
+        """
+        priorities = (np.abs(td_errors.detach().numpy().reshape(-1)) + self.epsilon) ** self.alpha
+        self.priorities.update(indices.numpy(), priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
@@ -1,15 +1,18 @@
 """Handle conversion of game state to AI ready objects."""
-from typing import Dict
+from typing import Sequence
 
+import numpy as np
 import torch
 
-from schnapsen.ai.neural_network.card_input import CardInput
+from schnapsen.ai.neural_network.action_masks import legal_action_mask
+from schnapsen.ai.neural_network.action_masks import legal_action_masks
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
 from schnapsen.core.actions import ALL_GAME_ACTIONS
 from schnapsen.core.card import Card
 from schnapsen.core.card import Suit
 from schnapsen.core.card import Value
 from schnapsen.core.marriage import Marriage
-from schnapsen.core.match_controller import MatchController
 from schnapsen.core.player import Player
 from schnapsen.core.state import MatchState
 
@@ -24,6 +27,9 @@ class IOHelpers:
     match_points_on_offer_to_me_key = -6
     match_points_on_offer_to_opponent_key = -7
 
+    # Shared encoder. Its internal buffers are not used here so returned tensors are always fresh.
+    encoder = StateEncoder()
+
     # Make a static list of actions for performance.
     # These should be used for reference only and not passed to the game engine
     d_marriage = Marriage(Card(Suit.DIAMOND, Value.QUEEN), Card(Suit.DIAMOND, Value.KING))
@@ -41,7 +47,7 @@ class IOHelpers:
         return suit * 20 + value
 
     @staticmethod
-    def create_input_from_game_state(state: MatchState) -> Dict:
+    def create_input_from_game_state(state: MatchState) -> torch.Tensor:
 
         # Make a flat vector of cards each with a state?
         # Make a convolution grd?
@@ -76,77 +82,15 @@ class IOHelpers:
         #
         #                       20 * 6 + 6 = 126 inputs. Not too bad
 
-        inputs = {}
-        player_state = state.player_states[state.active_player]
-        opponent_state = state.player_states[state.get_other_player(state.active_player)]
-
-        for suit in [Suit.DIAMOND, Suit.CLUB, Suit.SPADE, Suit.HEART]:
-            for value in Value:
-                inputs[IOHelpers.card_key(suit, value)] = CardInput(suit, value)
-
-        for card in player_state.hand:
-            card_input = inputs[IOHelpers.card_key(card.suit, card.value)]
-            card_input.in_my_hand = True
-
-        # # for card in game.get_other_player(player).hand - would be cheating!! Would be an interesting test, though!
-        # # As is, this handles cases where we know unequivocally that they have part of a marriage or the last 5 cards
-        # # of the deck
-        # TODO This was removed with the match state reworking. Would be good to handle this again.
-        # for card in player.opponent_hand:
-        #     card_input = inputs[IOHelpers.card_key(card.suit, card.value)]
-        #     card_input.in_opponent_hand = True
-
-        for card in player_state.cards_won:
-            card_input = inputs[IOHelpers.card_key(card.suit, card.value)]
-            card_input.won_by_me = True
-
-        for card in opponent_state.cards_won:
-            card_input = inputs[IOHelpers.card_key(card.suit, card.value)]
-            card_input.won_by_opponent = True
-
-        lead_card = state.leading_card
-        if lead_card is not None:
-            inputs[IOHelpers.card_key(lead_card.suit, lead_card.value)].is_leading_card = True
-
-        inputs[IOHelpers.deck_closed_key] = 1 if state.deck_closed else 0
-        inputs[IOHelpers.my_points_to_victory_key] = state.match_point_limit - player_state.round_points
-        inputs[IOHelpers.my_unearned_points_key] = 0
-        inputs[IOHelpers.opponents_points_to_victory_key] = state.match_point_limit - opponent_state.round_points
-        inputs[IOHelpers.opponents_unearned_points_key] = 0
-        inputs[IOHelpers.match_points_on_offer_to_me_key] = 0
-        inputs[IOHelpers.match_points_on_offer_to_opponent_key] = 0
-
-        # I now have all the data I need. Now to convert it into something useful.
-        # Flat vector is simplest. Or do some clever CNN?
-
-        # Simple flat vector to start with...
-        return IOHelpers.__create_flat_tensor(inputs, state)
+        # Features are written directly into a NumPy buffer, see schnapsen.ai.neural_network.state_encoder for the
+        # exact layout.
+        return torch.from_numpy(IOHelpers.encoder.encode(state, out=np.empty(NUMBER_OF_FEATURES, dtype=np.float32)))
 
     @staticmethod
-    def __create_flat_tensor(inputs: Dict[int, int], state: MatchState):
-        # (With performance in mind, it'd be better to create the
-        # tensor elements directly instead of using a list but hey...)
-        input_vector = []
-        for item in inputs.values():
-            if isinstance(item, CardInput):
-                input_vector.append(item.suit / 3)  # Normalise suit value
-                input_vector.append(item.value / state.round_point_limit)  # Normalise card value to fraction of a game
-                input_vector.append(item.in_my_hand)
-                input_vector.append(item.in_opponent_hand)
-                input_vector.append(item.won_by_me)
-                input_vector.append(item.won_by_opponent)
-                input_vector.append(item.is_leading_card)
-
-        input_vector.append(inputs[IOHelpers.deck_closed_key])
-        input_vector.append(inputs[IOHelpers.my_points_to_victory_key] / state.round_point_limit)
-        input_vector.append(inputs[IOHelpers.opponents_points_to_victory_key] / state.round_point_limit)
-
-        # input_vector.append(inputs[IOHelpers.my_unearned_points_key] / game.match_state.round_point_limit)
-        # input_vector.append(inputs[IOHelpers.opponents_unearned_points_key] / game.match_state.round_point_limit)
-        # input_vector.append(inputs[IOHelpers.match_points_on_offer_to_me_key])
-        # input_vector.append(inputs[IOHelpers.match_points_on_offer_to_opponent_key])
-
-        return torch.tensor(input_vector, dtype=torch.float)
+    def create_inputs_from_game_states(states: Sequence[MatchState]) -> torch.Tensor:
+        # Batch variant of create_input_from_game_state, giving a (B, NUMBER_OF_FEATURES) tensor.
+        return torch.from_numpy(
+            IOHelpers.encoder.encode_batch(states, out=np.empty((len(states), NUMBER_OF_FEATURES), dtype=np.float32)))
 
     @staticmethod
     def check_action_legal(i, legal_actions):
@@ -162,23 +106,27 @@ class IOHelpers:
 
         return is_legal, return_action
 
+    @staticmethod
+    def get_legal_action_mask(state: MatchState) -> torch.Tensor:
+        # 30 wide bool mask over ALL_GAME_ACTIONS, computed without building Action objects.
+        return torch.from_numpy(legal_action_mask(state))
+
+    @staticmethod
+    def get_legal_action_masks(states: Sequence[MatchState]) -> torch.Tensor:
+        # (B, 30) bool mask for a batch of states.
+        return torch.from_numpy(legal_action_masks(states))
+
     @staticmethod
     def get_legal_actions(state: MatchState) -> torch.tensor:
-        match_controller = MatchController()
-        legal_actions = match_controller.get_valid_actions(state=state)
-        legal_moves = []
-        actions = []
-        for i in range(len(ALL_GAME_ACTIONS)):
-            is_legal, action = IOHelpers.check_action_legal(i, legal_actions)
-            legal_moves.append(is_legal)
-            actions.append(action)
-        return torch.tensor(legal_moves, dtype=torch.bool), actions
+        legal_mask = IOHelpers.get_legal_action_mask(state)
+        actions = [ALL_GAME_ACTIONS[i] if is_legal else None for i, is_legal in enumerate(legal_mask.tolist())]
+        return legal_mask, actions
 
     # Pick an action based on values. Ignore illegal moves
     # convert it into an actual action
     @staticmethod
     def policy(q_values, state: MatchState):
-        legal_mask, legal_actions = IOHelpers.get_legal_actions(state)
+        legal_mask = IOHelpers.get_legal_action_mask(state)
 
         # set all illegal moves to a quality value of -100
         # this is more than a little hacky but in reality filters out illegal moves sufficiently
@@ -186,12 +134,12 @@ class IOHelpers:
 
         _, indices = q_values.max(0)
 
-        selected_action = legal_actions[indices]
-        selected_action_id = indices.unsqueeze(0)
-
-        if selected_action is None:
+        if not legal_mask[indices]:
             raise ValueError('No valid action found')
 
+        selected_action = ALL_GAME_ACTIONS[int(indices)]
+        selected_action_id = indices.unsqueeze(0)
+
         return selected_action_id, selected_action
 
     # 3D policy implementation
@@ -1,10 +1,15 @@
 """Simple player nueral network player module."""
 import os
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 import torch
 
+from schnapsen.ai.neural_network.inference_broker import InferenceBroker
 from schnapsen.ai.neural_network.simple_linear.io_helpers import IOHelpers
+from schnapsen.ai.neural_network.simple_linear.numpy_linear_player import WEIGHTS_FILE
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
 from schnapsen.core.action import Action
 from schnapsen.core.player import Player
 from schnapsen.core.state import MatchState
@@ -23,12 +28,22 @@ class NNSimpleLinearPlayer(Player):
         """
         super().__init__(name, automated=True, requires_model_load=True)
         self.model = None
+        # If set, the model is evaluated through this broker (batched with other games) rather than directly. Set it
+        # when playing many matches concurrently in threads.
+        self.broker: InferenceBroker = None
+        self._encoder = StateEncoder()
         self._file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
                                   'trained_models', self.__class__.__name__ + '_model.bin')
 
     def select_action(self, state: MatchState, legal_actions: List[Action]) -> None:
         """Implements requisite action selection method from parent object."""
-        inputs = IOHelpers.create_input_from_game_state(state)
+        if self.broker is not None:
+            # Concurrent games share this player, so each needs its own input array.
+            inputs = self._encoder.encode(state, out=np.empty(NUMBER_OF_FEATURES, dtype=np.float32))
+            _, action = IOHelpers.policy(torch.from_numpy(self.broker.evaluate(inputs)), state)
+            return action
+        # The encoder's buffer is reused across moves as the inputs aren't retained.
+        inputs = torch.from_numpy(self._encoder.encode(state))
         # no_grad disables tracking of gradients which speeds up model call.
         with torch.no_grad():
             _, action = IOHelpers.policy(self.model(inputs), state)
@@ -39,5 +54,16 @@ class NNSimpleLinearPlayer(Player):
         self.model = torch.load(self._file)
 
     def save_model(self) -> None:
-        """Save an existing model to file."""
+        """Save an existing model to file, along with its weights for NumpyLinearPlayer."""
         torch.save(self.model, self._file)
+        self.export_weights()
+
+    def export_weights(self, file: Optional[str] = WEIGHTS_FILE) -> None:
+        """Export the model weights as plain NumPy arrays, loadable without torch by NumpyLinearPlayer.
+
+        Parameters
+        ----------
+        file : Optional[str], optional
+            .npz file to write, by default WEIGHTS_FILE
+        """
+        np.savez(file, **{name: tensor.detach().numpy() for name, tensor in self.model.state_dict().items()})
@@ -0,0 +1,90 @@
+"""Torch free player for models trained as NNSimpleLinearPlayer.
+
+The LinearModule is a small MLP (tanh after every layer), so inference is just a few matrix products. This player runs
+them in NumPy from weights exported with NNSimpleLinearPlayer.export_weights (done automatically by save_model), so it
+can be used (e.g. in tournament workers or the GUI) without importing torch at all. That avoids both torch's import and
+model unpickling time at startup and its dispatch overhead per move.
+"""
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from schnapsen.ai.neural_network.action_masks import legal_action_mask
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'trained_models',
+                            'NNSimpleLinearPlayer_weights.npz')
+
+
+def load_weights(file: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Load exported LinearModule weights.
+
+    Args:
+        file (str): .npz file holding the model's state dict arrays (layer1.weight, layer1.bias, layer2.weight...).
+
+    Returns:
+        List[Tuple[np.ndarray, np.ndarray]]: Per layer (inputs, outputs) float32 weights (i.e. transposed from torch's
+            layout, ready for inputs @ weights) and (outputs,) biases.
+    """
+    with np.load(file) as arrays:
+        number_of_layers = len(arrays.files) // 2
+        return [(np.ascontiguousarray(arrays[f'layer{layer}.weight'].T, dtype=np.float32),
+                 arrays[f'layer{layer}.bias'].astype(np.float32))
+                for layer in range(1, number_of_layers + 1)]
+
+
+class NumpyLinearPlayer(Player):
+    """NNSimpleLinearPlayer equivalent evaluating the model with NumPy."""
+
+    def __init__(self, name: Optional[str] = 'Nanny', file: Optional[str] = WEIGHTS_FILE) -> None:
+        """Initialise Player object.
+
+        Args:
+            name (Optional[str], optional): Player name. Defaults to 'Nanny'.
+            file (Optional[str], optional): Exported weights to load. Defaults to WEIGHTS_FILE, the weights of the
+                NNSimpleLinearPlayer model.
+        """
+        super().__init__(name, automated=True, requires_model_load=True)
+        self.layers: List[Tuple[np.ndarray, np.ndarray]] = None
+        self._encoder = StateEncoder()
+        self._file = file
+
+    def q_values(self, inputs: np.ndarray) -> np.ndarray:
+        """Evaluate the model.
+
+        Args:
+            inputs (np.ndarray): (NUMBER_OF_FEATURES,) or (B, NUMBER_OF_FEATURES) encoded states.
+
+        Returns:
+            np.ndarray: (NUMBER_OF_ACTIONS,) or (B, NUMBER_OF_ACTIONS) action values.
+        """
+        outputs = inputs
+        for weights, bias in self.layers:
+            outputs = outputs @ weights
+            outputs += bias
+            np.tanh(outputs, out=outputs)
+        return outputs
+
+    def select_action(self, state: MatchState, legal_actions: List[Action]) -> Action:  # noqa:U100
+        """Select the legal action with the highest value.
+
+        Args:
+            state (MatchState): Current match state.
+            legal_actions (List[Action]): Current legal actions.
+
+        Returns:
+            Action: Selected action.
+        """
+        q_values = self.q_values(self._encoder.encode(state))
+        # Values are in [-1, 1], so this rules out illegal actions in the same way as IOHelpers.policy.
+        q_values[~legal_action_mask(state)] = -100
+        return ACTIONS[int(np.argmax(q_values))]
+
+    def load_model(self) -> None:
+        """Load the exported weights from file."""
+        self.layers = load_weights(self._file)
@@ -1,4 +1,8 @@
 """Entry point for NN training."""
+import argparse
+
+import torch
+
 from schnapsen.ai.better_player import BetterPlayer
 from schnapsen.ai.neural_network.simple_linear.nn_linear_player import NNSimpleLinearPlayer
 from schnapsen.ai.neural_network.simple_linear.trainer import Trainer
@@ -48,7 +52,22 @@ def train(train_config: TrainConfig) -> None:
 
 
 if __name__ == "__main__":
+    # The defaults train in a single process with a small in RAM memory. A long run might instead use e.g.
+    # --memory-size 5000000 --memory-path <directory> --half-precision-states --actors <number of cores - 1>.
+    parser = argparse.ArgumentParser(description='Train the simple linear neural network model.')
+    parser.add_argument('--memory-size', type=int, default=500, help='Number of transitions kept in the replay memory.')
+    parser.add_argument('--memory-path', default=None,
+                        help='Directory to keep the replay memory in, memory-mapped and resumed across sessions.')
+    parser.add_argument('--half-precision-states', action='store_true',
+                        help="Store the memory's states as float16, halving its size.")
+    parser.add_argument('--actors', type=int, default=0,
+                        help='Number of actor processes generating experience. 0 to alternate playing and optimising.')
+    args = parser.parse_args()
     train(TrainConfig(number_actions=100000000,
                       batch_size=200,
-                      memory_size=500,
-                      nb_training_loops_before_reference_model_update=5000))
+                      memory_size=args.memory_size,
+                      memory_state_dtype=torch.float16 if args.half_precision_states else torch.float32,
+                      memory_path=args.memory_path,
+                      nb_training_loops_before_reference_model_update=5000,
+                      number_of_envs=16,
+                      number_of_actors=args.actors))
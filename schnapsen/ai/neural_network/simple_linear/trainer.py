@@ -5,23 +5,32 @@ Heavily references https://pytorch.org/tutorials/intermediate/reinforcement_q_le
 from dataclasses import dataclass
 import logging
 import math
+from multiprocessing.context import BaseContext
+from multiprocessing.synchronize import Event
+import queue
 import random
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+import numpy as np
 import torch
+import torch.multiprocessing
 from torch.nn.functional import smooth_l1_loss
 
-from schnapsen.ai.neural_network.replay_memory import ReplayMemory
+from schnapsen.ai.neural_network.replay_memory import MemmapReplayMemory
+from schnapsen.ai.neural_network.replay_memory import PrioritisedReplayMemory
+from schnapsen.ai.neural_network.replay_memory import TensorReplayMemory
 from schnapsen.ai.neural_network.replay_memory import Transition
 from schnapsen.ai.neural_network.simple_linear.io_helpers import IOHelpers
 from schnapsen.ai.neural_network.simple_linear.nn_linear_module import LinearModule
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.vector_env import VectorMatchEnv
 from schnapsen.core import match_helpers
 from schnapsen.core.action import Action
-from schnapsen.core.actions import ALL_GAME_ACTIONS, get_action_index
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.actions import get_action_index
 from schnapsen.core.match_controller import MatchController
 from schnapsen.core.player import Player
-from schnapsen.core.state import MatchState
-from schnapsen.core.state import PlayerState
 
 GAMMA = 0.95
 REWARD_COST_OF_LIVING = -0.10
@@ -32,6 +41,11 @@ EPS_START = 0.95
 EPS_END = 0.05
 EPS_DECAY = 100000
 
+# Seconds the learner waits for actor transitions before checking the actors are still running.
+ACTOR_QUEUE_TIMEOUT = 1.0
+# Seconds an actor waits for a free transition slot before checking whether it should stop.
+ACTOR_SLOT_TIMEOUT = 0.1
+
 random.seed(0)
 
 @dataclass
@@ -40,16 +54,282 @@ class TrainConfig:
 
     TODO: Detail what this parameters do
     """
-    # The total number of actions to train for.
+    # The total number of training steps to run. Each step takes one action in each of the number_of_envs matches.
     number_actions: int
     # The number of actions to retain in a memory. Used for bulk optimisations.
     memory_size: int = 1000
     # How many actions to sample from memory for each optimisation step.
     batch_size: int = 100
+    # Storage type for the states held in memory. A smaller type (e.g. torch.float16) fits more transitions in RAM.
+    memory_state_dtype: torch.dtype = torch.float32
+    # If true, transitions are sampled in proportion to their last TD error rather than uniformly (see
+    # PrioritisedReplayMemory), so optimisation steps focus on the transitions the model predicts worst.
+    prioritised_replay: bool = False
+    # How strongly priorities skew sampling (0 is uniform).
+    priority_alpha: float = 0.6
+    # Initial importance sampling correction, annealed linearly to 1 over the number_actions optimisation steps.
+    priority_beta: float = 0.4
+    # If set, the memory is kept in memory-mapped files in this directory (see MemmapReplayMemory) rather than RAM,
+    # allowing far larger memory sizes. An existing memory there is reopened, so experience carries over between
+    # training sessions. Not supported with prioritised_replay.
+    memory_path: Optional[str] = None
     # After how many actions do we save out a copy of the latest model and udate our reference model.
     nb_training_loops_before_reference_model_update: int = 1000
     # If true, we save the udpated model to disk upon reference model update. (Gets set to false for testing purposes).
     update_model_on_disk: bool = True
+    # How many matches to play concurrently. Learner actions for all of them are selected in one batched forward pass.
+    number_of_envs: int = 1
+    # If above 0, experience is generated by this many actor processes (each playing number_of_envs matches) while the
+    # main process only optimises, and number_actions counts optimisation steps. Otherwise experience generation and
+    # optimisation alternate in the main process.
+    number_of_actors: int = 0
+    # How many optimisation steps between publishing the learner's weights to the actors.
+    actor_sync_interval: int = 100
+    # Maximum number of pending transition batches from the actors (see SharedTransitionSlots). Actors wait when the
+    # learner falls behind.
+    actor_queue_size: int = 64
+
+
+class Actor:
+    """Plays the training matches, selecting the learner's actions epsilon greedily from a model."""
+
+    def __init__(self, model: LinearModule, player: Player, opponents: List[Player], number_of_envs: int) -> None:
+        """Create actor instance.
+
+        Parameters
+        ----------
+        model : LinearModule
+            The model to select (greedy) actions with.
+        player : Player
+            The learning agent.
+        opponents : List[Player]
+            A set of opponent players. This can be more AI or simple bots.
+        number_of_envs : int
+            How many matches to play concurrently.
+        """
+        self.model = model
+        self.match_controller: MatchController = MatchController()
+        # Letting the game go on for no reason is bad. Discourage living forever
+        self.env = VectorMatchEnv(player, opponents, number_of_envs, cost_of_living=REWARD_COST_OF_LIVING)
+        self.actions_selected = 0
+
+    def reset(self) -> None:
+        """Start new matches in all environments."""
+        self.env.reset()
+
+    def select_actions(self, states: torch.Tensor, legal_masks: torch.Tensor) -> Tuple[torch.Tensor, List[Action]]:
+        """Select an action for each environment, with a single forward pass of the neural network.
+
+        To avoid local minima, introduce some random selections to our actor via the eps_threshold.
+
+        Parameters
+        ----------
+        states : torch.Tensor
+            (N, NUMBER_OF_FEATURES) encoded states.
+        legal_masks : torch.Tensor
+            (N, len(ALL_GAME_ACTIONS)) legal action masks.
+
+        Returns
+        -------
+        Tuple[torch.Tensor, List[Action]]
+            (N,) action ids and the corresponding actions.
+        """
+        explore = []
+        for _ in range(len(states)):
+            eps_threshold = EPS_END + \
+                (EPS_START - EPS_END) * \
+                math.exp(-1. * self.actions_selected / EPS_DECAY)
+            self.actions_selected += 1
+            explore.append(random.random() > eps_threshold)
+
+        if all(explore):
+            action_ids = torch.zeros(len(states), dtype=torch.long)
+        else:
+            with torch.no_grad():
+                q_values = self.model(states)
+            # this is more than a little hacky but in reality filters out illegal moves sufficiently
+            q_values[~legal_masks] = -100
+            action_ids = q_values.argmax(1)
+
+        for i in np.flatnonzero(explore):
+            action = random.choice(self.match_controller.get_valid_actions(self.env.match_states[i]))
+            action_ids[i] = get_action_index(action=action)
+        return action_ids, [ACTIONS[i] for i in action_ids.tolist()]
+
+    def act(self) -> Transition:
+        """Take one learner action in every environment.
+
+        Returns
+        -------
+        Transition
+            The resulting transitions, batched. Each field has a leading (N,) dimension.
+        """
+        states = torch.from_numpy(self.env.states)
+        action_ids, actions = self.select_actions(states, torch.from_numpy(self.env.legal_masks))
+        result = self.env.step(actions)
+        return Transition(states, action_ids, torch.from_numpy(result.next_states),
+                          torch.from_numpy(result.next_legal_masks), torch.from_numpy(result.rewards))
+
+
+class SharedTransitionSlots:
+    """Fixed slots of batched transitions in shared memory, handed between the actors and the learner by index.
+
+    An actor takes a free slot, writes its batch of transitions into the slot in place and passes the slot's index to
+    the learner. The learner copies the batch into its replay memory and frees the slot again. Only slot indices go
+    through the queues, so batches are never pickled.
+    """
+
+    def __init__(self, context: BaseContext, number_of_slots: int, number_of_envs: int) -> None:
+        """Allocate the slots, all free.
+
+        Parameters
+        ----------
+        context : BaseContext
+            Multiprocessing context the actors are started with.
+        number_of_slots : int
+            Number of slots, i.e. the maximum number of pending batches.
+        number_of_envs : int
+            Number of transitions per batch (one per environment of an actor).
+        """
+        shape = (number_of_slots, number_of_envs)
+        self.buffers = Transition(torch.zeros(*shape, NUMBER_OF_FEATURES).share_memory_(),
+                                  torch.zeros(*shape, dtype=torch.long).share_memory_(),
+                                  torch.zeros(*shape, NUMBER_OF_FEATURES).share_memory_(),
+                                  torch.zeros(*shape, len(ALL_GAME_ACTIONS), dtype=torch.bool).share_memory_(),
+                                  torch.zeros(*shape).share_memory_())
+        self.free_slots = context.Queue()
+        self.filled_slots = context.Queue()
+        for slot in range(number_of_slots):
+            self.free_slots.put(slot)
+
+    def put(self, transitions: Transition, stop_event: Event) -> None:
+        """Write a batch of transitions into a free slot and pass it to the learner (actor side).
+
+        Waits for a free slot while the learner is behind, unless told to stop.
+
+        Parameters
+        ----------
+        transitions : Transition
+            Batched tensors, each with a leading (number_of_envs,) dimension.
+        stop_event : Event
+            Set by the learner when training is complete.
+        """
+        while not stop_event.is_set():
+            try:
+                slot = self.free_slots.get(timeout=ACTOR_SLOT_TIMEOUT)
+            except queue.Empty:
+                continue
+            for buffer, field in zip(self.buffers, transitions):
+                buffer[slot] = field
+            self.filled_slots.put(slot)
+            return
+
+    def get(self, block: bool, timeout: float) -> int:
+        """Take the index of a filled slot (learner side). Free it with release once its batch has been copied.
+
+        Parameters
+        ----------
+        block : bool
+            If true, wait up to timeout for a filled slot.
+        timeout : float
+            Seconds to wait.
+
+        Returns
+        -------
+        int
+            Slot index.
+
+        Raises
+        ------
+        queue.Empty
+            If no slot was filled in time.
+        """
+        return self.filled_slots.get(block=block, timeout=timeout)
+
+    def batch(self, slot: int) -> Transition:
+        """Get a slot's batch of transitions, as views of the shared buffers.
+
+        Parameters
+        ----------
+        slot : int
+            Slot index.
+
+        Returns
+        -------
+        Transition
+            Batched tensors.
+        """
+        return Transition(*(buffer[slot] for buffer in self.buffers))
+
+    def release(self, slot: int) -> None:
+        """Hand a slot back to the actors.
+
+        Parameters
+        ----------
+        slot : int
+            Slot index.
+        """
+        self.free_slots.put(slot)
+
+
+def run_actor(actor_id: int, player: Player, opponents: List[Player], train_config: TrainConfig,
+              shared_model: LinearModule, transition_slots: SharedTransitionSlots, stop_event: Event) -> None:
+    """Actor process entry point: generate experience until told to stop.
+
+    Parameters
+    ----------
+    actor_id : int
+        Index of the actor, used to seed it.
+    player : Player
+        The learning agent.
+    opponents : List[Player]
+        A set of opponent players.
+    train_config : TrainConfig
+        The training config.
+    shared_model : LinearModule
+        The learner's published weights (in shared memory). Copied into the actor's own model periodically.
+    transition_slots : SharedTransitionSlots
+        Shared memory slots to pass batched transitions to the learner through.
+    stop_event : Event
+        Set by the learner when training is complete.
+    """
+    random.seed(actor_id)
+    torch.manual_seed(actor_id)
+    # A single thread per actor, the cores are better spent on more actors.
+    torch.set_num_threads(1)
+    model = LinearModule(NUMBER_OF_FEATURES, HIDDEN_LAYER_SIZE, len(ALL_GAME_ACTIONS))
+    actor = Actor(model, player, opponents, train_config.number_of_envs)
+    actor.reset()
+
+    # Pending transitions are simply dropped at shutdown, don't wait for the learner to read them before exiting.
+    transition_slots.filled_slots.cancel_join_thread()
+    steps = 0
+    while not stop_event.is_set():
+        if steps % train_config.actor_sync_interval == 0:
+            model.load_state_dict(shared_model.state_dict())
+        transition_slots.put(actor.act(), stop_event)
+        steps += 1
+
+
+def check_actors(actors: List[torch.multiprocessing.Process]) -> None:
+    """Check that the actor processes are still running.
+
+    Actors only exit once the learner tells them to stop, so any that has exited during training has failed (e.g. with
+    an exception or being killed).
+
+    Parameters
+    ----------
+    actors : List[torch.multiprocessing.Process]
+        The actor processes.
+
+    Raises
+    ------
+    RuntimeError
+        If an actor process has exited.
+    """
+    exit_codes = [actor.exitcode for actor in actors if not actor.is_alive()]
+    if exit_codes:
+        raise RuntimeError(f"{len(exit_codes)} of {len(actors)} actor processes exited (exit codes {exit_codes})")
 
 
 class Trainer:
@@ -68,26 +348,18 @@ class Trainer:
         opponents : List[Player]
             A set of opponent players. This can be more AI or simple bots.
         """
-        self.match_controller: MatchController = MatchController()
-        self.match_state: MatchState = None
+        self.actor: Actor = None
         self.player: Player = player
-        self.player_state: PlayerState = None   # For convenience
         self.opponents = opponents       # Collection of AI opponents to train against
         # Override the automatic action behaviour when training
         self.player.automated = False
         self.memory = None
         self.logger = logging.getLogger()
-        self.actions_selected = 0
         self.optimizer_count = 0
         self.reference_model = None
         self._cumulative_loss = 0
 
-        # Create a usable game state just figure out require vector sizes for network.
-        self.__create_match_vs_random_opponent()
-        self.match_controller.reset_round_state(self.match_state)
-        mock_inputs = IOHelpers.create_input_from_game_state(state=self.match_state)
-
-        input_size = len(mock_inputs)
+        input_size = NUMBER_OF_FEATURES
         output_size = len(ALL_GAME_ACTIONS)
 
         # Define simple NN layers
@@ -102,36 +374,18 @@ class Trainer:
         self.model = self.player.model
         self._update_reference_model()
 
-    def __create_match_vs_random_opponent(self):
-        self.match_state = self.match_controller.get_new_match_state(
-            player_1=self.player, player_2=random.choice(self.opponents))
-        self.player_state = self.match_state.player_states[self.player]
-
-    def __player_reward(self, prior_round_points, prior_match_points, round_points, match_points):
-        # TODO: Detail the logic here. This can/should almost certainly be tweaked!
-        return torch.tensor(
-            # Letting the game go on for no reason is bad. Discourage living forever
-            REWARD_COST_OF_LIVING +                 # noqa: W504
-            # Reward more match points
-            (match_points - prior_match_points) +   # noqa: W504
-            # Game points (but not as much as match points)
-            (round_points - prior_round_points) / \
-            self.match_state.round_point_limit,
-            dtype=torch.float)
-
     def __optimize(self, batch_size):
         if len(self.memory) < batch_size:
             return
         # Prepare batch replay
 
-        transitions = self.memory.sample(batch_size)
-        batch = Transition(*zip(*transitions))
-        state_batch = torch.cat(batch.state).view(batch_size, -1)
-        action_batch = torch.cat(batch.action).view(batch_size, -1)
-        next_state_batch = torch.cat(batch.next_state).view(batch_size, -1)
-        next_legal_actions_batch = torch.cat(
-            batch.next_legal_actions).view(batch_size, -1)
-        reward_batch = torch.tensor(batch.reward)
+        # Batches come straight out of the memory's preallocated tensors.
+        weights = None
+        if isinstance(self.memory, PrioritisedReplayMemory):
+            transitions, indices, weights = self.memory.sample_with_weights(batch_size)
+        else:
+            transitions = self.memory.sample(batch_size)
+        state_batch, action_batch, next_state_batch, next_legal_actions_batch, reward_batch = transitions
 
         # Build Q(S,A) map
         state_action_values = self.model(state_batch).gather(1, action_batch)
@@ -144,8 +398,14 @@ class Trainer:
             next_state_values * GAMMA) + reward_batch
 
         # Compute Huber loss
-        loss = smooth_l1_loss(state_action_values,
-                              expected_state_action_values.unsqueeze(1))
+        expected_state_action_values = expected_state_action_values.unsqueeze(1)
+        if weights is None:
+            loss = smooth_l1_loss(state_action_values, expected_state_action_values)
+        else:
+            # Importance sampling weights undo the bias from sampling by priority.
+            losses = smooth_l1_loss(state_action_values, expected_state_action_values, reduction='none')
+            loss = (losses.squeeze(1) * weights).mean()
+            self.memory.update_priorities(indices, (expected_state_action_values - state_action_values).squeeze(1))
         self._cumulative_loss += float(loss)
 
         # Optimize the model
@@ -156,15 +416,6 @@ class Trainer:
         self.optimizer.step()
         self.optimizer_count += 1
 
-    def _start_new_match(self) -> None:
-        self.__create_match_vs_random_opponent()
-        self._start_new_game()
-
-    def _start_new_game(self) -> None:
-        self.match_controller.reset_round_state(self.match_state)
-        # Increment state if action not on NN player
-        self.match_controller.progress_automated_actions(self.match_state)
-
     def _update_reference_model(self) -> None:
         self.reference_model.load_state_dict(self.model.state_dict())
 
@@ -176,72 +427,125 @@ class Trainer:
         train_config : TrainConfig
             A training config object. See TrainConfig for details.
         """
-        self.memory = ReplayMemory(train_config.memory_size)
-        self._start_new_match()
+        self.memory = self._create_memory(train_config)
+        if train_config.number_of_actors > 0:
+            self._train_with_actors(train_config)
+            return
+
+        self.actor = Actor(self.model, self.player, self.opponents, train_config.number_of_envs)
+        self.actor.reset()
 
         for i in range(train_config.number_actions):
             self.single_training_loop(train_config.batch_size)
             # Every few thousand epochs save out the trained model to disk
             # (so we can break the program without losing progress)
             if i % train_config.nb_training_loops_before_reference_model_update == 0 and i > 0:
-                self._update_reference_model()
-                logging.info("%i actions run. Optimizer count: %i. loss: %f", i, self.optimizer_count,
-                             self._cumulative_loss / train_config.nb_training_loops_before_reference_model_update)
-                self._cumulative_loss = 0
-
-                # For testing we may wish to not update the persisted model
-                if train_config.update_model_on_disk:
-                    self.player.save_model()
+                self._checkpoint(i, train_config)
+                # Restart the training matches after validation
+                self.actor.reset()
+
+    @staticmethod
+    def _create_memory(train_config: TrainConfig) -> TensorReplayMemory:
+        if train_config.prioritised_replay:
+            if train_config.memory_path is not None:
+                raise ValueError("prioritised_replay can't be combined with memory_path")
+            return PrioritisedReplayMemory(
+                train_config.memory_size, NUMBER_OF_FEATURES, len(ALL_GAME_ACTIONS),
+                state_dtype=train_config.memory_state_dtype, alpha=train_config.priority_alpha,
+                beta=train_config.priority_beta,
+                beta_increment=(1 - train_config.priority_beta) / max(1, train_config.number_actions))
+        if train_config.memory_path is not None:
+            return MemmapReplayMemory(train_config.memory_path, train_config.memory_size, NUMBER_OF_FEATURES,
+                                      len(ALL_GAME_ACTIONS), state_dtype=train_config.memory_state_dtype)
+        return TensorReplayMemory(train_config.memory_size, NUMBER_OF_FEATURES, len(ALL_GAME_ACTIONS),
+                                  state_dtype=train_config.memory_state_dtype)
+
+    def _checkpoint(self, i: int, train_config: TrainConfig) -> None:
+        self._update_reference_model()
+        logging.info("%i actions run. Optimizer count: %i. loss: %f", i, self.optimizer_count,
+                     self._cumulative_loss / train_config.nb_training_loops_before_reference_model_update)
+        self._cumulative_loss = 0
 
-                # Reset game state and play a bunch of games for validation
-                self._start_new_match()
-                self.player.automated = True
-                match_helpers.play_automated_matches(player_1=self.match_state.players[0],
-                                                     player_2=self.match_state.players[1],
-                                                     number_of_matches=100)
-                self.player.automated = False
+        # For testing we may wish to not update the persisted model
+        if train_config.update_model_on_disk:
+            self.player.save_model()
+        if isinstance(self.memory, MemmapReplayMemory):
+            self.memory.flush()
+
+        # Play a bunch of games for validation
+        self.player.automated = True
+        match_helpers.play_automated_matches(player_1=self.player,
+                                             player_2=random.choice(self.opponents),
+                                             number_of_matches=100)
+        self.player.automated = False
 
-                self._start_new_match()
+    def single_training_loop(self, batch_size: int):
+        self.memory.push_batch(self.actor.act())
+        self.__optimize(batch_size)
 
-    def select_action(self, state: MatchState) -> Tuple[int, Action]:
-        """Select action with the neural network to select next move.
+    def _train_with_actors(self, train_config: TrainConfig) -> None:
+        # Actor processes play the matches with a copy of the model, periodically synced from shared memory weights,
+        # and send their transitions back through shared memory slots.
+        context = torch.multiprocessing.get_context("spawn")
+        shared_model = LinearModule(NUMBER_OF_FEATURES, HIDDEN_LAYER_SIZE, len(ALL_GAME_ACTIONS))
+        shared_model.load_state_dict(self.model.state_dict())
+        shared_model.share_memory()
+        transition_slots = SharedTransitionSlots(context, train_config.actor_queue_size, train_config.number_of_envs)
+        stop_event = context.Event()
+        actors = [context.Process(target=run_actor, daemon=True,
+                                  args=(actor_id, self.player, self.opponents, train_config, shared_model,
+                                        transition_slots, stop_event))
+                  for actor_id in range(train_config.number_of_actors)]
+        for actor in actors:
+            actor.start()
+
+        try:
+            for i in range(train_config.number_actions):
+                self._receive_transitions(transition_slots, actors, train_config.batch_size)
+                self.__optimize(train_config.batch_size)
+
+                if i % train_config.actor_sync_interval == 0:
+                    shared_model.load_state_dict(self.model.state_dict())
+                if i % train_config.nb_training_loops_before_reference_model_update == 0 and i > 0:
+                    self._checkpoint(i, train_config)
+        finally:
+            stop_event.set()
+            for actor in actors:
+                actor.join(timeout=5)
+                if actor.is_alive():
+                    actor.terminate()
+
+    def _receive_transitions(self, transition_slots: SharedTransitionSlots,
+                             actors: List[torch.multiprocessing.Process], batch_size: int) -> None:
+        """Move transitions from the actors' shared memory slots into the replay memory.
+
+        Waits for experience while the memory can't fill a batch. Otherwise takes what has already arrived, at most one
+        batch of transitions per actor, so that optimisation isn't starved however fast the actors are.
 
-        To avoid local minima, introduce some random selections to our actor via the eps_threshold.
+        Parameters
+        ----------
+        transition_slots : SharedTransitionSlots
+            Slots the actors pass batched transitions through.
+        actors : List[torch.multiprocessing.Process]
+            The actor processes.
+        batch_size : int
+            Optimisation batch size.
+
+        Raises
+        ------
+        RuntimeError
+            If an actor process has exited.
         """
-        sample = random.random()
-        eps_threshold = EPS_END + \
-            (EPS_START - EPS_END) * \
-            math.exp(-1. * self.actions_selected / EPS_DECAY)
-        self.actions_selected += 1
-
-        if sample > eps_threshold:
-            action = random.choice(self.match_controller.get_valid_actions(self.match_state))
-            i = get_action_index(action=action)
-            return torch.tensor([i], dtype=torch.long), action
-        else:
-            with torch.no_grad():
-                q_values = self.model(state)
-            return IOHelpers.policy(q_values, self.match_state)
-
-    def single_training_loop(self, batch_size: int):
-        prior_round_points = self.player_state.round_points
-        prior_match_points = self.player_state.match_points
-        state = IOHelpers.create_input_from_game_state(self.match_state)
-        action_id, action = self.select_action(state)
-
-        # Apply action and perform any opponent actions. I.e. continue game until our turn to act
-        self.match_controller.perform_action(self.match_state, action)
-        self.match_controller.progress_automated_actions(self.match_state)
-
-        next_state = IOHelpers.create_input_from_game_state(self.match_state)
-        reward = self.__player_reward(prior_round_points, prior_match_points,
-                                      self.player_state.round_points, self.player_state.match_points)
-        next_legal_actions, _ = IOHelpers.get_legal_actions(self.match_state)
-        self.memory.push(state, action_id, next_state,
-                         next_legal_actions.unsqueeze(0), reward)
-        self.__optimize(batch_size)
-        # Update game state as necessary
-        if self.match_state.match_winner:
-            self._start_new_match()
-        if self.match_state.round_winner:
-            self._start_new_game()
+        number_received = 0
+        while len(self.memory) < batch_size or number_received < len(actors):
+            waiting = len(self.memory) < batch_size
+            try:
+                slot = transition_slots.get(block=waiting, timeout=ACTOR_QUEUE_TIMEOUT)
+            except queue.Empty:
+                check_actors(actors)
+                if waiting:
+                    continue
+                break
+            self.memory.push_batch(transition_slots.batch(slot))
+            transition_slots.release(slot)
+            number_received += 1
@@ -0,0 +1,114 @@
+"""Encode match states into the flat feature vector used by the simple linear network.
+
+Features are written straight into preallocated NumPy buffers using precomputed column offsets per card bit (see
+schnapsen.core.card_set), so encoding a state is a handful of vectorised assignments rather than building per card
+objects and Python lists. Only NumPy is required here so the module is usable without torch.
+
+Layout (NUMBER_OF_FEATURES values):
+    For each card, suits ordered Diamonds, Clubs, Spades, Hearts and values in Value order, 7 features:
+        suit / 3, value / round point limit, in my hand, in opponent's hand (always 0, that would be cheating),
+        won by me, won by opponent, is the leading card.
+    Then: deck closed, my points to victory and opponent's points to victory (both / round point limit).
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.card_set import card_bit
+from schnapsen.core.card_set import CARDS
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.state import MatchState
+
+_ENCODED_SUIT_ORDER = (Suit.DIAMOND, Suit.CLUB, Suit.SPADE, Suit.HEART)
+ENCODED_CARDS = tuple(Card(suit, value) for suit in _ENCODED_SUIT_ORDER for value in Value)
+
+FEATURES_PER_CARD = 7
+_SUIT, _VALUE, _IN_MY_HAND, _IN_OPPONENT_HAND, _WON_BY_ME, _WON_BY_OPPONENT, _IS_LEADING_CARD = \
+    range(FEATURES_PER_CARD)
+CARD_FEATURES = len(ENCODED_CARDS) * FEATURES_PER_CARD
+DECK_CLOSED_FEATURE = CARD_FEATURES
+MY_POINTS_TO_VICTORY_FEATURE = CARD_FEATURES + 1
+OPPONENTS_POINTS_TO_VICTORY_FEATURE = CARD_FEATURES + 2
+NUMBER_OF_FEATURES = CARD_FEATURES + 3
+
+# First feature column of each card, in encoded order and indexed by card bit respectively.
+_CARD_COLUMNS = np.arange(len(ENCODED_CARDS)) * FEATURES_PER_CARD
+_BIT_COLUMNS = np.array([ENCODED_CARDS.index(card) * FEATURES_PER_CARD for card in CARDS])
+_CARD_BITS = np.left_shift(1, np.arange(len(CARDS), dtype=np.int64))
+_SUIT_FEATURES = np.array([card.suit / 3 for card in ENCODED_CARDS])
+_VALUES = np.array([card.value for card in ENCODED_CARDS], dtype=np.float64)
+# Feature columns for each of the masks gathered per state, flattened in (mask, card bit) order.
+_MASK_COLUMNS = np.concatenate([_BIT_COLUMNS + feature
+                                for feature in (_IN_MY_HAND, _WON_BY_ME, _WON_BY_OPPONENT, _IS_LEADING_CARD)])
+_TEMPLATE = np.zeros(NUMBER_OF_FEATURES, dtype=np.float32)
+_TEMPLATE[_CARD_COLUMNS + _SUIT] = _SUIT_FEATURES
+
+
+class StateEncoder:
+    """Encodes match states (from the active player's perspective) into reusable float32 buffers.
+
+    Arrays returned without an explicit out buffer are owned by the encoder and overwritten by the next call; copy
+    them if they need to be retained.
+    """
+
+    def __init__(self) -> None:
+        """Create an encoder with an empty batch buffer."""
+        self._buffer = np.zeros(NUMBER_OF_FEATURES, dtype=np.float32)
+        self._batch_buffer = np.zeros((0, NUMBER_OF_FEATURES), dtype=np.float32)
+
+    def encode(self, state: MatchState, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode a single state.
+
+        Args:
+            state (MatchState): Current match state.
+            out (Optional[np.ndarray], optional): Contiguous float array of shape (NUMBER_OF_FEATURES,) to write into.
+                Defaults to None, using the encoder's own buffer.
+
+        Returns:
+            np.ndarray: The encoded features (out, if given).
+        """
+        if out is None:
+            out = self._buffer
+        self.encode_batch((state,), out[None])
+        return out
+
+    def encode_batch(self, states: Sequence[MatchState], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode many states into one (B, NUMBER_OF_FEATURES) array.
+
+        Args:
+            states (Sequence[MatchState]): Match states.
+            out (Optional[np.ndarray], optional): Float array of shape (len(states), NUMBER_OF_FEATURES) to write into.
+                Defaults to None, using the encoder's own (grown as required) buffer.
+
+        Returns:
+            np.ndarray: The encoded features (out, if given).
+        """
+        number_of_states = len(states)
+        if out is None:
+            if len(self._batch_buffer) < number_of_states:
+                self._batch_buffer = np.zeros((number_of_states, NUMBER_OF_FEATURES), dtype=np.float32)
+            out = self._batch_buffer[:number_of_states]
+
+        masks = np.empty((number_of_states, 4), dtype=np.int64)
+        scalars = np.empty((number_of_states, 3), dtype=np.float64)
+        round_point_limits = np.empty((number_of_states, 1), dtype=np.float64)
+        for i, state in enumerate(states):
+            player_state = state.player_states[state.active_player]
+            opponent_state = state.player_states[state.get_other_player(state.active_player)]
+            leading_card = state.leading_card
+            masks[i] = (cards_mask(player_state.hand), cards_mask(player_state.cards_won),
+                        cards_mask(opponent_state.cards_won), 0 if leading_card is None else card_bit(leading_card))
+            scalars[i] = (state.deck_closed,
+                          (state.match_point_limit - player_state.round_points) / state.round_point_limit,
+                          (state.match_point_limit - opponent_state.round_points) / state.round_point_limit)
+            round_point_limits[i] = state.round_point_limit
+
+        # The suit and opponent's hand features are constant, everything else is overwritten below.
+        out[:] = _TEMPLATE
+        out[:, _CARD_COLUMNS + _VALUE] = _VALUES / round_point_limits
+        out[:, _MASK_COLUMNS] = ((masks[:, :, None] & _CARD_BITS) != 0).reshape(number_of_states, -1)
+        out[:, CARD_FEATURES:] = scalars
+        return out
@@ -0,0 +1,150 @@
+"""Vectorised training environment: many concurrent matches between a learner and an opponent pool.
+
+Each environment is a full MatchController match against an opponent drawn at random from the pool. Stepping applies
+one learner action per match, progresses the automated opponents until it's the learner's turn again, and returns the
+encoded states of all matches at once so a model can evaluate them in a single batched forward pass. Rounds and
+matches are restarted automatically when they end. Only NumPy is required here so the module is usable without torch.
+"""
+from dataclasses import dataclass
+import random
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from schnapsen.ai.neural_network.action_masks import legal_action_masks
+from schnapsen.ai.neural_network.action_masks import NUMBER_OF_ACTIONS
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.core.action import Action
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+
+
+def player_reward(prior_round_points: int, prior_match_points: int, round_points: int, match_points: int,
+                  round_point_limit: int, cost_of_living: float) -> float:
+    """Reward for a single learner action.
+
+    Args:
+        prior_round_points (int): Learner's round points before the action.
+        prior_match_points (int): Learner's match points before the action.
+        round_points (int): Learner's round points after the action (and any opponent actions).
+        match_points (int): Learner's match points after the action (and any opponent actions).
+        round_point_limit (int): Round point limit, used to scale round points.
+        cost_of_living (float): Constant added to every reward (negative to discourage dragging games out).
+
+    Returns:
+        float: The reward.
+    """
+    # Match points decide the match, so each is worth a full reward. Round points only matter for winning the round.
+    # Scaled by the limit, reaching it is worth a single match point, which gives the learner feedback on each hand
+    # without outweighing the round's result (winning a round scores 1 to 3 match points).
+    return (cost_of_living
+            + (match_points - prior_match_points)
+            + (round_points - prior_round_points) / round_point_limit)
+
+
+@dataclass
+class StepResult:
+    """Outcome of VectorMatchEnv.step, one row per environment.
+
+    The states are those reached by each action, before any automatic reset, as required for experience replay. The
+    states to act on next are VectorMatchEnv.states.
+    """
+    next_states: np.ndarray        # (N, NUMBER_OF_FEATURES) float32
+    next_legal_masks: np.ndarray   # (N, NUMBER_OF_ACTIONS) bool
+    rewards: np.ndarray            # (N,) float32
+    round_ends: np.ndarray         # (N,) bool, True if the action ended the round (and so the environment was reset)
+
+
+class VectorMatchEnv:
+    """N concurrent learner vs opponent pool matches with automatic resets."""
+
+    def __init__(self, player: Player, opponents: List[Player], number_of_envs: int,
+                 cost_of_living: float = 0.0) -> None:
+        """Create the environments. Call reset before stepping.
+
+        Args:
+            player (Player): The learning agent. It must not be automated, its actions are supplied to step.
+            opponents (List[Player]): Automated opponents, one is chosen at random for each new match.
+            number_of_envs (int): Number of concurrent matches.
+            cost_of_living (float, optional): See player_reward. Defaults to 0.0.
+        """
+        self.player = player
+        self.opponents = opponents
+        self.number_of_envs = number_of_envs
+        self.cost_of_living = cost_of_living
+        self.match_controller = MatchController()
+        self.match_states: List[MatchState] = [None] * number_of_envs
+        self.encoder = StateEncoder()
+        # Encoded states and legal action masks of the learner's turn in each match.
+        self.states = np.zeros((number_of_envs, NUMBER_OF_FEATURES), dtype=np.float32)
+        self.legal_masks = np.zeros((number_of_envs, NUMBER_OF_ACTIONS), dtype=bool)
+
+    def reset(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Start new matches in every environment.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The encoded states and legal action masks to act on.
+        """
+        for index in range(self.number_of_envs):
+            self._start_new_match(index)
+        self.states = self._encode(self.match_states)
+        self.legal_masks = legal_action_masks(self.match_states)
+        return self.states, self.legal_masks
+
+    def step(self, actions: Sequence[Action]) -> StepResult:
+        """Apply one learner action per environment.
+
+        Args:
+            actions (Sequence[Action]): A legal action for each environment.
+
+        Returns:
+            StepResult: States reached, rewards and round ends.
+        """
+        rewards = np.empty(self.number_of_envs, dtype=np.float32)
+        for index, (state, action) in enumerate(zip(self.match_states, actions)):
+            player_state = state.player_states[self.player]
+            prior_round_points = player_state.round_points
+            prior_match_points = player_state.match_points
+
+            # Apply action and perform any opponent actions. I.e. continue game until our turn to act
+            self.match_controller.perform_action(state, action)
+            self.match_controller.progress_automated_actions(state)
+
+            rewards[index] = player_reward(prior_round_points, prior_match_points, player_state.round_points,
+                                           player_state.match_points, state.round_point_limit, self.cost_of_living)
+
+        result = StepResult(next_states=self._encode(self.match_states),
+                            next_legal_masks=legal_action_masks(self.match_states),
+                            rewards=rewards,
+                            round_ends=np.array([state.round_winner is not None for state in self.match_states]))
+
+        self.states = result.next_states.copy()
+        self.legal_masks = result.next_legal_masks.copy()
+        reset_indices = np.flatnonzero(result.round_ends)
+        if reset_indices.size:
+            for index in reset_indices:
+                if self.match_states[index].match_winner:
+                    self._start_new_match(index)
+                else:
+                    self._start_new_round(index)
+            reset_states = [self.match_states[index] for index in reset_indices]
+            self.states[reset_indices] = self._encode(reset_states)
+            self.legal_masks[reset_indices] = legal_action_masks(reset_states)
+        return result
+
+    def _encode(self, states: Sequence[MatchState]) -> np.ndarray:
+        # Always a fresh array so results can be retained (e.g. in a replay memory).
+        return self.encoder.encode_batch(states, out=np.empty((len(states), NUMBER_OF_FEATURES), dtype=np.float32))
+
+    def _start_new_match(self, index: int) -> None:
+        self.match_states[index] = self.match_controller.get_new_match_state(
+            player_1=self.player, player_2=random.choice(self.opponents))
+        self._start_new_round(index)
+
+    def _start_new_round(self, index: int) -> None:
+        state = self.match_states[index]
+        self.match_controller.reset_round_state(state)
+        # Increment state if action not on the learner
+        self.match_controller.progress_automated_actions(state)
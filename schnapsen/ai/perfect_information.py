@@ -0,0 +1,387 @@
+"""Fast perfect information search of a (determinised) Schnapsen round.
+
+Searches that visit many positions (e.g. solving dozens of determinisations per move) are dominated by the cost of
+MatchController.perform_action and MatchState cloning. This module plays the rules of MatchController on a compact state
+instead: a tuple of ints, with hands as card bit masks (see schnapsen.core.card_set) and actions as ALL_GAME_ACTIONS
+indices. Children are new tuples, so there is nothing to undo, and tuples are hashable so they key the search's table
+directly.
+
+PerfectInformationSolver runs a negamax alpha-beta search over compact states. Once the deck is closed (or exhausted) no
+more cards are drawn, so positions where it's closed are searched to the end of the round and their values are exact.
+Otherwise the search is limited to a number of actions after which positions are scored by their round point difference.
+Closing the deck can be left out of the search of open deck positions: solving every closing line is the bulk of the
+cost, and with the hidden cards known closing looks far safer than it is. Moves are ordered with the table's best move
+for the position first, then marriages, swapping the trump, high cards and finally closing the deck. Values are match
+points from the active player's perspective.
+
+Besides searching determinisations for the PimcPlayer, the solver evaluates closed deck leaves of MCTS searches (see
+MCTS.solve_endgames).
+"""
+from typing import Dict, List, Optional, Tuple
+
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.actions import CLOSE_DECK_ACTION_MASK
+from schnapsen.core.actions import MARRIAGE_ACTION_MASKS
+from schnapsen.core.actions import SWAP_TRUMP_ACTION_MASK
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import CARDS
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.card_set import higher_cards_mask
+from schnapsen.core.card_set import MARRIAGE_MASKS
+from schnapsen.core.card_set import NUMBER_OF_CARDS
+from schnapsen.core.card_set import RANK_ORDER
+from schnapsen.core.card_set import SUIT_MASKS
+from schnapsen.core.state import MatchState
+
+# (hand 0, hand 1, round points 0, round points 1, unawarded marriage points 0, unawarded marriage points 1, deck
+#  (card indices, dealt from the end), trump card, leading player, leading card (NO_CARD if none), deck closed, deck
+#  closer (NO_PLAYER if none), match points on offer 0, match points on offer 1). Players are indices into
+#  MatchState.players.
+CompactState = Tuple[int, int, int, int, int, int, Tuple[int, ...], int, int, int, bool, int, int, int]
+
+NO_CARD = -1
+NO_PLAYER = -1
+
+SWAP_TRUMP_ACTION = SWAP_TRUMP_ACTION_MASK.bit_length() - 1
+CLOSE_DECK_ACTION = CLOSE_DECK_ACTION_MASK.bit_length() - 1
+
+_ROUND_POINT_LIMIT = 66
+# Largest value magnitude (winning 3 match points).
+MAX_VALUE = 3
+# Search depth for positions where the deck is closed, more than the number of actions left in any round.
+_FULL_DEPTH = 100
+
+# Per card lookups, indexed by card bit.
+_CARD_SUITS = [card.suit for card in CARDS]
+_CARD_VALUES = [int(card.value) for card in CARDS]
+_HIGHER_CARDS_MASKS = [higher_cards_mask(card.suit, card.value) for card in CARDS]
+# Per suit lookups.
+_JACK_BITS = [1 << card_index(Card(suit, Value.JACK)) for suit in sorted(Suit)]
+_MARRIAGE_ACTIONS = [[index for index in range(len(ACTIONS)) if MARRIAGE_ACTION_MASKS[suit] >> index & 1]
+                     for suit in sorted(Suit)]
+# Per action lookups, indexed by action index.
+_ACTION_CARDS = [NO_CARD if action.card is None else card_index(action.card) for action in ACTIONS]
+_ACTION_DECLARES_MARRIAGE = [action.declare_marriage for action in ACTIONS]
+# Card play actions, highest rank first.
+_CARD_ACTION_ORDER = [index for rank in reversed(range(len(RANK_ORDER)))
+                      for index in range(rank, NUMBER_OF_CARDS, len(RANK_ORDER))]
+
+# Table entry flags: whether a stored value is exact (for its depth) or a bound from an alpha-beta cut off.
+_EXACT = 0
+_LOWER_BOUND = 1
+_UPPER_BOUND = 2
+
+
+def compact_state(state: MatchState) -> CompactState:
+    """Convert a match state to a compact state.
+
+    Args:
+        state (MatchState): State of an unfinished round. Both hands are taken as known, so pass a determinisation if
+            they're not.
+
+    Returns:
+        CompactState: The equivalent compact state.
+    """
+    players = state.players
+    player_states = [state.player_states[player] for player in players]
+    unawarded_marriage_points = [0, 0]
+    for marriage_info in state.marriages_info.values():
+        if not marriage_info["marriage"].points_awarded:
+            unawarded_marriage_points[_player_index(state, marriage_info["player"])] += marriage_info["marriage"].points
+    return (cards_mask(player_states[0].hand), cards_mask(player_states[1].hand),
+            player_states[0].round_points, player_states[1].round_points,
+            unawarded_marriage_points[0], unawarded_marriage_points[1],
+            tuple(card_index(card) for card in state.deck), card_index(state.trump_card),
+            _player_index(state, state.leading_player),
+            NO_CARD if state.leading_card is None else card_index(state.leading_card),
+            state.deck_closed, NO_PLAYER if state.deck_closer is None else _player_index(state, state.deck_closer),
+            player_states[0].match_points_on_offer, player_states[1].match_points_on_offer)
+
+
+def can_solve(state: MatchState) -> bool:
+    """Check whether the rest of a round can be solved exactly.
+
+    Args:
+        state (MatchState): Match state.
+
+    Returns:
+        bool: True if the deck is closed or exhausted (which also closes it) and the round hasn't finished.
+    """
+    return state.deck_closed and state.round_winner is None
+
+
+def _player_index(state: MatchState, player: object) -> int:
+    return 0 if player is state.players[0] else 1
+
+
+def active_player(state: CompactState) -> int:
+    """Get the player to act.
+
+    Args:
+        state (CompactState): Compact state.
+
+    Returns:
+        int: Player index.
+    """
+    return state[8] if state[9] == NO_CARD else 1 - state[8]
+
+
+def legal_actions(state: CompactState) -> List[int]:
+    """Get the legal actions, as for MatchController.get_valid_action_mask.
+
+    Args:
+        state (CompactState): Compact state.
+
+    Returns:
+        List[int]: Legal action indices, in search order: marriages, swap trump, cards (highest rank first) and then
+            close deck.
+    """
+    leader, leading_card, deck_closed = state[8], state[9], state[10]
+    trump_suit = _CARD_SUITS[state[7]]
+    if leading_card == NO_CARD:
+        hand = state[leader]
+        actions = []
+        for suit in Suit:
+            if hand & MARRIAGE_MASKS[suit] == MARRIAGE_MASKS[suit]:
+                actions.extend(_MARRIAGE_ACTIONS[suit])
+        if not deck_closed and hand & _JACK_BITS[trump_suit]:
+            actions.append(SWAP_TRUMP_ACTION)
+        actions.extend(index for index in _CARD_ACTION_ORDER if hand >> index & 1)
+        if not deck_closed:
+            actions.append(CLOSE_DECK_ACTION)
+        return actions
+
+    hand = state[1 - leader]
+    if deck_closed:
+        # Must win the hand if possible, else follow suit, else trump, else anything.
+        hand = (hand & _HIGHER_CARDS_MASKS[leading_card] or hand & SUIT_MASKS[_CARD_SUITS[leading_card]]
+                or hand & SUIT_MASKS[trump_suit] or hand)
+    return [index for index in _CARD_ACTION_ORDER if hand >> index & 1]
+
+
+def perform_action(state: CompactState, action: int) -> CompactState:
+    """Apply an action, as MatchController.perform_action does.
+
+    Args:
+        state (CompactState): Compact state (not modified).
+        action (int): Legal action index.
+
+    Returns:
+        CompactState: The next state or, if the action ends the round, the round's value from the perspective of the
+            player who took the action (an int: the match points won, negative if lost).
+    """
+    if action == SWAP_TRUMP_ACTION:
+        return _swap_trump(state)
+    if action == CLOSE_DECK_ACTION:
+        return _close_deck(state)
+    return _play_card(state, action)
+
+
+def _swap_trump(state: CompactState) -> CompactState:
+    hands = list(state[:2])
+    trump_card = state[7]
+    jack_bit = _JACK_BITS[_CARD_SUITS[trump_card]]
+    player = state[8]
+    hands[player] = hands[player] & ~jack_bit | 1 << trump_card
+    return (hands[0], hands[1], *state[2:7], jack_bit.bit_length() - 1, *state[8:])
+
+
+def _close_deck(state: CompactState) -> CompactState:
+    player = state[8]
+    opponent_points = state[3 - player]
+    on_offer = [0, 0]
+    if opponent_points == 0:
+        on_offer[player] = on_offer[1 - player] = 3
+    else:
+        on_offer[player] = 2 if opponent_points < _ROUND_POINT_LIMIT / 2 else 1
+        on_offer[1 - player] = 2
+    return (*state[:10], True, player, on_offer[0], on_offer[1])
+
+
+def _play_card(state: CompactState, action: int) -> CompactState:
+    hands = list(state[0:2])
+    points = list(state[2:4])
+    pending = list(state[4:6])
+    trump_card, leader, leading_card = state[7:10]
+    player = leader if leading_card == NO_CARD else 1 - leader
+
+    card = _ACTION_CARDS[action]
+    if _ACTION_DECLARES_MARRIAGE[action]:
+        marriage_points = 40 if _CARD_SUITS[card] == _CARD_SUITS[trump_card] else 20
+        # Awarded immediately if the player has won some points, otherwise when they next win a hand.
+        if points[player] != 0:
+            points[player] += marriage_points
+        else:
+            pending[player] += marriage_points
+    hands[player] &= ~(1 << card)
+
+    if leading_card == NO_CARD:
+        return (hands[0], hands[1], points[0], points[1], pending[0], pending[1], *state[6:9], card, *state[10:])
+    return _end_of_hand(state, hands, points, pending, card)
+
+
+def _end_of_hand(state: CompactState, hands: List[int], points: List[int], pending: List[int],
+                 following_card: int) -> CompactState:
+    # Finish the hand with the follower's card (already taken from their hand), from the cards and points in play.
+    deck, trump_card, leader, leading_card, deck_closed, deck_closer = state[6:12]
+    on_offer = state[12:]
+    winner = leader
+    if _CARD_SUITS[leading_card] == _CARD_SUITS[following_card]:
+        if _CARD_VALUES[following_card] > _CARD_VALUES[leading_card]:
+            winner = 1 - leader
+    elif _CARD_SUITS[following_card] == _CARD_SUITS[trump_card]:
+        winner = 1 - leader
+    loser = 1 - winner
+    points[winner] += _CARD_VALUES[leading_card] + _CARD_VALUES[following_card] + pending[winner]
+    pending[winner] = 0
+
+    if not deck_closed:
+        # Winner draws first. The face up trump card is drawn last, which closes the deck.
+        hands[winner] |= 1 << deck[-1]
+        deck = deck[:-1]
+        if deck:
+            hands[loser] |= 1 << deck[-1]
+            deck = deck[:-1]
+        else:
+            hands[loser] |= 1 << trump_card
+            deck_closed = True
+
+    round_winner, match_points = _round_result(hands, points, winner, deck_closer, on_offer)
+    if round_winner != NO_PLAYER:
+        # From the perspective of the follower, who took the action.
+        return match_points if round_winner != leader else -match_points
+    return (hands[0], hands[1], points[0], points[1], pending[0], pending[1], deck, trump_card, winner, NO_CARD,
+            deck_closed, deck_closer, on_offer[0], on_offer[1])
+
+
+def _round_result(hands: List[int], points: List[int], hand_winner: int, deck_closer: int,
+                  on_offer: Tuple[int, int]) -> Tuple[int, int]:
+    # As MatchController._handle_round_win_points_limit_met and _handle_round_win_points_limit_not_met.
+    round_winner = NO_PLAYER
+    match_points = 0
+    for player in (0, 1):
+        if points[player] >= _ROUND_POINT_LIMIT:
+            round_winner = player
+            other_points = points[1 - player]
+            if deck_closer != NO_PLAYER:
+                match_points = on_offer[player]
+            elif other_points == 0:
+                match_points = 3
+            elif other_points < _ROUND_POINT_LIMIT / 2:
+                match_points = 2
+            else:
+                match_points = 1
+    if round_winner == NO_PLAYER and hands[0] == 0:
+        if deck_closer == NO_PLAYER:
+            round_winner, match_points = hand_winner, 1
+        else:
+            round_winner = 1 - deck_closer
+            match_points = 3 if points[deck_closer] == 0 else on_offer[round_winner]
+    return round_winner, match_points
+
+
+class PerfectInformationSolver:
+    """Memoised, depth limited negamax alpha-beta search over compact states."""
+
+    def __init__(self, depth: Optional[int] = 4, max_table_size: Optional[int] = 1000000,
+                 search_closing: Optional[bool] = True) -> None:
+        """Create a solver.
+
+        Args:
+            depth (Optional[int], optional): Number of actions searched ahead from positions where the deck is open.
+                Positions where it's closed are searched to the end of the round. Defaults to 4.
+            max_table_size (Optional[int], optional): Most positions memoised. The table is cleared when full, and is
+                otherwise kept between searches (e.g. for positions shared by several determinisations). Defaults to
+                1000000.
+            search_closing (Optional[bool], optional): Whether closing the deck is searched. If False it's only
+                skipped, so values are for the other actions. Defaults to True.
+        """
+        self.depth = depth
+        self.max_table_size = max_table_size
+        self.search_closing = search_closing
+        # Number of positions searched (i.e. not answered by the table), for monitoring.
+        self.number_of_nodes = 0
+        # Compact state to (depth, value, flag, best action).
+        self._table: Dict[CompactState, Tuple[int, float, int, int]] = {}
+
+    def solve(self, state: CompactState) -> Tuple[int, float]:
+        """Search a position.
+
+        Args:
+            state (CompactState): Position of an unfinished round.
+
+        Returns:
+            Tuple[int, float]: The best action's index (into ACTIONS) and the position's value from the active player's
+                perspective. The value is exact (in match points) if the deck is closed, otherwise it's an estimate.
+        """
+        if len(self._table) > self.max_table_size:
+            self._table.clear()
+        value = self._negamax(state, _FULL_DEPTH if state[10] else self.depth, -MAX_VALUE, MAX_VALUE)
+        return self._table[state][3], value
+
+    def _negamax(self, state: CompactState, depth: int, alpha: float, beta: float) -> float:
+        if depth <= 0:
+            return _evaluate(state)
+        entry = self._table.get(state)
+        if entry is not None and entry[0] >= depth and _entry_decides(entry, alpha, beta):
+            return entry[1]
+        self.number_of_nodes += 1
+
+        original_alpha = alpha
+        best_value = -MAX_VALUE - 1
+        best_action = None
+        player = active_player(state)
+        for action in _ordered_actions(state, None if entry is None else entry[3], self.search_closing):
+            child = perform_action(state, action)
+            if child.__class__ is int:
+                value = child
+            else:
+                # Once the deck is closed (or exhausted) the rest of the round is searched rather than evaluated.
+                child_depth = _FULL_DEPTH if child[10] else depth - 1
+                if active_player(child) == player:
+                    value = self._negamax(child, child_depth, alpha, beta)
+                else:
+                    value = -self._negamax(child, child_depth, -beta, -alpha)
+            if value > best_value:
+                best_value = value
+                best_action = action
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = _UPPER_BOUND
+        elif best_value >= beta:
+            flag = _LOWER_BOUND
+        else:
+            flag = _EXACT
+        self._table[state] = (depth, best_value, flag, best_action)
+        return best_value
+
+
+def _ordered_actions(state: CompactState, best_action: Optional[int], search_closing: bool) -> List[int]:
+    actions = legal_actions(state)
+    if not search_closing and actions[-1] == CLOSE_DECK_ACTION:
+        actions.pop()
+    if best_action is not None:
+        # Try the best action found by an earlier search of the position first.
+        actions.remove(best_action)
+        actions.insert(0, best_action)
+    return actions
+
+
+def _evaluate(state: CompactState) -> float:
+    # Score a position by the active player's lead in round points (including unawarded marriages), scaled
+    # so that a lead of half the round point limit is worth a match point.
+    player = active_player(state)
+    lead = state[2 + player] + state[4 + player] - state[3 - player] - state[5 - player]
+    return max(-MAX_VALUE + 1, min(MAX_VALUE - 1, lead / (_ROUND_POINT_LIMIT / 2)))
+
+
+def _entry_decides(entry: Tuple[int, float, int, int], alpha: float, beta: float) -> bool:
+    # Whether a stored value (or bound) settles the search of a position within the window (alpha, beta).
+    _, value, flag, _ = entry
+    return flag == _EXACT or (flag == _LOWER_BOUND and value >= beta) or (flag == _UPPER_BOUND and value <= alpha)
@@ -0,0 +1,155 @@
+"""Perfect Information Monte Carlo (PIMC) player.
+
+Each move, the player samples determinisations of the cards it can't see (the opponent's hand and the deck) with
+MatchController.shuffle_imperfect_information, searches each one as a perfect information game with a
+PerfectInformationSolver, and plays the action chosen for the most determinisations.
+
+Closing the deck is treated separately. A determinisation's search knows the opponent's hand, so it only closes the deck
+when it can win the round against that hand. Averaged over determinisations, this makes closing look far better than
+it is in play. Closing is therefore left out of the searches, and the player only closes the deck if solving the
+closed position wins the round in every determinisation.
+
+Searching compact states keeps each determinisation cheap, identical determinisations (e.g. every one once the deck is
+exhausted) are only searched once and the solver's table is kept between determinisations and moves. With workers > 1
+the determinisations are searched on a process pool, each worker keeping its own solver table.
+"""
+from collections import Counter
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+from schnapsen.ai.perfect_information import CLOSE_DECK_ACTION
+from schnapsen.ai.perfect_information import compact_state
+from schnapsen.ai.perfect_information import CompactState
+from schnapsen.ai.perfect_information import legal_actions
+from schnapsen.ai.perfect_information import PerfectInformationSolver
+from schnapsen.ai.perfect_information import perform_action
+from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+
+# Solvers of a pool worker process, by search depth.
+_worker_solvers: Dict[int, PerfectInformationSolver] = {}
+
+
+def _worker_votes(search_depth: int, determinisations: List[Tuple[CompactState, int]]) -> List[int]:
+    # Process pool entry point.
+    if search_depth not in _worker_solvers:
+        _worker_solvers[search_depth] = PerfectInformationSolver(depth=search_depth, search_closing=False)
+    return _votes(_worker_solvers[search_depth], determinisations)
+
+
+def _votes(solver: PerfectInformationSolver, determinisations: List[Tuple[CompactState, int]]) -> List[int]:
+    # Votes per action, given (determinisation, number of times sampled) pairs. The close deck action gets the
+    # votes of all the determinisations if closing wins the round in each of them, and none otherwise.
+    votes = [0] * len(ACTIONS)
+    closing_wins = CLOSE_DECK_ACTION in legal_actions(determinisations[0][0])
+    for determinisation, count in determinisations:
+        votes[solver.solve(determinisation)[0]] += count
+        # The closer stays the active player, so a positive value is a win for them.
+        closing_wins = closing_wins and solver.solve(perform_action(determinisation, CLOSE_DECK_ACTION))[1] > 0
+    if closing_wins:
+        votes[CLOSE_DECK_ACTION] = sum(count for _, count in determinisations)
+    return votes
+
+
+class PimcPlayer(Player):
+    """Player voting on the best actions of sampled determinisations."""
+
+    def __init__(self, name: Optional[str] = 'Pimmy', number_of_determinisations: Optional[int] = 50,
+                 search_depth: Optional[int] = 2, workers: Optional[int] = 1) -> None:
+        """Initialise Player object.
+
+        Args:
+            name (Optional[str], optional): Player name. Defaults to 'Pimmy'.
+            number_of_determinisations (Optional[int], optional): Determinisations sampled per move. Defaults to 50.
+            search_depth (Optional[int], optional): Number of actions searched ahead while the deck is open. Once it's
+                closed, determinisations are solved to the end of the round. Defaults to 2.
+            workers (Optional[int], optional): Size of the process pool to search determinisations on. 1 to search them
+                in process. Defaults to 1.
+        """
+        super().__init__(name)
+        self.number_of_determinisations = number_of_determinisations
+        self.search_depth = search_depth
+        self.workers = workers
+        self.match_controller = MatchController()
+        self._solver: PerfectInformationSolver = None  # Created on first use
+        self._executor = None   # Process pool, created on first use
+
+    def __getstate__(self) -> Dict:
+        """Support pickling (e.g. for parallel tournaments) by dropping the process pool and solver table.
+
+        Returns:
+            Dict: Picklable object state.
+        """
+        object_state = self.__dict__.copy()
+        object_state['_solver'] = None
+        object_state['_executor'] = None
+        return object_state
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers <= 1:
+            return None
+        if self._executor is None:
+            # The pool lives for the lifetime of the player, so avoid forking a (by then) multi-threaded process.
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the process pool, if any. A later search starts a new one."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def select_action(self, state: MatchState, legal_actions: List[Action]) -> Action:
+        """Select the action chosen for the most determinisations.
+
+        Args:
+            state (MatchState): Current match state.
+            legal_actions (List[Action]): Current legal actions.
+
+        Returns:
+            Action: Selected action.
+        """
+        if len(legal_actions) == 1:
+            return legal_actions[0]
+        votes = self.action_votes(state)
+        if votes[CLOSE_DECK_ACTION] > 0:
+            return ACTIONS[CLOSE_DECK_ACTION]
+        return ACTIONS[max(range(len(votes)), key=votes.__getitem__)]
+
+    def action_votes(self, state: MatchState) -> List[int]:
+        """Sample and search determinisations of a state.
+
+        Args:
+            state (MatchState): Current match state.
+
+        Returns:
+            List[int]: Number of determinisations for which each action (by ACTIONS index) is best, except closing
+                the deck. That's the number of determinisations if closing the deck wins the round in every one of
+                them, and 0 otherwise.
+        """
+        determinisations = Counter()
+        for _ in range(self.number_of_determinisations):
+            determinised_state = state.clone()
+            self.match_controller.shuffle_imperfect_information(determinised_state, state.active_player)
+            determinisations[compact_state(determinised_state)] += 1
+        determinisations = list(determinisations.items())
+
+        executor = self._get_executor()
+        if executor is None or len(determinisations) == 1:
+            if self._solver is None:
+                self._solver = PerfectInformationSolver(depth=self.search_depth, search_closing=False)
+            return _votes(self._solver, determinisations)
+
+        chunks = [determinisations[worker::self.workers] for worker in range(self.workers)]
+        futures = [executor.submit(_worker_votes, self.search_depth, chunk) for chunk in chunks if chunk]
+        votes = [sum(votes) for votes in zip(*(future.result() for future in futures))]
+        if votes[CLOSE_DECK_ACTION] < self.number_of_determinisations:
+            # Closing lost in some worker's determinisations.
+            votes[CLOSE_DECK_ACTION] = 0
+        return votes
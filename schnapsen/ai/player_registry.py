@@ -0,0 +1,90 @@
+"""Registry of the available players, resolved lazily by name.
+
+Entry points (the tournament, the GUI) refer to players by registry name. A player's module is only imported when the
+player is created, so e.g. a tournament between BetterPlayer, RandomPlayer and MctsPlayer never imports torch, and a
+process pool worker only imports the modules of the players it actually unpickles. This keeps start up time (which
+dominates short tournaments and each spawned worker) to a minimum.
+"""
+from dataclasses import dataclass
+from dataclasses import field
+import importlib
+from typing import Any, Dict, List
+
+from schnapsen.core.player import Player
+
+
+@dataclass(frozen=True)
+class PlayerEntry:
+    """How to create a registered player."""
+    # Import path of the player class, as "package.module:ClassName".
+    class_path: str
+    # Default constructor arguments.
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+PLAYERS: Dict[str, PlayerEntry] = {
+    'better': PlayerEntry('schnapsen.ai.better_player:BetterPlayer', {'name': 'Betty'}),
+    'random': PlayerEntry('schnapsen.ai.random_player:RandomPlayer', {'name': 'Randy'}),
+    'mcts': PlayerEntry('schnapsen.ai.mcts.mcts:MctsPlayer', {'number_of_searches_per_move': 30}),
+    'ismcts': PlayerEntry('schnapsen.ai.mcts.ismcts:IsmctsPlayer', {'number_of_searches_per_move': 30}),
+    'pimc': PlayerEntry('schnapsen.ai.pimc_player:PimcPlayer', {'name': 'Pimmy'}),
+    # The NNSimpleLinearPlayer model evaluated with NumPy, i.e. without importing torch.
+    'nn_simple': PlayerEntry('schnapsen.ai.neural_network.simple_linear.numpy_linear_player:NumpyLinearPlayer',
+                             {'name': 'NN_Simple'}),
+    'nn_simple_torch': PlayerEntry('schnapsen.ai.neural_network.simple_linear.nn_linear_player:NNSimpleLinearPlayer',
+                                   {'name': 'NN_Simple_Torch'}),
+}
+
+
+def register_player(registry_name: str, class_path: str, /, **kwargs: object) -> None:
+    """Add (or replace) a registry entry.
+
+    Args:
+        registry_name (str): Registry name.
+        class_path (str): Import path of the player class, as "package.module:ClassName".
+        **kwargs (object): Default constructor arguments.
+    """
+    PLAYERS[registry_name] = PlayerEntry(class_path, kwargs)
+
+
+def available_players() -> List[str]:
+    """Get the registered player names.
+
+    Returns:
+        List[str]: Registry names.
+    """
+    return list(PLAYERS)
+
+
+def get_player_class(registry_name: str) -> type:
+    """Import and return a registered player class.
+
+    Args:
+        registry_name (str): Registry name.
+
+    Raises:
+        ValueError: If no player is registered under registry_name.
+
+    Returns:
+        type: The player class.
+    """
+    if registry_name not in PLAYERS:
+        raise ValueError(f'Unknown player "{registry_name}". Available players: {", ".join(PLAYERS)}')
+    module_name, class_name = PLAYERS[registry_name].class_path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_player(registry_name: str, /, **kwargs: object) -> Player:
+    """Create a registered player, loading its model if it requires one.
+
+    Args:
+        registry_name (str): Registry name.
+        **kwargs (object): Constructor arguments, overriding the registered defaults.
+
+    Returns:
+        Player: The new player.
+    """
+    player = get_player_class(registry_name)(**{**PLAYERS[registry_name].kwargs, **kwargs})
+    if player.requires_model_load:
+        player.load_model()
+    return player
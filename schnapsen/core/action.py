@@ -6,9 +6,9 @@ from dataclasses import dataclass
 from schnapsen.core.card import Card
 
 
-@dataclass
+@dataclass(frozen=True)
 class Action:
-    """A wrapper for possible game actions."""
+    """A wrapper for possible game actions (immutable and hashable)."""
 
     card: Card = None                   # The Card involved in the Action if appropriate
     declare_marriage: bool = False      # True, with a card set, declares a marriage of that suit
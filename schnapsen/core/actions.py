@@ -1,4 +1,6 @@
 """Module for helpers around the complete action space."""
+from typing import Optional, Tuple
+
 from schnapsen.core.action import Action
 from schnapsen.core.card import Card
 from schnapsen.core.card import Suit
@@ -40,16 +42,47 @@ ALL_GAME_ACTIONS = {
 }
 
 
-def get_action_index(action: Action) -> int:
+# Bit masks over ALL_GAME_ACTIONS indices, e.g. as returned by MatchController.get_valid_action_mask. The card play
+# actions (indices 0 to 19) share their bit positions with the card bits in schnapsen.core.card_set.
+CARD_ACTIONS_MASK = sum(1 << index for index, action in ALL_GAME_ACTIONS.items()
+                        if action.card is not None and not action.declare_marriage)
+MARRIAGE_ACTION_MASKS = [sum(1 << index for index, action in ALL_GAME_ACTIONS.items()
+                             if action.declare_marriage and action.card.suit == suit) for suit in Suit]
+SWAP_TRUMP_ACTION_MASK = sum(1 << index for index, action in ALL_GAME_ACTIONS.items() if action.swap_trump)
+CLOSE_DECK_ACTION_MASK = sum(1 << index for index, action in ALL_GAME_ACTIONS.items() if action.close_deck)
+
+
+ActionKey = Tuple[Optional[Suit], Optional[Value], bool, bool, bool]
+
+
+def action_key(action: Action) -> ActionKey:
+    """Get a cheap hashable key identifying an action.
+
+    Args:
+        action (Action): Input Action.
+
+    Returns:
+        ActionKey: (suit, value, declare_marriage, swap_trump, close_deck), with suit and value None if no card is set.
+    """
+    card = action.card
+    if card is None:
+        return None, None, action.declare_marriage, action.swap_trump, action.close_deck
+    return card.suit, card.value, action.declare_marriage, action.swap_trump, action.close_deck
+
+
+# Index to action, for when the index is any int like value (e.g. a numpy argmax result).
+ACTIONS = tuple(ALL_GAME_ACTIONS[index] for index in range(len(ALL_GAME_ACTIONS)))
+# Action key to index, the reverse of ACTIONS.
+_ACTION_KEY_INDEX = {action_key(action): index for index, action in enumerate(ACTIONS)}
+
+
+def get_action_index(action: Action) -> Optional[int]:
     """Determine the action id given an action.
 
     Args:
         action (Action): Input Action.
 
     Returns:
-        int: Actions index.
+        Optional[int]: Actions index, or None if the action isn't part of ALL_GAME_ACTIONS.
     """
-    # let's do this the slow way to start
-    for key, value in ALL_GAME_ACTIONS.items():
-        if value == action:
-            return key
+    return _ACTION_KEY_INDEX.get(action_key(action))
@@ -0,0 +1,337 @@
+"""Vectorised engine playing many independent Schnapsen rounds at once.
+
+The rules are exactly those of MatchController (including its edge cases, e.g. both players passing the round point
+limit in the same hand) but all state is held in NumPy arrays with one row per round, and every call advances the whole
+batch. This is intended for generating experience and random rollout statistics in bulk; use MatchController for
+anything involving Player objects.
+
+Representation:
+    Cards are the bit indices of schnapsen.core.card_set (so hands and cards won are 20 bit masks) and actions are the
+    ALL_GAME_ACTIONS indices. Players are referred to by their index, 0 or 1, matching MatchState.players. Deck orders
+    follow Deck, i.e. cards are dealt from the end of the array.
+"""
+from typing import Optional
+
+import numpy as np
+
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.actions import CLOSE_DECK_ACTION_MASK
+from schnapsen.core.actions import MARRIAGE_ACTION_MASKS
+from schnapsen.core.actions import SWAP_TRUMP_ACTION_MASK
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import CARDS
+from schnapsen.core.card_set import higher_cards_mask
+from schnapsen.core.card_set import MARRIAGE_MASKS
+from schnapsen.core.card_set import NUMBER_OF_CARDS
+from schnapsen.core.card_set import SUIT_MASKS
+
+NUMBER_OF_ACTIONS = len(ALL_GAME_ACTIONS)
+NO_CARD = -1
+NO_PLAYER = -1
+
+SWAP_TRUMP_ACTION = SWAP_TRUMP_ACTION_MASK.bit_length() - 1
+CLOSE_DECK_ACTION = CLOSE_DECK_ACTION_MASK.bit_length() - 1
+
+_ROUND_POINT_LIMIT = 66
+
+# Per card lookups, indexed by card bit.
+_CARD_SUITS = np.array([card.suit for card in CARDS], dtype=np.int64)
+_CARD_VALUES = np.array([card.value for card in CARDS], dtype=np.int64)
+_HIGHER_CARDS_MASKS = np.array([higher_cards_mask(card.suit, card.value) for card in CARDS], dtype=np.int64)
+# Per suit lookups, indexed by the Suit int.
+_SUIT_MASKS = np.array(SUIT_MASKS, dtype=np.int64)
+_JACKS = np.array([card_index(Card(suit, Value.JACK)) for suit in sorted(Suit)], dtype=np.int64)
+# Card played by each action (NO_CARD for swap trump and close deck).
+_ACTION_CARDS = np.array([NO_CARD if action.card is None else card_index(action.card)
+                          for _, action in sorted(ALL_GAME_ACTIONS.items())], dtype=np.int64)
+_ACTION_BITS = np.left_shift(1, np.arange(NUMBER_OF_ACTIONS, dtype=np.int64))
+_MARRIAGE_ACTIONS = np.array([action.declare_marriage for _, action in sorted(ALL_GAME_ACTIONS.items())])
+
+
+class BatchedRounds:
+    """A batch of independent rounds, advanced in lockstep.
+
+    Attributes (all NumPy arrays with a leading batch dimension):
+        deck (B, 20): Deck order of each round; only the first deck_size entries remain to be dealt.
+        deck_size (B,): Number of cards left in the face down deck.
+        trump_card (B,): Current trump card (changes if the trump is swapped).
+        hands, cards_won (B, 2): Card masks per player.
+        round_points, match_points (B, 2): Points per player. Match points are those won in this round.
+        match_points_on_offer (B, 2): Match points on offer per player once the deck has been closed.
+        pending_marriage_points (B, 2): Points of declared marriages awaiting the player's first won hand.
+        leading_card (B,): Card led in the current hand, or NO_CARD.
+        leading_player, active_player, first_dealer (B,): Player indices.
+        deck_closed (B,): True once the deck is closed or exhausted.
+        deck_closer, round_winner (B,): Player indices or NO_PLAYER.
+        round_winner_match_points (B,): Match points awarded to the round winner (0 until the round ends).
+    """
+
+    def __init__(self, number_of_rounds: int, seed: Optional[int] = None) -> None:
+        """Create the batch. Call reset before stepping.
+
+        Args:
+            number_of_rounds (int): Batch size.
+            seed (Optional[int], optional): Seed for the random decks, first dealers and random actions. Defaults to
+                None.
+        """
+        self.number_of_rounds = number_of_rounds
+        self.rng = np.random.default_rng(seed)
+        self._rows = np.arange(number_of_rounds)
+
+        def zeros(*shape: int, dtype: type = np.int64) -> np.ndarray:
+            return np.zeros((number_of_rounds,) + shape, dtype=dtype)
+
+        self.deck = zeros(NUMBER_OF_CARDS)
+        self.deck_size = zeros()
+        self.trump_card = zeros()
+        self.hands = zeros(2)
+        self.cards_won = zeros(2)
+        self.round_points = zeros(2)
+        self.match_points = zeros(2)
+        self.match_points_on_offer = zeros(2)
+        self.pending_marriage_points = zeros(2)
+        self.leading_card = zeros()
+        self.leading_player = zeros()
+        self.active_player = zeros()
+        self.first_dealer = zeros()
+        self.deck_closed = zeros(dtype=bool)
+        self.deck_closer = zeros()
+        self.round_winner = zeros()
+        self.round_winner_match_points = zeros()
+
+    def reset(self, rows: Optional[np.ndarray] = None, deck_orders: Optional[np.ndarray] = None,
+              first_dealers: Optional[np.ndarray] = None) -> None:
+        """Start new rounds, dealing as MatchController.reset_round_state does.
+
+        Args:
+            rows (Optional[np.ndarray], optional): Indices (or a bool mask) of the rounds to reset. Defaults to None,
+                resetting every round.
+            deck_orders (Optional[np.ndarray], optional): (len(rows), 20) card indices in deck order. Defaults to None,
+                shuffling at random.
+            first_dealers (Optional[np.ndarray], optional): (len(rows),) player indices dealt to (and leading) first.
+                Defaults to None, choosing at random.
+        """
+        rows = self._rows if rows is None else self._rows[rows]
+        number_of_rows = len(rows)
+        if deck_orders is None:
+            deck_orders = self.rng.permuted(np.tile(np.arange(NUMBER_OF_CARDS), (number_of_rows, 1)), axis=1)
+        if first_dealers is None:
+            first_dealers = self.rng.integers(0, 2, number_of_rows)
+        deck_orders = np.asarray(deck_orders, dtype=np.int64)
+        first_dealers = np.asarray(first_dealers, dtype=np.int64)
+
+        bits = np.left_shift(1, deck_orders)
+        # Three cards each, the trump, then two cards each (dealt from the end of the deck).
+        first_hand = bits[:, 19] | bits[:, 18] | bits[:, 17] | bits[:, 12] | bits[:, 11]
+        second_hand = bits[:, 16] | bits[:, 15] | bits[:, 14] | bits[:, 10] | bits[:, 9]
+
+        self.deck[rows] = deck_orders
+        self.deck_size[rows] = 9
+        self.trump_card[rows] = deck_orders[:, 13]
+        self.hands[rows, first_dealers] = first_hand
+        self.hands[rows, 1 - first_dealers] = second_hand
+        for array in (self.cards_won, self.round_points, self.match_points, self.match_points_on_offer,
+                      self.pending_marriage_points):
+            array[rows] = 0
+        self.leading_card[rows] = NO_CARD
+        self.leading_player[rows] = first_dealers
+        self.active_player[rows] = first_dealers
+        self.first_dealer[rows] = first_dealers
+        self.deck_closed[rows] = False
+        self.deck_closer[rows] = NO_PLAYER
+        self.round_winner[rows] = NO_PLAYER
+        self.round_winner_match_points[rows] = 0
+
+    @property
+    def done(self) -> np.ndarray:
+        """Bool mask of finished rounds.
+
+        Returns:
+            np.ndarray: (B,) True where the round has a winner.
+        """
+        return self.round_winner != NO_PLAYER
+
+    def legal_action_bits(self) -> np.ndarray:
+        """Legal actions of the active player as bit masks (as MatchController.get_valid_action_mask).
+
+        Returns:
+            np.ndarray: (B,) int masks over ALL_GAME_ACTIONS indices; 0 for finished rounds.
+        """
+        hand = self.hands[self._rows, self.active_player]
+        trump_suit = _CARD_SUITS[self.trump_card]
+        open_deck = ~self.deck_closed
+
+        # Leading: any card, close deck and swap trump while the deck is open, and any marriages.
+        leading_bits = hand | np.where(open_deck, CLOSE_DECK_ACTION_MASK, 0)
+        has_trump_jack = hand >> _JACKS[trump_suit] & 1 == 1
+        leading_bits |= np.where(open_deck & has_trump_jack, SWAP_TRUMP_ACTION_MASK, 0)
+        for suit in Suit:
+            has_marriage = hand & MARRIAGE_MASKS[suit] == MARRIAGE_MASKS[suit]
+            leading_bits |= np.where(has_marriage, MARRIAGE_ACTION_MASKS[suit], 0)
+
+        # Following a closed deck: win if possible, else follow suit, else trump, else anything.
+        leading_card = np.maximum(self.leading_card, 0)
+        following_bits = hand
+        # Applied in reverse priority order so the highest priority non empty option wins.
+        for mask in (_SUIT_MASKS[trump_suit], _SUIT_MASKS[_CARD_SUITS[leading_card]],
+                     _HIGHER_CARDS_MASKS[leading_card]):
+            following_bits = np.where(self.deck_closed & (hand & mask != 0), hand & mask, following_bits)
+
+        bits = np.where(self.leading_card == NO_CARD, leading_bits, following_bits)
+        return np.where(self.done, 0, bits)
+
+    def legal_mask(self) -> np.ndarray:
+        """Legal actions of the active player.
+
+        Returns:
+            np.ndarray: (B, 30) bool mask over ALL_GAME_ACTIONS indices; all False for finished rounds.
+        """
+        return self.legal_action_bits()[:, None] & _ACTION_BITS != 0
+
+    def random_actions(self) -> np.ndarray:
+        """Choose a legal action uniformly at random for each round.
+
+        Returns:
+            np.ndarray: (B,) action indices (arbitrary for finished rounds).
+        """
+        return np.argmax(self.rng.random((self.number_of_rounds, NUMBER_OF_ACTIONS)) * self.legal_mask(), axis=1)
+
+    def play_random(self) -> None:
+        """Play every round to completion with uniformly random legal actions."""
+        while not np.all(self.done):
+            self.step(self.random_actions())
+
+    def step(self, actions: np.ndarray) -> None:
+        """Perform one action in every unfinished round (as MatchController.perform_action).
+
+        Args:
+            actions (np.ndarray): (B,) ALL_GAME_ACTIONS indices for the active players. Ignored for finished rounds.
+
+        Raises:
+            ValueError: If an action is illegal in an unfinished round.
+        """
+        live = ~self.done
+        actions = np.where(live, actions, 0)
+        if np.any(live & (self.legal_action_bits() >> actions & 1 == 0)):
+            raise ValueError('Illegal action')
+
+        rows = self._rows[live & (actions == SWAP_TRUMP_ACTION)]
+        if rows.size:
+            self._swap_trump(rows)
+        rows = self._rows[live & (actions == CLOSE_DECK_ACTION)]
+        if rows.size:
+            self._close_deck(rows)
+
+        cards = _ACTION_CARDS[actions]
+        rows = self._rows[live & _MARRIAGE_ACTIONS[actions]]
+        if rows.size:
+            self._declare_marriage(rows, cards[rows])
+
+        rows = self._rows[live & (cards != NO_CARD)]
+        cards = cards[rows]
+        players = self.active_player[rows]
+        self.hands[rows, players] &= ~np.left_shift(1, cards)
+        is_leader = players == self.leading_player[rows]
+        leader_rows = rows[is_leader]
+        self.leading_card[leader_rows] = cards[is_leader]
+        self.active_player[leader_rows] = 1 - players[is_leader]
+        if not np.all(is_leader):
+            self._end_of_hand(rows[~is_leader], cards[~is_leader])
+
+    def _swap_trump(self, rows: np.ndarray) -> None:
+        players = self.active_player[rows]
+        trump_cards = self.trump_card[rows]
+        jacks = _JACKS[_CARD_SUITS[trump_cards]]
+        self.hands[rows, players] &= ~np.left_shift(1, jacks)
+        self.hands[rows, players] |= np.left_shift(1, trump_cards)
+        self.trump_card[rows] = jacks
+
+    def _close_deck(self, rows: np.ndarray) -> None:
+        players = self.active_player[rows]
+        opponents = 1 - players
+        opponent_points = self.round_points[rows, opponents]
+        self.deck_closed[rows] = True
+        self.deck_closer[rows] = players
+        self.match_points_on_offer[rows, players] = np.where(opponent_points == 0, 3,
+                                                             np.where(opponent_points < 33, 2, 1))
+        self.match_points_on_offer[rows, opponents] = np.where(opponent_points == 0, 3, 2)
+
+    def _declare_marriage(self, rows: np.ndarray, cards: np.ndarray) -> None:
+        players = self.active_player[rows]
+        points = np.where(_CARD_SUITS[cards] == _CARD_SUITS[self.trump_card[rows]], 40, 20)
+        # Awarded immediately if the player already has points, otherwise once they win a hand.
+        awarded = self.round_points[rows, players] != 0
+        self.round_points[rows, players] += np.where(awarded, points, 0)
+        self.pending_marriage_points[rows, players] += np.where(awarded, 0, points)
+
+    def _end_of_hand(self, rows: np.ndarray, following_cards: np.ndarray) -> None:
+        leading_cards = self.leading_card[rows]
+        leaders = self.leading_player[rows]
+        leading_suits = _CARD_SUITS[leading_cards]
+        following_suits = _CARD_SUITS[following_cards]
+        follower_wins = np.where(leading_suits == following_suits,
+                                 _CARD_VALUES[following_cards] > _CARD_VALUES[leading_cards],
+                                 following_suits == _CARD_SUITS[self.trump_card[rows]])
+        winners = np.where(follower_wins, 1 - leaders, leaders)
+        losers = 1 - winners
+
+        points = (_CARD_VALUES[leading_cards] + _CARD_VALUES[following_cards]
+                  + self.pending_marriage_points[rows, winners])
+        self.pending_marriage_points[rows, winners] = 0
+        self.round_points[rows, winners] += points
+        self.cards_won[rows, winners] |= np.left_shift(1, leading_cards) | np.left_shift(1, following_cards)
+
+        # Deal extra cards, winner first.
+        dealing = ~self.deck_closed[rows]
+        self._give_card(rows[dealing], winners[dealing])
+        self._give_card(rows[dealing], losers[dealing])
+
+        self.leading_card[rows] = NO_CARD
+        self.leading_player[rows] = winners
+        self.active_player[rows] = winners
+
+        self._handle_round_win_points_limit_met(rows)
+        self._handle_round_win_points_limit_not_met(rows, winners)
+
+    def _give_card(self, rows: np.ndarray, players: np.ndarray) -> None:
+        # Once the face down deck is exhausted the trump card is dealt and the deck is closed.
+        exhausted = self.deck_size[rows] == 0
+        exhausted_rows = rows[exhausted]
+        self.deck_closed[exhausted_rows] = True
+        self.hands[exhausted_rows, players[exhausted]] |= np.left_shift(1, self.trump_card[exhausted_rows])
+
+        drawing_rows = rows[~exhausted]
+        self.deck_size[drawing_rows] -= 1
+        cards = self.deck[drawing_rows, self.deck_size[drawing_rows]]
+        self.hands[drawing_rows, players[~exhausted]] |= np.left_shift(1, cards)
+
+    def _handle_round_win_points_limit_met(self, rows: np.ndarray) -> None:
+        # As MatchController, both players are checked in turn (so both can be awarded if both pass the limit).
+        for player in (0, 1):
+            winning_rows = rows[self.round_points[rows, player] >= _ROUND_POINT_LIMIT]
+            other_points = self.round_points[winning_rows, 1 - player]
+            match_points = np.where(
+                self.deck_closer[winning_rows] != NO_PLAYER, self.match_points_on_offer[winning_rows, player],
+                np.where(other_points == 0, 3, np.where(other_points < _ROUND_POINT_LIMIT / 2, 2, 1)))
+            self.round_winner[winning_rows] = player
+            self.match_points[winning_rows, player] += match_points
+            self.round_winner_match_points[winning_rows] = match_points
+            self.first_dealer[winning_rows] = 1 - self.first_dealer[winning_rows]
+
+    def _handle_round_win_points_limit_not_met(self, rows: np.ndarray, hand_winners: np.ndarray) -> None:
+        # All cards played without reaching the limit: the last hand's winner takes a point, unless the deck was closed
+        # in which case the non-closer wins.
+        finished = (self.hands[rows, 0] == 0) & (self.round_winner[rows] == NO_PLAYER)
+        rows = rows[finished]
+        hand_winners = hand_winners[finished]
+        closers = self.deck_closer[rows]
+        closed = closers != NO_PLAYER
+        winners = np.where(closed, 1 - closers, hand_winners)
+        closer_points = self.round_points[rows, np.maximum(closers, 0)]
+        match_points = np.where(closed, np.where(closer_points == 0, 3, self.match_points_on_offer[rows, winners]), 1)
+        self.round_winner[rows] = winners
+        self.match_points[rows, winners] += match_points
+        self.round_winner_match_points[rows] = match_points
@@ -0,0 +1,76 @@
+"""What each player knows about the cards hidden from them.
+
+A player sees their own hand, the face up trump card and every card played, so the hidden cards are those of the deck
+and the opponent's hand. Some of the opponent's actions reveal where hidden cards are:
+
+- Swapping the trump jack puts the face up trump card in the opponent's hand.
+- Declaring a marriage shows both of its cards.
+- Once the deck is closed (or exhausted) the follower must win the hand if possible, else follow suit, else trump. A
+  follower's card that breaks one of these rules shows they hold no card the rule applies to. As no more cards are drawn
+  once the deck is closed, they never will for the rest of the round.
+
+MatchController.perform_action keeps each player's Belief up to date (see MatchState.beliefs), and
+MatchController.shuffle_imperfect_information samples determinisations consistent with it. Beliefs are immutable, so
+clones share them and undo_action restores them like the other scalar state fields.
+"""
+from dataclasses import dataclass
+import random
+from typing import Iterable, List, Tuple
+
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card_set import card_bit
+from schnapsen.core.card_set import cards_from_mask
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.card_set import higher_cards_mask
+from schnapsen.core.card_set import SUIT_MASKS
+
+
+@dataclass(frozen=True)
+class Belief:
+    """A player's knowledge of the location of the cards hidden from them, as card masks."""
+    # Cards known to be in the opponent's hand (until they're played).
+    opponent_cards: int = 0
+    # Cards the opponent is known not to hold.
+    excluded_cards: int = 0
+
+    def sample(self, deck: Iterable[Card], opponent_hand: Iterable[Card]) -> Tuple[List[Card], List[Card]]:
+        """Sample where the hidden cards are, uniformly among the placements consistent with the belief.
+
+        Args:
+            deck (Iterable[Card]): Current deck.
+            opponent_hand (Iterable[Card]): Current opponent hand. Only the cards known to be in it are kept there.
+
+        Returns:
+            Tuple[List[Card], List[Card]]: The sampled deck (in Deck order) and opponent hand.
+        """
+        opponent_hand_mask = cards_mask(opponent_hand)
+        hidden_mask = cards_mask(deck) | opponent_hand_mask
+        known_mask = self.opponent_cards & opponent_hand_mask
+        candidates = cards_from_mask(hidden_mask & ~known_mask & ~self.excluded_cards)
+        random.shuffle(candidates)
+        number_of_unknown_cards = opponent_hand_mask.bit_count() - known_mask.bit_count()
+        # Cards are only excluded once the deck is closed, after which its order doesn't matter.
+        deck_cards = candidates[number_of_unknown_cards:] + cards_from_mask(hidden_mask & self.excluded_cards)
+        return deck_cards, candidates[:number_of_unknown_cards] + cards_from_mask(known_mask)
+
+
+def follow_rule_exclusions(leading_card: Card, following_card: Card, trump_suit: Suit) -> int:
+    """Get the cards a follower can't hold, given the card they played with the deck closed.
+
+    Args:
+        leading_card (Card): Leading card.
+        following_card (Card): Card played by the follower.
+        trump_suit (Suit): Trump suit.
+
+    Returns:
+        int: Mask of cards that would have had to be played instead, had the follower held them.
+    """
+    excluded_cards = higher_cards_mask(leading_card.suit, leading_card.value)
+    if excluded_cards & card_bit(following_card):
+        return 0
+    if following_card.suit != leading_card.suit:
+        excluded_cards |= SUIT_MASKS[leading_card.suit]
+        if following_card.suit != trump_suit:
+            excluded_cards |= SUIT_MASKS[trump_suit]
+    return excluded_cards
@@ -39,9 +39,9 @@ Suit_string_map = {
     Suit.DIAMOND: 'Diamonds'}
 
 
-@dataclass()
+@dataclass(frozen=True)
 class Card:
-    """Simple card object."""
+    """Simple (immutable, hashable) card object."""
     suit: Suit
     value: Value
 
@@ -0,0 +1,321 @@
+"""Module for bitboard (integer mask) card set representations.
+
+Each of the 20 cards in a Schnapsen deck is assigned a single bit. The bit layout deliberately matches the card play
+entries of ALL_GAME_ACTIONS (Diamonds, Spades, Hearts, Clubs and, within a suit, Jack, Queen, King, Ten, Ace) so a
+mask of playable cards doubles as the lower 20 bits of an action mask.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional
+
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.marriage import Marriage
+
+NUMBER_OF_CARDS = 20
+ALL_CARDS_MASK = (1 << NUMBER_OF_CARDS) - 1
+
+SUIT_ORDER = (Suit.DIAMOND, Suit.SPADE, Suit.HEART, Suit.CLUB)
+RANK_ORDER = (Value.JACK, Value.QUEEN, Value.KING, Value.TEN, Value.ACE)
+_RANKS_PER_SUIT = len(RANK_ORDER)
+
+# Canonical card instances, indexed by bit position.
+CARDS = tuple(Card(suit, value) for suit in SUIT_ORDER for value in RANK_ORDER)
+
+# Lookup tables indexed directly by the Suit/Value ints, avoiding any hashing on the hot paths.
+_CARD_INDEX = [[-1] * (max(Value) + 1) for _ in Suit]
+for _index, _card in enumerate(CARDS):
+    _CARD_INDEX[_card.suit][_card.value] = _index
+
+SUIT_MASKS = [0] * len(Suit)
+for _position, _suit in enumerate(SUIT_ORDER):
+    SUIT_MASKS[_suit] = ((1 << _RANKS_PER_SUIT) - 1) << (_position * _RANKS_PER_SUIT)
+
+RANK_MASKS = [0] * (max(Value) + 1)
+for _position, _value in enumerate(RANK_ORDER):
+    RANK_MASKS[_value] = sum(1 << (_position + _suit_position * _RANKS_PER_SUIT)
+                             for _suit_position in range(len(SUIT_ORDER)))
+
+# Mask of cards (of any suit) that beat a card of the given value within the same suit. Ranks are ordered by value so
+# this is simply every higher rank. Index 0 (i.e. "greater than nothing") covers the whole deck.
+_HIGHER_RANK_MASKS = [ALL_CARDS_MASK] * (max(Value) + 1)
+for _position, _value in enumerate(RANK_ORDER):
+    _HIGHER_RANK_MASKS[_value] = sum(RANK_MASKS[_higher] for _higher in RANK_ORDER[_position + 1:])
+
+# Cards of each subset of a suit, indexed by suit position (in SUIT_ORDER) then the suit's bits of a mask, shifted down.
+# This expands masks a suit at a time rather than a bit at a time.
+_SUIT_SUBSET_CARDS = [[tuple(CARDS[_position * _RANKS_PER_SUIT + _rank] for _rank in range(_RANKS_PER_SUIT)
+                             if _subset >> _rank & 1)
+                       for _subset in range(1 << _RANKS_PER_SUIT)]
+                      for _position in range(len(SUIT_ORDER))]
+_SUIT_BITS_MASK = (1 << _RANKS_PER_SUIT) - 1
+
+MARRIAGE_MASKS = [RANK_MASKS[Value.QUEEN] & SUIT_MASKS[_suit] | RANK_MASKS[Value.KING] & SUIT_MASKS[_suit]
+                  for _suit in Suit]
+# Match the suit order in which Hand.available_marriages reports marriages.
+_MARRIAGE_SUIT_ORDER = (Suit.DIAMOND, Suit.CLUB, Suit.HEART, Suit.SPADE)
+
+
+def card_index(card: Card) -> int:
+    """Get the bit position of a card.
+
+    Args:
+        card (Card): Card to look up.
+
+    Returns:
+        int: Bit position in the range [0, 20).
+    """
+    return _CARD_INDEX[card.suit][card.value]
+
+
+def card_bit(card: Card) -> int:
+    """Get the single bit mask representing a card.
+
+    Args:
+        card (Card): Card to look up.
+
+    Returns:
+        int: Mask with only the card's bit set.
+    """
+    return 1 << _CARD_INDEX[card.suit][card.value]
+
+
+def cards_mask(cards: Iterable[Card]) -> int:
+    """Build a mask from a collection of cards.
+
+    Args:
+        cards (Iterable[Card]): Cards to include. CardSet instances are handled without iteration.
+
+    Returns:
+        int: Combined mask.
+    """
+    if isinstance(cards, CardSet):
+        return cards.mask
+    mask = 0
+    for card in cards:
+        mask |= 1 << _CARD_INDEX[card.suit][card.value]
+    return mask
+
+
+def cards_from_mask(mask: int) -> List[Card]:
+    """Expand a mask into its canonical Card instances (in bit order).
+
+    Args:
+        mask (int): Mask to expand.
+
+    Returns:
+        List[Card]: The cards present in the mask.
+    """
+    diamonds, spades, hearts, clubs = _SUIT_SUBSET_CARDS
+    return [*diamonds[mask & _SUIT_BITS_MASK],
+            *spades[mask >> _RANKS_PER_SUIT & _SUIT_BITS_MASK],
+            *hearts[mask >> 2 * _RANKS_PER_SUIT & _SUIT_BITS_MASK],
+            *clubs[mask >> 3 * _RANKS_PER_SUIT & _SUIT_BITS_MASK]]
+
+
+def higher_cards_mask(suit: Suit, value: Value) -> int:
+    """Get the mask of cards of a suit that beat a given value.
+
+    Args:
+        suit (Suit): Suit to consider.
+        value (Value): Value to beat (exclusive).
+
+    Returns:
+        int: Mask of higher cards in the suit.
+    """
+    return SUIT_MASKS[suit] & _HIGHER_RANK_MASKS[value]
+
+
+class CardSet:
+    """An unordered set of cards backed by a 20 bit integer mask.
+
+    This is a drop in replacement for Hand (and the cards won lists) in MatchState. Membership, removal, suit filters
+    and marriage detection are all single integer operations rather than scans over Card objects. Iteration yields
+    cards in bit order rather than insertion order.
+    """
+
+    __slots__ = ('mask',)
+
+    def __init__(self, cards: Optional[Iterable[Card]] = None) -> None:
+        """Create a CardSet.
+
+        Args:
+            cards (Optional[Iterable[Card]], optional): Initial cards. Defaults to None.
+        """
+        self.mask = 0 if cards is None else cards_mask(cards)
+
+    @classmethod
+    def from_mask(cls: type[CardSet], mask: int) -> CardSet:
+        """Create a CardSet directly from a mask.
+
+        Args:
+            mask (int): Card mask.
+
+        Returns:
+            CardSet: New instance.
+        """
+        card_set = cls()
+        card_set.mask = mask
+        return card_set
+
+    def copy(self) -> CardSet:
+        """Shallow copy.
+
+        Returns:
+            CardSet: New instance with the same cards.
+        """
+        return CardSet.from_mask(self.mask)
+
+    def snapshot(self) -> int:
+        """Capture the set content for a later restore (used to undo actions).
+
+        Returns:
+            int: Opaque snapshot.
+        """
+        return self.mask
+
+    def restore(self, snapshot: int) -> None:
+        """Restore in place the content captured by snapshot.
+
+        Args:
+            snapshot (int): Snapshot to restore.
+        """
+        self.mask = snapshot
+
+    def has_card(self, card: Card) -> bool:
+        """Simple check if card is in the set.
+
+        Args:
+            card (Card): Card to check.
+
+        Returns:
+            bool: True if card is present; else False.
+        """
+        return bool(self.mask >> _CARD_INDEX[card.suit][card.value] & 1)
+
+    def pop_card(self, card: Card) -> Card:
+        """Remove card from the set.
+
+        Args:
+            card (Card): Card to remove.
+
+        Raises:
+            ValueError: If card is not present in the set.
+
+        Returns:
+            Card: The canonical instance of the removed Card.
+        """
+        index = _CARD_INDEX[card.suit][card.value]
+        if not self.mask >> index & 1:
+            raise ValueError("Card not in hand")
+        self.mask ^= 1 << index
+        return CARDS[index]
+
+    def append(self, card: Card) -> None:
+        """Add a card to the set.
+
+        Args:
+            card (Card): Card to add.
+        """
+        self.mask |= 1 << _CARD_INDEX[card.suit][card.value]
+
+    def extend(self, cards: Iterable[Card]) -> None:
+        """Add several cards to the set.
+
+        Args:
+            cards (Iterable[Card]): Cards to add.
+        """
+        self.mask |= cards_mask(cards)
+
+    def clear(self) -> None:
+        """Remove all cards."""
+        self.mask = 0
+
+    def available_marriages(self) -> List[Marriage]:
+        """Determine available Marriages.
+
+        Returns:
+            List[Marriage]: Returns a list of available Marriage objects (or an empty list).
+        """
+        result = []
+        for suit in _MARRIAGE_SUIT_ORDER:
+            marriage_mask = MARRIAGE_MASKS[suit]
+            if self.mask & marriage_mask == marriage_mask:
+                result.append(Marriage(queen=Card(suit, Value.QUEEN), king=Card(suit, Value.KING)))
+        return result
+
+    def cards_of_same_suit(self, suit: Suit, greater_than: Optional[Value] = 0) -> List[Card]:
+        """Get cards of a matching suit.
+
+        Args:
+            suit (Suit): Suit to check.
+            greater_than (Optional[Value], optional): An optional value threshold (exclusive). Defaults to 0.
+
+        Returns:
+            List[Card]: The list of matching cards.
+        """
+        return cards_from_mask(self.mask & SUIT_MASKS[suit] & _HIGHER_RANK_MASKS[greater_than])
+
+    def __len__(self) -> int:
+        """Number of cards in the set.
+
+        Returns:
+            int: Card count.
+        """
+        return self.mask.bit_count()
+
+    def __iter__(self) -> Iterator[Card]:
+        """Iterate cards in bit order.
+
+        Returns:
+            Iterator[Card]: Card iterator.
+        """
+        return iter(cards_from_mask(self.mask))
+
+    def __getitem__(self, index: int) -> Card:
+        """Get the card at a position in bit order.
+
+        Args:
+            index (int): Position.
+
+        Returns:
+            Card: Card at the position.
+        """
+        return cards_from_mask(self.mask)[index]
+
+    def __contains__(self, card: Card) -> bool:
+        """Check membership.
+
+        Args:
+            card (Card): Card to check.
+
+        Returns:
+            bool: True if present.
+        """
+        return isinstance(card, Card) and self.has_card(card)
+
+    def __eq__(self, other: object) -> bool:
+        """Check the set contains exactly the same cards as another collection.
+
+        Args:
+            other (object): A CardSet or collection of cards.
+
+        Returns:
+            bool: True if equivalent.
+        """
+        if isinstance(other, CardSet):
+            return self.mask == other.mask
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and cards_mask(other) == self.mask
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """String representation of object.
+
+        Returns:
+            str: Object as string.
+        """
+        return f'CardSet({cards_from_mask(self.mask)})'
@@ -1,4 +1,6 @@
 """Card Deck Class."""
+from __future__ import annotations
+
 import random
 from typing import List, Optional
 
@@ -24,4 +26,12 @@ class Deck(list):
             # Shuffle deck ready for dealing.
             random.shuffle(self)
         else:
-            [self.append(card) for card in cards]
+            self.extend(cards)
+
+    def copy(self) -> Deck:
+        """Shallow copy, retaining card order.
+
+        Returns:
+            Deck: New deck sharing the (immutable) Card instances.
+        """
+        return Deck(self)
@@ -0,0 +1,309 @@
+"""Compact binary game records: stream played rounds to a file as they happen, then read and replay them later.
+
+A record file is a short header followed by chunks, each holding a block of rounds stored column by column (one
+contiguous little endian array per field). Reading a chunk is therefore a handful of np.frombuffer calls, whichever
+columns are needed. Per round the deal (the deck order before dealing), the player with the first deal, the match
+points going into the round and its result are stored; per action its index in ALL_GAME_ACTIONS and both players'
+round points after it. That is all that is needed to replay a round exactly with the MatchController, at roughly 25
+bytes per round plus 3 bytes per action.
+
+Rounds are recorded by assigning a GameRecordWriter to MatchController.recorder, e.g. through
+match_helpers.play_automated_matches(..., recorder=writer). Players are identified by their position in
+MatchState.players (0 or 1).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import struct
+from types import TracebackType
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.actions import get_action_index
+from schnapsen.core.card import Card
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import CARDS
+from schnapsen.core.card_set import NUMBER_OF_CARDS
+from schnapsen.core.deck import Deck
+from schnapsen.core.hand import Hand
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+
+MAGIC = b'SCHNAPSENGR'
+VERSION = 1
+_HEADER = struct.Struct('<11sB')
+_CHUNK_HEADER = struct.Struct('<II')
+
+# (name, dtype, shape per row) of the per round columns, in file order.
+ROUND_COLUMNS = (
+    # Index of the round's match within the file.
+    ('match_index', '<u4', ()),
+    # Player with the first deal of the round.
+    ('first_dealer', 'u1', ()),
+    # Both players' match points at the start of the round.
+    ('match_points', 'u1', (2,)),
+    # Card indices (see schnapsen.core.card_set) in deck order before dealing. Cards are dealt from the end.
+    ('deck', 'u1', (NUMBER_OF_CARDS,)),
+    ('number_of_actions', '<u2', ()),
+    ('round_winner', 'u1', ()),
+    ('round_winner_match_points', 'u1', ()),
+)
+# (name, dtype, shape per row) of the per action columns, in file order.
+ACTION_COLUMNS = (
+    # Index into ALL_GAME_ACTIONS.
+    ('action', 'u1', ()),
+    # Both players' round points after the action.
+    ('round_points', 'u1', (2,)),
+)
+
+
+@dataclass
+class RoundRecord:
+    """A single recorded round."""
+    match_index: int
+    first_dealer: int
+    match_points: Tuple[int, int]
+    deck: List[Card]
+    actions: List[Action]
+    # (number of actions, 2) round points after each action.
+    round_points: np.ndarray
+    round_winner: int
+    round_winner_match_points: int
+
+
+@dataclass
+class GameRecordChunk:
+    """A block of rounds as read from a file, column by column."""
+    # Per round columns (see ROUND_COLUMNS), each with a leading (number of rounds,) dimension.
+    rounds: Dict[str, np.ndarray]
+    # Per action columns (see ACTION_COLUMNS), each with a leading (total number of actions,) dimension.
+    actions: Dict[str, np.ndarray]
+
+    def __post_init__(self) -> None:
+        """Index the first action of each round."""
+        self.action_offsets = np.concatenate(([0], np.cumsum(self.rounds['number_of_actions'], dtype=np.int64)))
+
+    def __len__(self) -> int:
+        """Number of rounds in the chunk.
+
+        Returns:
+            int: Round count.
+        """
+        return len(self.rounds['match_index'])
+
+    def get_round(self, index: int) -> RoundRecord:
+        """Get a single round.
+
+        Args:
+            index (int): Round index within the chunk.
+
+        Returns:
+            RoundRecord: The round.
+        """
+        actions = slice(self.action_offsets[index], self.action_offsets[index + 1])
+        return RoundRecord(match_index=int(self.rounds['match_index'][index]),
+                           first_dealer=int(self.rounds['first_dealer'][index]),
+                           match_points=tuple(self.rounds['match_points'][index].tolist()),
+                           deck=[CARDS[card] for card in self.rounds['deck'][index]],
+                           actions=[ACTIONS[action] for action in self.actions['action'][actions]],
+                           round_points=self.actions['round_points'][actions],
+                           round_winner=int(self.rounds['round_winner'][index]),
+                           round_winner_match_points=int(self.rounds['round_winner_match_points'][index]))
+
+
+class GameRecordWriter:
+    """Streams the rounds played by a MatchController to a record file.
+
+    Assign to MatchController.recorder. Rounds are buffered and written a chunk at a time, so close the writer (or use
+    it as a context manager) to write the final chunk. Matches must be played one at a time, and rounds that are
+    abandoned before they end are not recorded.
+    """
+
+    def __init__(self, file: Union[str, BinaryIO], rounds_per_chunk: Optional[int] = 1024) -> None:
+        """Create a writer, writing the file header.
+
+        Args:
+            file (Union[str, BinaryIO]): Path or binary file object to write to. Paths are created (or truncated).
+            rounds_per_chunk (Optional[int], optional): Rounds to buffer per chunk. Defaults to 1024.
+        """
+        self._owns_file = isinstance(file, str)
+        self._file = open(file, 'wb') if self._owns_file else file  # noqa:SIM115
+        self._file.write(_HEADER.pack(MAGIC, VERSION))
+        self.rounds_per_chunk = rounds_per_chunk
+        self.number_of_matches = 0
+        self._rounds: List[tuple] = []
+        self._actions: List[tuple] = []
+        self._match_state: MatchState = None
+        self._round: tuple = None
+        self._round_actions: List[tuple] = []
+
+    def start_round(self, state: MatchState) -> None:
+        """Note the deal of a new round. Called by MatchController.reset_round_state before dealing.
+
+        Args:
+            state (MatchState): State of the round.
+        """
+        if state is not self._match_state:
+            self._match_state = state
+            self.number_of_matches += 1
+        players = state.players
+        self._round = (self.number_of_matches - 1,
+                       players.index(state.player_with_1st_deal),
+                       tuple(state.player_states[player].match_points for player in players),
+                       [card_index(card) for card in state.deck])
+        self._round_actions = []
+
+    def record_action(self, state: MatchState, action: Action) -> None:
+        """Note an action. Called by MatchController.perform_action once the action has been performed.
+
+        Args:
+            state (MatchState): State of the round.
+            action (Action): Action performed.
+        """
+        if state is not self._match_state or self._round is None:
+            return
+        player_1_state, player_2_state = state.player_states.values()
+        self._round_actions.append((get_action_index(action),
+                                    (player_1_state.round_points, player_2_state.round_points)))
+        if state.round_winner is not None:
+            self._rounds.append(self._round + (len(self._round_actions),
+                                               state.players.index(state.round_winner),
+                                               state.round_winner_match_points))
+            self._actions.extend(self._round_actions)
+            self._round = None
+            if len(self._rounds) >= self.rounds_per_chunk:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write any buffered rounds out as a chunk."""
+        if not self._rounds:
+            return
+        self._file.write(_CHUNK_HEADER.pack(len(self._rounds), len(self._actions)))
+        for columns, rows in ((ROUND_COLUMNS, self._rounds), (ACTION_COLUMNS, self._actions)):
+            for values, (_, dtype, shape) in zip(zip(*rows), columns):
+                self._file.write(np.array(values, dtype=dtype).reshape(-1, *shape).tobytes())
+        self._file.flush()
+        self._rounds = []
+        self._actions = []
+
+    def close(self) -> None:
+        """Flush and close the file (if opened by the writer)."""
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> GameRecordWriter:
+        """Use as a context manager, closing on exit.
+
+        Returns:
+            GameRecordWriter: This writer.
+        """
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc_value: Optional[BaseException],  # noqa:U100
+                 traceback: Optional[TracebackType]) -> None:  # noqa:U100
+        """Close the writer.
+
+        Args:
+            exc_type (Optional[type]): Unused.
+            exc_value (Optional[BaseException]): Unused.
+            traceback (Optional[TracebackType]): Unused.
+        """
+        self.close()
+
+
+def read_chunks(file: Union[str, BinaryIO]) -> Iterator[GameRecordChunk]:
+    """Stream the chunks of a record file.
+
+    Args:
+        file (Union[str, BinaryIO]): Path or binary file object to read from.
+
+    Raises:
+        ValueError: If the file isn't a game record file (of a supported version) or is truncated.
+
+    Yields:
+        GameRecordChunk: Chunks in file order.
+    """
+    if isinstance(file, str):
+        with open(file, 'rb') as opened_file:
+            yield from read_chunks(opened_file)
+        return
+
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size or _HEADER.unpack(header) != (MAGIC, VERSION):
+        raise ValueError('Not a version %i game record file' % VERSION)
+    while chunk_header := file.read(_CHUNK_HEADER.size):
+        if len(chunk_header) < _CHUNK_HEADER.size:
+            raise ValueError('Truncated game record file')
+        number_of_rounds, number_of_actions = _CHUNK_HEADER.unpack(chunk_header)
+        yield GameRecordChunk(rounds=_read_columns(file, ROUND_COLUMNS, number_of_rounds),
+                              actions=_read_columns(file, ACTION_COLUMNS, number_of_actions))
+
+
+def read_rounds(file: Union[str, BinaryIO]) -> Iterator[RoundRecord]:
+    """Stream the rounds of a record file.
+
+    Args:
+        file (Union[str, BinaryIO]): Path or binary file object to read from.
+
+    Yields:
+        RoundRecord: Rounds in the order they were played.
+    """
+    for chunk in read_chunks(file):
+        for index in range(len(chunk)):
+            yield chunk.get_round(index)
+
+
+def replay_round(record: RoundRecord, players: Optional[Tuple[Player, Player]] = None,
+                 card_set_type: Optional[type] = Hand) -> Iterator[Tuple[MatchState, Action]]:
+    """Replay a recorded round with the MatchController.
+
+    A single state is updated in place: each yielded state is the one the action is about to be performed on, so copy
+    or clone it to retain it. Once exhausted, the state has reached the end of the round.
+
+    Args:
+        record (RoundRecord): Round to replay.
+        players (Optional[Tuple[Player, Player]], optional): Stand in players 1 and 2. Defaults to None, creating new
+            ones.
+        card_set_type (Optional[type], optional): Collection type for hands and cards won. Defaults to Hand.
+
+    Raises:
+        ValueError: If the replayed round points or result differ from those recorded.
+
+    Yields:
+        Tuple[MatchState, Action]: The state before each action, and the action.
+    """
+    if players is None:
+        players = (Player('Player 1'), Player('Player 2'))
+    controller = MatchController()
+    state = MatchState(players=players, deck=Deck([]), card_set_type=card_set_type)
+    state.player_with_1st_deal = players[record.first_dealer]
+    for player, match_points in zip(players, record.match_points):
+        state.player_states[player].match_points = match_points
+    controller.reset_round_state(state, deck=Deck(record.deck))
+
+    for action, round_points in zip(record.actions, record.round_points):
+        yield state, action
+        controller.perform_action(state, action)
+        if tuple(state.player_states[player].round_points for player in players) != tuple(round_points):
+            raise ValueError('Replayed round points differ from the record')
+
+    if (state.round_winner is not players[record.round_winner]
+            or state.round_winner_match_points != record.round_winner_match_points):
+        raise ValueError('Replayed round result differs from the record')
+
+
+def _read_columns(file: BinaryIO, columns: tuple, number_of_rows: int) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for name, dtype, shape in columns:
+        dtype = np.dtype(dtype)
+        count = number_of_rows * int(np.prod(shape, dtype=np.int64))
+        data = file.read(count * dtype.itemsize)
+        if len(data) < count * dtype.itemsize:
+            raise ValueError('Truncated game record file')
+        arrays[name] = np.frombuffer(data, dtype=dtype).reshape(number_of_rows, *shape)
+    return arrays
@@ -1,5 +1,7 @@
 """Module for player's hand related objects."""
-from typing import List, Optional
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
 
 from schnapsen.core.card import Card
 from schnapsen.core.card import Suit
@@ -41,6 +43,30 @@ class Hand(list):
 
         return result
 
+    def copy(self) -> Hand:
+        """Shallow copy, retaining card order.
+
+        Returns:
+            Hand: New hand sharing the (immutable) Card instances.
+        """
+        return Hand(self)
+
+    def snapshot(self) -> Tuple[Card, ...]:
+        """Capture the hand content for a later restore (used to undo actions).
+
+        Returns:
+            Tuple[Card, ...]: Opaque snapshot.
+        """
+        return tuple(self)
+
+    def restore(self, snapshot: Tuple[Card, ...]) -> None:
+        """Restore in place the content captured by snapshot.
+
+        Args:
+            snapshot (Tuple[Card, ...]): Snapshot to restore.
+        """
+        self[:] = snapshot
+
     def has_card(self, card: Card) -> bool:
         """Simple check if card is in the current hand.
 
@@ -45,6 +45,18 @@ class Marriage:
         else:
             self.points = 20
 
+    def copy(self) -> Marriage:
+        """Copy the Marriage, including its points state.
+
+        Returns:
+            Marriage: New instance.
+        """
+        marriage = Marriage.__new__(Marriage)
+        marriage.suit = self.suit
+        marriage.points = self.points
+        marriage.points_awarded = self.points_awarded
+        return marriage
+
     def __eq__(self, other: Marriage) -> bool:
         """Test Marriage for equivalence.
 
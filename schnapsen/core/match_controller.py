@@ -1,18 +1,51 @@
 """Card Game Class."""
 
 import logging
+from operator import attrgetter
 import random
 from typing import List, Optional
 
 from schnapsen.core.action import Action
+from schnapsen.core.actions import CLOSE_DECK_ACTION_MASK
+from schnapsen.core.actions import MARRIAGE_ACTION_MASKS
+from schnapsen.core.actions import SWAP_TRUMP_ACTION_MASK
+from schnapsen.core.belief import Belief
+from schnapsen.core.belief import follow_rule_exclusions
 from schnapsen.core.card import Card
 from schnapsen.core.card import Suit
 from schnapsen.core.card import Value
+from schnapsen.core.card_set import card_bit
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.card_set import higher_cards_mask
+from schnapsen.core.card_set import MARRIAGE_MASKS
+from schnapsen.core.card_set import SUIT_MASKS
 from schnapsen.core.deck import Deck
 from schnapsen.core.hand import Hand
 from schnapsen.core.marriage import Marriage
 from schnapsen.core.player import Player
 from schnapsen.core.state import MatchState
+from schnapsen.core.state import NO_BELIEFS
+from schnapsen.core.state import UNDO_STATE_FIELDS
+from schnapsen.core.state import UndoRecord
+from schnapsen.core.zobrist import ACTIVE_PLAYER_KEYS
+from schnapsen.core.zobrist import CARDS_WON_KEYS
+from schnapsen.core.zobrist import deck_and_hand_key
+from schnapsen.core.zobrist import DECK_CLOSED_KEY
+from schnapsen.core.zobrist import DECK_CLOSER_KEYS
+from schnapsen.core.zobrist import DECK_KEYS
+from schnapsen.core.zobrist import HAND_KEYS
+from schnapsen.core.zobrist import LEADING_CARD_KEYS
+from schnapsen.core.zobrist import LEADING_PLAYER_KEYS
+from schnapsen.core.zobrist import MARRIAGE_AWARDED_KEYS
+from schnapsen.core.zobrist import MARRIAGE_KEYS
+from schnapsen.core.zobrist import MATCH_POINTS_ON_OFFER_KEYS
+from schnapsen.core.zobrist import player_position
+from schnapsen.core.zobrist import ROUND_WINNER_KEYS
+from schnapsen.core.zobrist import TRUMP_CARD_KEYS
+from schnapsen.core.zobrist import zobrist_hash
+
+_get_undo_state_fields = attrgetter(*UNDO_STATE_FIELDS)
 
 
 class MatchController:
@@ -25,18 +58,23 @@ class MatchController:
         """Create match controller."""
         self._logger = logging.getLogger()
         self.action_callback = None  # Func set externally for event handling, e.g. in a GUI.
+        # Set externally to record played rounds, e.g. a GameRecordWriter. It's notified of each new deal and action.
+        self.recorder = None
 
-    def get_new_match_state(self, player_1: Player, player_2: Player) -> MatchState:
+    def get_new_match_state(self, player_1: Player, player_2: Player,
+                            card_set_type: Optional[type] = Hand) -> MatchState:
         """Create a new game state.
 
         Args:
             player_1 (Player): First player.
             player_2 (Player): Second player.
+            card_set_type (Optional[type], optional): Collection type for hands and cards won. Pass CardSet to use
+                the compact bitboard backend. Defaults to Hand.
 
         Returns:
             MatchState: State object
         """
-        state = MatchState(players=(player_1, player_2), deck=Deck())
+        state = MatchState(players=(player_1, player_2), deck=Deck(), card_set_type=card_set_type)
         # Select player at random for first deal.
         state.player_with_1st_deal = random.choice([player_1, player_2])
         return state
@@ -56,8 +94,8 @@ class MatchController:
 
         # Reset hands/points
         for player_state in state.player_states.values():
-            player_state.hand = Hand()
-            player_state.cards_won = []
+            player_state.hand = state.card_set_type()
+            player_state.cards_won = state.card_set_type()
             player_state.round_points = 0
 
         # Reset round points related state
@@ -67,10 +105,14 @@ class MatchController:
         state.round_winner = None
         state.round_winner_match_points = 0
         state.marriages_info = {}
+        state.beliefs = NO_BELIEFS
+        if self.recorder is not None:
+            self.recorder.start_round(state)
         self._deal(state)
 
         state.leading_player = state.player_with_1st_deal
         state.active_player = state.leading_player
+        state.zobrist_hash = zobrist_hash(state)
 
     def get_valid_actions(self, state: MatchState) -> List[Action]:
         """Return valid moves for active player.
@@ -88,6 +130,41 @@ class MatchController:
             legal_actions.extend(self._valid_follower_actions(state))
         return legal_actions
 
+    def get_valid_action_mask(self, state: MatchState) -> int:
+        """Return valid moves for active player as a bit mask over ALL_GAME_ACTIONS.
+
+        This applies the same rules as get_valid_actions but with card set masks, without creating any Action
+        objects. Bit i is set if ALL_GAME_ACTIONS[i] is legal.
+
+        Args:
+            state (MatchState): Current match state.
+
+        Returns:
+            int: Legal action mask.
+        """
+        hand_mask = cards_mask(state.player_states[state.active_player].hand)
+        leading_card = state.leading_card
+
+        if leading_card is None:
+            # Card play bits coincide with the card bits.
+            action_mask = hand_mask
+            if not state.deck_closed:
+                action_mask |= CLOSE_DECK_ACTION_MASK
+                if hand_mask & card_bit(Card(state.trump_card.suit, Value.JACK)):
+                    action_mask |= SWAP_TRUMP_ACTION_MASK
+            for suit in Suit:
+                if hand_mask & MARRIAGE_MASKS[suit] == MARRIAGE_MASKS[suit]:
+                    action_mask |= MARRIAGE_ACTION_MASKS[suit]
+            return action_mask
+
+        if state.deck_closed:
+            # Must win the hand if possible, else follow suit, else trump, else anything.
+            return (hand_mask & higher_cards_mask(leading_card.suit, leading_card.value)
+                    or hand_mask & SUIT_MASKS[leading_card.suit]
+                    or hand_mask & SUIT_MASKS[state.trump_card.suit]
+                    or hand_mask)
+        return hand_mask
+
     def _valid_leading_actions(self, state: MatchState) -> List[Action]:
         legal_actions = []
         current_hand = state.player_states[state.active_player].hand
@@ -144,44 +221,24 @@ class MatchController:
         game states as far as unknown game state is concerned. In this case, it's the content of the deck and the
         opponents hand cannot be known (although with advanced techniques some content should be implied!).
 
-        This method fixes 1 players hand and shuffles the remaining unknowns from their perspective. This gets a
-        little complicated by marriages as these are potential knowns in their hand.
-
-        TODO: Handle case where opponent has swapped the trump and still holds it in their hand (known information)
-        TODO: This is generally inefficient but works. Add testing an simplify!
+        This method fixes 1 players hand and shuffles the remaining unknowns from their perspective. Cards the
+        player knows the opponent holds (e.g. from a declared marriage or trump swap) stay in the opponent's hand, and
+        cards the player knows the opponent can't hold go to the deck (see schnapsen.core.belief).
 
         Args:
             state (MatchState): Current match state.
             fixed_player (Player): The player for whom we have fixed knowledge.
         """
-        other_player = state.get_other_player(fixed_player)
-        other_player_state = state.player_states[other_player]
-
-        all_unknown_cards = []
-        all_unknown_cards.extend(state.deck)
-        all_unknown_cards.extend(other_player_state.hand)
-
-        # Build list of marriage cards in other_player's hand.
-        marriage_cards_in_other_players_hand = []
-        for marriage_info in state.marriages_info.values():
-            # Must use __eq__ here as object instance/reference might be a copy of the original
-            if other_player == marriage_info["player"]:
-                marriage_suit = marriage_info["marriage"].suit
-                for card in [Card(suit=marriage_suit, value=Value.QUEEN), Card(suit=marriage_suit, value=Value.KING)]:
-                    if card in other_player_state.hand:
-                        marriage_cards_in_other_players_hand.append(card)
-
-        # Marriage cards are not unknowns so remove them from the list.
-        [all_unknown_cards.remove(card) for card in marriage_cards_in_other_players_hand]
-
-        # Put the unknown cards back in their respective places.
-        random.shuffle(all_unknown_cards)
-        nb_deck_cards = len(state.deck)
-        state.deck = Deck(all_unknown_cards[:nb_deck_cards])
-        # Keep declared marriage cards in hand.
-        other_player_state.hand = Hand(all_unknown_cards[nb_deck_cards:] + marriage_cards_in_other_players_hand)
-
-    def perform_action(self, state: MatchState, action: Action) -> None:
+        position = player_position(state, fixed_player)
+        other_player_state = state.player_states[state.get_other_player(fixed_player)]
+        state.zobrist_hash ^= deck_and_hand_key(state.deck, other_player_state.hand, 1 - position)
+        deck_cards, other_player_cards = state.beliefs[position].sample(state.deck, other_player_state.hand)
+        state.deck = Deck(deck_cards)
+        other_player_state.hand = state.card_set_type(other_player_cards)
+        state.zobrist_hash ^= deck_and_hand_key(state.deck, other_player_state.hand, 1 - position)
+
+    def perform_action(self, state: MatchState, action: Action,
+                       record_undo: Optional[bool] = False) -> Optional[UndoRecord]:
         """Update match state object with a given action.
 
         i.e. play a move!
@@ -189,7 +246,13 @@ class MatchController:
         Args:
             state (MatchState): State to act upon.
             action (Action): Action to perform
+            record_undo (Optional[bool], optional): If True, return an UndoRecord that undo_action can use to revert
+                the action in place. Defaults to False.
+
+        Returns:
+            Optional[UndoRecord]: The undo record if requested, otherwise None.
         """
+        undo_record = self._create_undo_record(state, action) if record_undo else None
         player = state.active_player
         is_leader = player is state.leading_player
         if self._logger.isEnabledFor(logging.DEBUG):
@@ -198,22 +261,28 @@ class MatchController:
                              str(action.close_deck), str(action.swap_trump))
 
         play_card = None
+        position = player_position(state, player)
         if action.swap_trump:
-            self._swap_trump(state)
+            self._swap_trump(state, position)
 
         if action.close_deck:
-            self._close_deck(state)
+            self._close_deck(state, position)
 
         if action.declare_marriage:
-            self._declare_marriage(state=state, suit=action.card.suit)
+            self._declare_marriage(state=state, suit=action.card.suit, position=position)
 
         if action.card is not None:
             play_card = state.player_states[player].hand.pop_card(action.card)
+            play_card_index = card_index(play_card)
+            state.zobrist_hash ^= HAND_KEYS[position][play_card_index]
             if is_leader:
                 state.leading_card = play_card
                 state.active_player = state.get_other_player(player)
+                state.zobrist_hash ^= (LEADING_CARD_KEYS[play_card_index]
+                                       ^ ACTIVE_PLAYER_KEYS[0] ^ ACTIVE_PLAYER_KEYS[1])
             else:
                 state.following_card = play_card
+                self._observe_following_card(state, position)
 
         # Used for UI event handling
         if self.action_callback is not None:
@@ -223,6 +292,57 @@ class MatchController:
         if not is_leader and state.round_winner is None:
             self._end_of_hand(state)
 
+        if self.recorder is not None:
+            self.recorder.record_action(state, action)
+
+        return undo_record
+
+    def undo_action(self, state: MatchState, undo_record: UndoRecord) -> None:
+        """Revert an action previously performed with perform_action(..., record_undo=True).
+
+        This lets searches walk a single mutable state (make/unmake) rather than copying a state per node. Records
+        must be undone in reverse order. Note that the action_callback and recorder are not notified of undos.
+
+        Args:
+            state (MatchState): State the action was performed on.
+            undo_record (UndoRecord): The record returned by perform_action.
+        """
+        for field, value in zip(UNDO_STATE_FIELDS, undo_record.table):
+            setattr(state, field, value)
+
+        for player_state, saved in zip(state.player_states.values(), undo_record.player_states):
+            player_state.round_points, player_state.match_points, player_state.match_points_on_offer = saved[:3]
+            player_state.hand.restore(saved[3])
+            player_state.cards_won.restore(saved[4])
+
+        deck_tail = undo_record.deck_tail
+        state.deck[undo_record.deck_length - len(deck_tail):] = deck_tail
+
+        if undo_record.declared_marriage is not None:
+            suit, previous_marriage_info = undo_record.declared_marriage
+            if previous_marriage_info is None:
+                del state.marriages_info[suit]
+            else:
+                state.marriages_info[suit] = previous_marriage_info
+        for marriage in undo_record.unawarded_marriages:
+            marriage.points_awarded = False
+
+    def _create_undo_record(self, state: MatchState, action: Action) -> UndoRecord:
+        declared_marriage = None
+        if action.declare_marriage:
+            declared_marriage = (action.card.suit, state.marriages_info.get(action.card.suit))
+        return UndoRecord(
+            table=_get_undo_state_fields(state),
+            player_states=tuple(
+                (player_state.round_points, player_state.match_points, player_state.match_points_on_offer,
+                 player_state.hand.snapshot(), player_state.cards_won.snapshot())
+                for player_state in state.player_states.values()),
+            deck_length=len(state.deck),
+            deck_tail=state.deck[-2:],
+            declared_marriage=declared_marriage,
+            unawarded_marriages=[marriage_info["marriage"] for marriage_info in state.marriages_info.values()
+                                 if not marriage_info["marriage"].points_awarded])
+
     def progress_automated_actions(self, state: MatchState) -> None:
         """Progress automated actions until no more automated actions exist or the game finishes.
 
@@ -247,21 +367,18 @@ class MatchController:
                 state.hand_winner = following_player
 
         loser = state.get_other_player(state.hand_winner)
+        leading_card_index = card_index(state.leading_card)
+        cards_won_keys = CARDS_WON_KEYS[player_position(state, state.hand_winner)]
+        state.zobrist_hash ^= (LEADING_CARD_KEYS[leading_card_index] ^ cards_won_keys[leading_card_index]
+                               ^ cards_won_keys[card_index(state.following_card)])
 
         # Award points. First figure out if marriage points need handling
-        marriage_points = 0
-        for marriage_info in state.marriages_info.values():
-            marriage_player = marriage_info["player"]
-            marriage = marriage_info["marriage"]
-            if not marriage.points_awarded and state.hand_winner is marriage_player:
-                marriage.points_awarded = True
-                marriage_points += marriage.points
+        marriage_points = self._award_marriage_points(state)
 
         points = state.leading_card.value + state.following_card.value + marriage_points
 
         # Award points and track cards won by each player
         winning_player_state = state.player_states[state.hand_winner]
-        losing_player_state = state.player_states[loser]
         winning_player_state.round_points += points
         winning_player_state.cards_won.extend((state.leading_card, state.following_card))
 
@@ -269,10 +386,14 @@ class MatchController:
 
         # Deal extra cards, winner first
         if not state.deck_closed:
-            self._give_cards(state=state, hand=winning_player_state.hand, number_of_cards=1)
-            self._give_cards(state=state, hand=losing_player_state.hand, number_of_cards=1)
+            self._give_cards(state=state, player=state.hand_winner, number_of_cards=1)
+            self._give_cards(state=state, player=loser, number_of_cards=1)
 
-        # Reset hand state
+        # Reset hand state. The follower is still active, so either the leader or the active player changes.
+        if state.hand_winner is state.leading_player:
+            state.zobrist_hash ^= ACTIVE_PLAYER_KEYS[0] ^ ACTIVE_PLAYER_KEYS[1]
+        else:
+            state.zobrist_hash ^= LEADING_PLAYER_KEYS[0] ^ LEADING_PLAYER_KEYS[1]
         state.leading_card = None
         state.following_card = None
         state.leading_player = state.hand_winner
@@ -280,12 +401,26 @@ class MatchController:
 
         self._handle_round_win_points_limit_met(state)
         self._handle_round_win_points_limit_not_met(state)
+        if state.round_winner is not None:
+            state.zobrist_hash ^= ROUND_WINNER_KEYS[player_position(state, state.round_winner)][
+                state.round_winner_match_points]
         # Handle match win
         if state.round_winner:
             for player in state.players:
                 if state.player_states[player].match_points >= state.match_point_limit:
                     state.match_winner = player
 
+    def _award_marriage_points(self, state: MatchState) -> int:
+        marriage_points = 0
+        for suit, marriage_info in state.marriages_info.items():
+            marriage_player = marriage_info["player"]
+            marriage = marriage_info["marriage"]
+            if not marriage.points_awarded and state.hand_winner is marriage_player:
+                marriage.points_awarded = True
+                marriage_points += marriage.points
+                state.zobrist_hash ^= MARRIAGE_AWARDED_KEYS[suit]
+        return marriage_points
+
     def _handle_round_win_points_limit_met(self, state: MatchState) -> None:
         # Check for standard round win conditions
         for player in state.players:
@@ -331,12 +466,13 @@ class MatchController:
                 non_closing_player_state.match_points += match_points
                 state.round_winner_match_points = match_points
 
-    def _declare_marriage(self, state: MatchState, suit: Suit) -> None:
+    def _declare_marriage(self, state: MatchState, suit: Suit, position: int) -> None:
         """Update state to declare a marriage.
 
         Args:
             state (MatchState): Current state.
             suit (Suit): The suit of the marriage to declare.
+            position (int): The active player's position in state.players.
 
         Raises:
             ValueError: If illegal action.
@@ -353,18 +489,22 @@ class MatchController:
             "marriage": marriage,
             "player": state.active_player
         }
+        state.zobrist_hash ^= MARRIAGE_KEYS[suit][position]
+        self._update_belief(state, 1 - position, opponent_cards=MARRIAGE_MASKS[suit])
 
         # Award player points immediately if possible
         active_player_state = state.player_states[state.active_player]
         if active_player_state.round_points != 0:
             active_player_state.round_points += marriage.points
             marriage.points_awarded = True
+            state.zobrist_hash ^= MARRIAGE_AWARDED_KEYS[suit]
 
-    def _close_deck(self, state: MatchState) -> None:
+    def _close_deck(self, state: MatchState, position: int) -> None:
         """Updates state to close the deck.
 
         Args:
             state (MatchState): The current match state.
+            position (int): The active player's position in state.players.
 
         Raises:
             ValueError: If action is illegal.
@@ -382,6 +522,11 @@ class MatchController:
 
         active_player_state = state.player_states[state.active_player]
         opponent_state = state.player_states[state.get_other_player(state.active_player)]
+        active_player_keys = MATCH_POINTS_ON_OFFER_KEYS[position]
+        opponent_keys = MATCH_POINTS_ON_OFFER_KEYS[1 - position]
+        state.zobrist_hash ^= (DECK_CLOSED_KEY ^ DECK_CLOSER_KEYS[position]
+                               ^ active_player_keys[active_player_state.match_points_on_offer]
+                               ^ opponent_keys[opponent_state.match_points_on_offer])
 
         # Default points available
         active_player_state.match_points_on_offer = 1
@@ -394,7 +539,10 @@ class MatchController:
         elif opponent_state.round_points < 33:
             active_player_state.match_points_on_offer = 2
 
-    def _swap_trump(self, state: MatchState) -> None:
+        state.zobrist_hash ^= (active_player_keys[active_player_state.match_points_on_offer]
+                               ^ opponent_keys[opponent_state.match_points_on_offer])
+
+    def _swap_trump(self, state: MatchState, position: int) -> None:
         current_hand = state.player_states[state.active_player].hand
 
         if state.deck_closed:
@@ -407,25 +555,58 @@ class MatchController:
             raise ValueError('Player can not swap trump as requisite card not in hand')
 
         current_hand.append(state.trump_card)
+        self._update_belief(state, 1 - position, opponent_cards=card_bit(state.trump_card))
+        jack_index = card_index(jack_of_trumps)
+        trump_index = card_index(state.trump_card)
+        state.zobrist_hash ^= (HAND_KEYS[position][jack_index] ^ HAND_KEYS[position][trump_index]
+                               ^ TRUMP_CARD_KEYS[jack_index] ^ TRUMP_CARD_KEYS[trump_index])
         state.trump_card = jack_of_trumps
 
+    def _observe_following_card(self, state: MatchState, position: int) -> None:
+        # With the deck closed, the follow rules show the leader cards the follower can't hold.
+        if state.deck_closed:
+            self._update_belief(state, 1 - position, excluded_cards=follow_rule_exclusions(
+                state.leading_card, state.following_card, state.trump_card.suit))
+
+    def _update_belief(self, state: MatchState, position: int, opponent_cards: Optional[int] = 0,
+                       excluded_cards: Optional[int] = 0) -> None:
+        """Add to what a player knows about their opponent's hand.
+
+        Args:
+            state (MatchState): Current state.
+            position (int): The player's position in state.players.
+            opponent_cards (Optional[int], optional): Mask of cards shown to be in the opponent's hand. Defaults to 0.
+            excluded_cards (Optional[int], optional): Mask of cards shown not to be in the opponent's hand. Defaults
+                to 0.
+        """
+        if opponent_cards or excluded_cards:
+            belief = state.beliefs[position]
+            belief = Belief(belief.opponent_cards | opponent_cards, belief.excluded_cards | excluded_cards)
+            state.beliefs = (belief, state.beliefs[1]) if position == 0 else (state.beliefs[0], belief)
+
     def _deal(self, state: MatchState) -> None:
         # Decide which hand is dealt to first
-        second_player = state.get_other_player(state.player_with_1st_deal)
-        first_deal_hand = state.player_states[state.player_with_1st_deal].hand
-        second_deal_hand = state.player_states[second_player].hand
+        first_player = state.player_with_1st_deal
+        second_player = state.get_other_player(first_player)
 
-        self._give_cards(state, first_deal_hand, 3)
-        self._give_cards(state, second_deal_hand, 3)
+        self._give_cards(state, first_player, 3)
+        self._give_cards(state, second_player, 3)
         state.trump_card = state.deck.pop()
-        self._give_cards(state, first_deal_hand, 2)
-        self._give_cards(state, second_deal_hand, 2)
+        self._give_cards(state, first_player, 2)
+        self._give_cards(state, second_player, 2)
 
-    def _give_cards(self, state: MatchState, hand: Hand, number_of_cards: int) -> None:
+    def _give_cards(self, state: MatchState, player: Player, number_of_cards: int) -> None:
+        hand = state.player_states[player].hand
+        hand_keys = HAND_KEYS[player_position(state, player)]
         for _ in range(number_of_cards):
             # Giving out the trump card is a special case when the face down deck is finished
             if len(state.deck) == 0 and number_of_cards == 1:
                 state.deck_closed = True
                 hand.append(state.trump_card)
+                trump_index = card_index(state.trump_card)
+                state.zobrist_hash ^= DECK_CLOSED_KEY ^ TRUMP_CARD_KEYS[trump_index] ^ hand_keys[trump_index]
             else:
-                hand.append(state.deck.pop())
+                card_position = len(state.deck) - 1
+                card = state.deck.pop()
+                hand.append(card)
+                state.zobrist_hash ^= DECK_KEYS[card_position][card_index(card)] ^ hand_keys[card_index(card)]
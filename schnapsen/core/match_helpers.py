@@ -1,12 +1,25 @@
 """Module for Game helpers."""
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 import logging
-from typing import Optional
+import random
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
+from schnapsen.core.hand import Hand
 from schnapsen.core.match_controller import MatchController
 from schnapsen.core.player import Player
 from schnapsen.core.state import MatchState
 
+if TYPE_CHECKING:   # Only needed for type hints, and avoids importing numpy for every match played.
+    from schnapsen.core.game_record import GameRecordWriter
+
+# Matches per unit of work when distributing matches across processes.
+MATCHES_PER_BATCH = 10
+
 
 @dataclass
 class Results():
@@ -27,18 +40,24 @@ class Results():
         return f"{self.player1} {self.player1_wins} : {self.player2} {self.player2_wins}"
 
 
-def play_automated_match(player_1: Player, player_2: Player) -> MatchState:
+def play_automated_match(player_1: Player, player_2: Player, card_set_type: Optional[type] = Hand,
+                         recorder: Optional[GameRecordWriter] = None) -> MatchState:
     """Progress match/game state automatically.
 
     Args:
         player_1 (Player): First player.
         player_2 (Player): Second player.
+        card_set_type (Optional[type], optional): Collection type for hands and cards won (e.g. CardSet for the
+            bitboard backend). Defaults to Hand.
+        recorder (Optional[GameRecordWriter], optional): If set, the match's rounds are recorded to it.
+            Defaults to None.
 
     Returns:
         MatchState: Match state including results.
     """
     controller = MatchController()
-    state = controller.get_new_match_state(player_1=player_1, player_2=player_2)
+    controller.recorder = recorder
+    state = controller.get_new_match_state(player_1=player_1, player_2=player_2, card_set_type=card_set_type)
     while state.match_winner is None:
         controller.reset_round_state(state=state)
         while state.round_winner is None:
@@ -46,25 +65,31 @@ def play_automated_match(player_1: Player, player_2: Player) -> MatchState:
     return state
 
 
-def play_automated_matches(player_1: Player, player_2: Player, number_of_matches: Optional[int] = 999) -> Results:
-    """Play games automatically (assuming players are both automatable).
+def play_match_batch(player_1: Player, player_2: Player, number_of_matches: int,
+                     seed: Optional[int] = None, recorder: Optional[GameRecordWriter] = None) -> Tuple[int, int]:
+    """Play a batch of matches, e.g. as a single unit of work in a process pool.
 
     Args:
         player_1 (Player): First player.
         player_2 (Player): Second player.
-        number_of_matches (Optional[int], optional): The number of games to play through, by default 999 (odd to avoid
-            ties). Defaults to 999.
+        number_of_matches (int): The number of matches to play.
+        seed (Optional[int], optional): Seeds the random module before playing so batches are reproducible.
+            Defaults to None.
+        recorder (Optional[GameRecordWriter], optional): If set, the matches' rounds are recorded to it.
+            Defaults to None.
 
     Returns:
-        Results: _description_
+        Tuple[int, int]: Player 1 and player 2 wins.
     """
     logger = logging.getLogger()
+    if seed is not None:
+        random.seed(seed)
 
     player_1_wins = 0
     player_2_wins = 0
 
     for _ in range(number_of_matches):
-        state = play_automated_match(player_1=player_1, player_2=player_2)
+        state = play_automated_match(player_1=player_1, player_2=player_2, recorder=recorder)
 
         if state.match_winner is player_1:
             player_1_wins += 1
@@ -75,8 +100,102 @@ def play_automated_matches(player_1: Player, player_2: Player, number_of_matches
             '%s vs %s, winner is %s. Running Total: %i:%i',
             player_1.name, player_2.name, state.match_winner.name, player_1_wins, player_2_wins)
 
-    logger.info('%s vs %s. %i:%i', player_1.name, player_2.name, player_1_wins, player_2_wins)
+    return player_1_wins, player_2_wins
+
+
+def submit_automated_matches(executor: Executor, player_1: Player, player_2: Player,
+                             number_of_matches: Optional[int] = 999, seed: Optional[int] = None) -> List[Future]:
+    """Distribute matches between two players across an executor (e.g. a ProcessPoolExecutor).
+
+    Matches are split into batches of MATCHES_PER_BATCH, each seeded with seed + batch index. The results therefore
+    only depend on the seed and not on the number of workers or the order in which batches complete.
+
+    Args:
+        executor (Executor): Executor to submit batches to. Players must be picklable for process pools.
+        player_1 (Player): First player.
+        player_2 (Player): Second player.
+        number_of_matches (Optional[int], optional): The number of matches to play. Defaults to 999.
+        seed (Optional[int], optional): Base seed. If None, one is drawn from the random module. Defaults to None.
+
+    Returns:
+        List[Future]: One future per batch, to be passed to collect_automated_matches.
+    """
+    return [executor.submit(play_match_batch, player_1, player_2, batch_size, batch_seed)
+            for batch_size, batch_seed in _batches(number_of_matches, seed)]
+
+
+def collect_automated_matches(player_1: Player, player_2: Player, futures: List[Future]) -> Results:
+    """Wait for and aggregate batches submitted with submit_automated_matches.
+
+    Args:
+        player_1 (Player): First player.
+        player_2 (Player): Second player.
+        futures (List[Future]): Batch futures.
+
+    Returns:
+        Results: Aggregated results.
+    """
+    player_1_wins = 0
+    player_2_wins = 0
+    for future in futures:
+        batch_player_1_wins, batch_player_2_wins = future.result()
+        player_1_wins += batch_player_1_wins
+        player_2_wins += batch_player_2_wins
+
+    return _results(player_1, player_2, player_1_wins, player_2_wins)
+
+
+def play_automated_matches(player_1: Player, player_2: Player, number_of_matches: Optional[int] = 999,
+                           workers: Optional[int] = 1, seed: Optional[int] = None,
+                           recorder: Optional[GameRecordWriter] = None) -> Results:
+    """Play games automatically (assuming players are both automatable).
+
+    Args:
+        player_1 (Player): First player.
+        player_2 (Player): Second player.
+        number_of_matches (Optional[int], optional): The number of games to play through, by default 999 (odd to avoid
+            ties). Defaults to 999.
+        workers (Optional[int], optional): If greater than 1, matches are distributed across a process pool of this
+            size. Defaults to 1.
+        seed (Optional[int], optional): If set, matches are played in seeded batches (see submit_automated_matches)
+            so results are reproducible and identical for any number of workers. Defaults to None.
+        recorder (Optional[GameRecordWriter], optional): If set, every round played is recorded to it. Only supported
+            with a single worker, for parallel generation give each process its own writer (and file).
+            Defaults to None.
+
+    Raises:
+        ValueError: If a recorder is combined with more than one worker.
 
-    return Results(player1=player_1, player2=player_2, number_of_matches_played=number_of_matches,
+    Returns:
+        Results: The aggregated match results.
+    """
+    if workers > 1:
+        if recorder is not None:
+            raise ValueError('Recording matches is only supported with a single worker')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = submit_automated_matches(executor, player_1, player_2, number_of_matches, seed)
+            return collect_automated_matches(player_1, player_2, futures)
+
+    if seed is None:
+        player_1_wins, player_2_wins = play_match_batch(player_1, player_2, number_of_matches, recorder=recorder)
+    else:
+        batch_results = [play_match_batch(player_1, player_2, batch_size, batch_seed, recorder)
+                         for batch_size, batch_seed in _batches(number_of_matches, seed)]
+        player_1_wins = sum(wins for wins, _ in batch_results)
+        player_2_wins = sum(wins for _, wins in batch_results)
+    return _results(player_1, player_2, player_1_wins, player_2_wins)
+
+
+def _batches(number_of_matches: int, seed: Optional[int]) -> List[Tuple[int, int]]:
+    # Split matches into (batch size, batch seed) pairs.
+    if seed is None:
+        seed = random.randrange(2**32)
+    return [(min(MATCHES_PER_BATCH, number_of_matches - batch_start), seed + batch_index)
+            for batch_index, batch_start in enumerate(range(0, number_of_matches, MATCHES_PER_BATCH))]
+
+
+def _results(player_1: Player, player_2: Player, player_1_wins: int, player_2_wins: int) -> Results:
+    logging.getLogger().info('%s vs %s. %i:%i', player_1.name, player_2.name, player_1_wins, player_2_wins)
+    return Results(player1=player_1, player2=player_2, number_of_matches_played=player_1_wins + player_2_wins,
                    player1_wins=player_1_wins, player2_wins=player_2_wins,
                    winner=player_1 if player_1_wins > player_2_wins else player_2)
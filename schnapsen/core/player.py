@@ -59,6 +59,12 @@ class Player:
         """
         raise NotImplementedError('Must be implemented by child')
 
+    def close(self) -> None:
+        """Release resources held by the player, such as process pools.
+
+        Players holding any should override this. The player may still be used afterwards, recreating them as needed.
+        """
+
     def _print_str_name(self) -> str:
         return self.name
 
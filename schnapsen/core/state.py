@@ -3,11 +3,13 @@ from __future__ import annotations
 
 from copy import deepcopy
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+from schnapsen.core.belief import Belief
 from schnapsen.core.card import Card
 from schnapsen.core.deck import Deck
 from schnapsen.core.hand import Hand
+from schnapsen.core.marriage import Marriage
 from schnapsen.core.player import Player
 
 
@@ -20,6 +22,49 @@ class PlayerState:
     cards_won: List[Card] = None
     match_points_on_offer = 1
 
+    def clone(self) -> PlayerState:
+        """Copy the mutable player state without a deepcopy.
+
+        Returns:
+            PlayerState: New player state. Card instances are shared as they're never mutated.
+        """
+        clone = PlayerState.__new__(PlayerState)
+        clone.__dict__.update(self.__dict__)
+        if self.hand is not None:
+            clone.hand = self.hand.copy()
+        if self.cards_won is not None:
+            clone.cards_won = self.cards_won.copy()
+        return clone
+
+
+@dataclass
+class UndoRecord:
+    """Everything required to revert a single MatchController.perform_action call.
+
+    Created by perform_action(..., record_undo=True) and consumed by MatchController.undo_action. Undo records must be
+    reverted in reverse (stack) order.
+    """
+    # Snapshot of the scalar MatchState fields listed in UNDO_STATE_FIELDS.
+    table: Tuple[Any, ...]
+    # Per player (round_points, match_points, match_points_on_offer, hand snapshot, cards won snapshot).
+    player_states: Tuple[Tuple[Any, ...], ...]
+    deck_length: int
+    # The deck cards that could be drawn by the action (at most one per player).
+    deck_tail: List[Card]
+    # Marriage info replaced by a declaration (suit, previous info or None). None if no marriage was declared.
+    declared_marriage: Optional[Tuple[Any, Optional[Dict]]]
+    # Marriages whose points had not been awarded prior to the action.
+    unawarded_marriages: List[Marriage]
+
+
+# Scalar (immutable valued) MatchState fields that perform_action may update.
+UNDO_STATE_FIELDS = ('active_player', 'leading_card', 'following_card', 'trump_card', 'deck_closed', 'hand_winner',
+                     'leading_player', 'deck_closer', 'round_winner', 'round_winner_match_points',
+                     'player_with_1st_deal', 'match_winner', 'zobrist_hash', 'beliefs')
+
+# Beliefs of the players before anything has been revealed.
+NO_BELIEFS = (Belief(), Belief())
+
 
 @dataclass
 class MatchState:
@@ -30,6 +75,8 @@ class MatchState:
     deck: Deck
 
     player_states: Dict[Player, PlayerState] = None  # set in post init
+    # Collection type used for hands and cards won. Hand by default, or CardSet for the compact bitboard backend.
+    card_set_type: type = Hand
     active_player: Player = None
     marriages_info = {}
 
@@ -45,6 +92,12 @@ class MatchState:
     round_winner: Player = None
     round_winner_match_points: int = None    # Specifically holds the last match points awards
 
+    # Zobrist hash of the round position, maintained by MatchController (see schnapsen.core.zobrist).
+    zobrist_hash: int = 0
+    # What each player (in players order) knows about the cards hidden from them, maintained by MatchController (see
+    # schnapsen.core.belief).
+    beliefs: Tuple[Belief, Belief] = NO_BELIEFS
+
     # Game rules
     round_point_limit: int = 66
     match_point_limit: int = 7
@@ -73,11 +126,33 @@ class MatchState:
     def copy(self) -> MatchState:
         """Deep copy the current game state.
 
+        Note this also deep copies the Player objects (and anything they hold, such as models). Prefer clone() for
+        simulations.
+
         Returns:
             MatchState: New state copy.
         """
         return deepcopy(self)
 
+    def clone(self) -> MatchState:
+        """Fast copy of the current game state for simulations/searches.
+
+        Only the mutable game fields (deck, hands, cards won, per player points and marriages) are copied. Players and
+        Card instances are immutable from the game's perspective and are shared with the original state, so player
+        identity checks continue to work across clones.
+
+        Returns:
+            MatchState: New state copy.
+        """
+        clone = MatchState.__new__(MatchState)
+        clone.__dict__.update(self.__dict__)
+        clone.deck = self.deck.copy()
+        clone.player_states = {player: player_state.clone() for player, player_state in self.player_states.items()}
+        clone.marriages_info = {
+            suit: {"marriage": marriage_info["marriage"].copy(), "player": marriage_info["player"]}
+            for suit, marriage_info in self.marriages_info.items()}
+        return clone
+
     def normalised_value_is_terminal(self) -> Tuple[float, bool]:
         """Get a normalised state value and terminal state from active player's perspective.
 
@@ -0,0 +1,144 @@
+"""Zobrist hashing of round positions.
+
+Every feature of a position (each card's location, whose turn it is, the deck being closed and so on) is assigned a
+random 64 bit key and a position's hash is the XOR of the keys of the features present. Moving a card or changing a
+flag is therefore a couple of XORs, which is how MatchController.perform_action keeps MatchState.zobrist_hash up to date
+without rehashing the whole state. zobrist_hash computes a hash from scratch, e.g. after dealing or shuffling.
+
+The hash covers everything that affects how the rest of a round plays out: both hands, the cards won, the face up trump
+card, the deck order, the card led, the leading and active players, deck closing, the match points on offer, marriages
+and the round result. Round points are implied by the cards won and marriages. Match level state (the match points and
+who deals first) is deliberately excluded. Players are identified by their position in MatchState.players, so a
+position (and its hash) is shared by states with different player instances.
+"""
+import random
+from typing import Iterable, List
+
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.card_set import NUMBER_OF_CARDS
+from schnapsen.core.state import MatchState
+
+# Fixed seed so hashes are stable between runs and processes.
+_rng = random.Random(0x5C4A55E4)
+
+
+def _keys(count: int) -> List[int]:
+    return [_rng.getrandbits(64) for _ in range(count)]
+
+
+# Card keys, indexed by player position (where applicable) then card bit index (see schnapsen.core.card_set).
+HAND_KEYS = [_keys(NUMBER_OF_CARDS) for _ in range(2)]
+CARDS_WON_KEYS = [_keys(NUMBER_OF_CARDS) for _ in range(2)]
+LEADING_CARD_KEYS = _keys(NUMBER_OF_CARDS)
+TRUMP_CARD_KEYS = _keys(NUMBER_OF_CARDS)
+# Indexed by deck position then card.
+DECK_KEYS = [_keys(NUMBER_OF_CARDS) for _ in range(NUMBER_OF_CARDS)]
+
+# Indexed by player position.
+ACTIVE_PLAYER_KEYS = _keys(2)
+LEADING_PLAYER_KEYS = _keys(2)
+DECK_CLOSER_KEYS = _keys(2)
+DECK_CLOSED_KEY = _rng.getrandbits(64)
+# Indexed by player position then match points (0 to 3).
+MATCH_POINTS_ON_OFFER_KEYS = [_keys(4) for _ in range(2)]
+ROUND_WINNER_KEYS = [_keys(4) for _ in range(2)]
+# Indexed by suit then declaring player position.
+MARRIAGE_KEYS = [_keys(2) for _ in Suit]
+# Indexed by suit.
+MARRIAGE_AWARDED_KEYS = _keys(len(Suit))
+
+
+def player_position(state: MatchState, player: object) -> int:
+    """Get a player's position in the state's players.
+
+    Args:
+        state (MatchState): Match state.
+        player (object): One of the state's players.
+
+    Returns:
+        int: 0 or 1.
+    """
+    return 0 if player is state.players[0] else 1
+
+
+def zobrist_hash(state: MatchState) -> int:
+    """Hash a state's round position from scratch.
+
+    Args:
+        state (MatchState): State to hash.
+
+    Returns:
+        int: 64 bit hash.
+    """
+    return _cards_hash(state) ^ _table_hash(state)
+
+
+def deck_and_hand_key(deck: Iterable[Card], hand: Iterable[Card], position: int) -> int:
+    """Get the part of a hash covering the deck and a player's hand.
+
+    Redealing the cards of the deck and a hand (e.g. to determinise a state) changes a hash by the XOR of this key
+    before and after, so it can be updated without rehashing the whole state.
+
+    Args:
+        deck (Iterable[Card]): Deck.
+        hand (Iterable[Card]): Hand.
+        position (int): Position of the hand's player in MatchState.players.
+
+    Returns:
+        int: 64 bit key.
+    """
+    value = _mask_key(HAND_KEYS[position], cards_mask(hand))
+    for deck_position, card in enumerate(deck):
+        value ^= DECK_KEYS[deck_position][card_index(card)]
+    return value
+
+
+def _cards_hash(state: MatchState) -> int:
+    value = 0
+    for position, player in enumerate(state.players):
+        player_state = state.player_states[player]
+        value ^= _mask_key(HAND_KEYS[position], cards_mask(player_state.hand))
+        value ^= _mask_key(CARDS_WON_KEYS[position], cards_mask(player_state.cards_won))
+        value ^= MATCH_POINTS_ON_OFFER_KEYS[position][player_state.match_points_on_offer]
+
+    for deck_position, card in enumerate(state.deck):
+        value ^= DECK_KEYS[deck_position][card_index(card)]
+    # The trump card is face up under the deck until it's drawn along with the last card of the deck.
+    if state.trump_card is not None and len(state.deck) > 0:
+        value ^= TRUMP_CARD_KEYS[card_index(state.trump_card)]
+    if state.leading_card is not None:
+        value ^= LEADING_CARD_KEYS[card_index(state.leading_card)]
+    return value
+
+
+def _table_hash(state: MatchState) -> int:
+    value = 0
+    if state.active_player is not None:
+        value ^= ACTIVE_PLAYER_KEYS[player_position(state, state.active_player)]
+    if state.leading_player is not None:
+        value ^= LEADING_PLAYER_KEYS[player_position(state, state.leading_player)]
+    if state.deck_closed:
+        value ^= DECK_CLOSED_KEY
+    if state.deck_closer is not None:
+        value ^= DECK_CLOSER_KEYS[player_position(state, state.deck_closer)]
+
+    for suit, marriage_info in state.marriages_info.items():
+        value ^= MARRIAGE_KEYS[suit][player_position(state, marriage_info["player"])]
+        if marriage_info["marriage"].points_awarded:
+            value ^= MARRIAGE_AWARDED_KEYS[suit]
+
+    if state.round_winner is not None:
+        value ^= ROUND_WINNER_KEYS[player_position(state, state.round_winner)][state.round_winner_match_points]
+    return value
+
+
+def _mask_key(keys: List[int], mask: int) -> int:
+    value = 0
+    while mask:
+        lowest_bit = mask & -mask
+        value ^= keys[lowest_bit.bit_length() - 1]
+        mask ^= lowest_bit
+    return value
@@ -1,46 +1,69 @@
 """Main file (test for now)."""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from itertools import combinations
-from typing import Optional
+from typing import Optional, Sequence
 
-from schnapsen.ai.better_player import BetterPlayer
-from schnapsen.ai.mcts.mcts import MctsPlayer
-from schnapsen.ai.neural_network.simple_linear.nn_linear_player import NNSimpleLinearPlayer
-from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.ai.player_registry import available_players
+from schnapsen.ai.player_registry import create_player
 from schnapsen.core import match_helpers
 from schnapsen.logs import basic_logger
 
+# Registry names (see schnapsen.ai.player_registry) of the players in a tournament by default.
+DEFAULT_PLAYERS = ('better', 'random', 'mcts', 'ismcts', 'pimc', 'nn_simple')
 
-def run_tournament(number_of_matches_per_battle: Optional[int] = 999) -> None:
+
+def run_tournament(number_of_matches_per_battle: Optional[int] = 999, workers: Optional[int] = 1,
+                   seed: Optional[int] = None, player_names: Optional[Sequence[str]] = DEFAULT_PLAYERS) -> None:
     """Pit all players against each other.
 
     Args:
         number_of_matches_per_battle (Optional[int], optional): The number of matches that each pair of players will
             play to decide a winner. Defaults to 999.
+        workers (Optional[int], optional): If greater than 1, the matches of every pairing are distributed across a
+            single process pool of this size. Defaults to 1.
+        seed (Optional[int], optional): Base seed for reproducible results (independent of the number of workers).
+            Defaults to None.
+        player_names (Optional[Sequence[str]], optional): Registry names of the players. Only their modules are
+            imported. Defaults to DEFAULT_PLAYERS.
     """
     logger = basic_logger()
     logger.debug('Starting Aritificial Mortal Kombat')
 
-    players = [
-        BetterPlayer("Betty"),
-        RandomPlayer("Randy"),
-        MctsPlayer(number_of_searches_per_move=30),
-        NNSimpleLinearPlayer("NN_Simple")
-    ]
-
-    # Load models if required.
-    for player in players:
-        if player.requires_model_load:
-            player.load_model()
+    # Created through the registry, which also loads models if required.
+    players = [create_player(name) for name in player_names]
 
     # Initialise results dicts.
     tournament_results = {player: 0 for player in players}
 
     # Now play all combinations of players
-    for (player_1, player_2) in combinations(players, 2):
-        results = match_helpers.play_automated_matches(
-            player_1=player_1,
-            player_2=player_2,
-            number_of_matches=number_of_matches_per_battle)
+    pairings = list(combinations(players, 2))
+    # Give each pairing its own seed range so batches across pairings are not correlated.
+    pairing_seeds = [None if seed is None else seed + i * number_of_matches_per_battle for i in range(len(pairings))]
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Submit every pairing up front so the pool is kept busy, then aggregate in a deterministic order.
+                pairing_futures = [
+                    match_helpers.submit_automated_matches(executor, player_1, player_2, number_of_matches_per_battle,
+                                                           pairing_seed)
+                    for (player_1, player_2), pairing_seed in zip(pairings, pairing_seeds)]
+                all_results = [match_helpers.collect_automated_matches(player_1, player_2, futures)
+                               for (player_1, player_2), futures in zip(pairings, pairing_futures)]
+        else:
+            all_results = [
+                match_helpers.play_automated_matches(
+                    player_1=player_1,
+                    player_2=player_2,
+                    number_of_matches=number_of_matches_per_battle,
+                    seed=pairing_seed)
+                for (player_1, player_2), pairing_seed in zip(pairings, pairing_seeds)]
+    finally:
+        # Release the players' resources, e.g. the process pools of parallel players.
+        for player in players:
+            player.close()
+
+    for results in all_results:
         tournament_results[results.winner] = tournament_results[results.winner] + 1
 
     # And print out sorted results
@@ -49,4 +72,12 @@ def run_tournament(number_of_matches_per_battle: Optional[int] = 999) -> None:
 
 
 if __name__ == "__main__":
-    run_tournament(number_of_matches_per_battle=99)
+    parser = argparse.ArgumentParser(description='Run a round robin tournament between the available players.')
+    parser.add_argument('--matches', type=int, default=99, help='Number of matches per pairing.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes.')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed for reproducible results.')
+    parser.add_argument('--players', nargs='+', default=DEFAULT_PLAYERS, choices=available_players(),
+                        help='Players to include.')
+    args = parser.parse_args()
+    run_tournament(number_of_matches_per_battle=args.matches, workers=args.workers, seed=args.seed,
+                   player_names=args.players)
@@ -0,0 +1,35 @@
+import random
+
+import numpy as np
+
+from schnapsen.ai.mcts.ismcts import ISMCTS
+from schnapsen.ai.mcts.ismcts import IsmctsPlayer
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core import match_helpers
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.actions import get_action_index
+from schnapsen.core.match_controller import MatchController
+
+
+def test_search_policy_covers_legal_actions_only():
+    random.seed(0)
+    controller = MatchController()
+    state = controller.get_new_match_state(IsmctsPlayer(number_of_searches_per_move=1), RandomPlayer("Randy"))
+    controller.reset_round_state(state)
+    legal_ids = {get_action_index(action) for action in controller.get_valid_actions(state)}
+    hidden_cards = list(state.deck) + list(state.player_states[state.get_other_player(state.active_player)].hand)
+
+    policy = ISMCTS(match_controller=controller).search(state, number_of_searches=50)
+
+    assert policy.shape == (len(ALL_GAME_ACTIONS),)
+    assert np.isclose(np.sum(policy), 1)
+    assert {int(i) for i in np.flatnonzero(policy)} == legal_ids
+    # Determinisations are sampled on copies, the real state is untouched.
+    assert list(state.deck) + list(state.player_states[state.get_other_player(state.active_player)].hand) == \
+        hidden_cards
+
+
+def test_ismcts_player_plays_matches():
+    random.seed(1)
+    state = match_helpers.play_automated_match(IsmctsPlayer(number_of_searches_per_move=5), RandomPlayer("Randy"))
+    assert state.match_winner is not None
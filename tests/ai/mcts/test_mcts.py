@@ -0,0 +1,125 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from schnapsen.ai.mcts import mcts as mcts_module
+from schnapsen.ai.mcts.mcts import MCTS
+from schnapsen.ai.mcts.mcts import MctsPlayer
+from schnapsen.ai.mcts.mcts import ParallelMode
+from schnapsen.ai.mcts.transposition_table import TranspositionTable
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.state import MatchState
+from schnapsen.core.zobrist import zobrist_hash
+
+
+def _new_round(player: MctsPlayer) -> MatchState:
+    random.seed(0)
+    controller = MatchController()
+    state = controller.get_new_match_state(player, RandomPlayer("Randy"))
+    state.player_with_1st_deal = player
+    controller.reset_round_state(state)
+    return state
+
+
+def test_root_parallel_search_merges_visit_counts():
+    state = _new_round(MctsPlayer(number_of_searches_per_move=1))
+    mcts = MCTS(match_controller=MatchController())
+
+    policy = mcts.root_parallel_search(state, number_of_searches=40, number_of_trees=4)
+
+    assert policy.shape == (len(ALL_GAME_ACTIONS),)
+    assert np.isclose(np.sum(policy), 1)
+    legal_ids = {i for i, action in ALL_GAME_ACTIONS.items()
+                 if action in MatchController().get_valid_actions(state)}
+    assert {int(i) for i in np.flatnonzero(policy)} <= legal_ids
+
+
+@pytest.mark.parametrize("parallel_mode", [ParallelMode.ROOT, ParallelMode.LEAF])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_players_select_legal_actions(parallel_mode: ParallelMode, workers: int):
+    player = MctsPlayer(number_of_searches_per_move=8, parallel_mode=parallel_mode, workers=workers)
+    state = _new_round(player)
+    legal_actions = MatchController().get_valid_actions(state)
+
+    action = player.select_action(state, legal_actions)
+    player.close()
+
+    assert action in legal_actions
+    assert player._executor is None
+
+
+def test_leaf_parallel_rollouts_are_reproducible():
+    state = _new_round(MctsPlayer(number_of_searches_per_move=1))
+    mcts = MCTS(match_controller=MatchController(), rollouts_per_leaf=5, leaf_tasks=2)
+
+    policies = []
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for _ in range(2):
+            random.seed(1)
+            policies.append(mcts.search(state, number_of_searches=20, executor=executor))
+
+    assert np.array_equal(policies[0], policies[1])
+    legal_ids = {i for i, action in ALL_GAME_ACTIONS.items()
+                 if action in MatchController().get_valid_actions(state)}
+    assert {int(i) for i in np.flatnonzero(policies[0])} <= legal_ids
+
+
+def test_parallel_player_is_picklable():
+    player = MctsPlayer(number_of_searches_per_move=8, parallel_mode=ParallelMode.ROOT, workers=2)
+    state = _new_round(player)
+    player.select_action(state, MatchController().get_valid_actions(state))
+
+    clone = pickle.loads(pickle.dumps(player))
+    player.close()
+    assert clone.parallel_mode is ParallelMode.ROOT
+    assert clone._executor is None
+
+
+def test_search_with_transposition_table_selects_legal_actions():
+    state = _new_round(MctsPlayer(number_of_searches_per_move=1))
+    mcts = MCTS(match_controller=MatchController(), transposition_table_size=1000)
+
+    policy = mcts.search(state, number_of_searches=200)
+
+    legal_ids = {i for i, action in ALL_GAME_ACTIONS.items()
+                 if action in MatchController().get_valid_actions(state)}
+    assert {int(i) for i in np.flatnonzero(policy)} <= legal_ids
+
+
+def test_transposition_table_evicts_least_recently_used():
+    table = TranspositionTable(max_size=2)
+    table.put(1, "a")
+    table.put(2, "b")
+    assert table.get(1) == "a"
+    table.put(3, "c")
+
+    assert len(table) == 2
+    assert table.get(2) is None
+    assert table.get(1) == "a"
+    assert table.get(3) == "c"
+    assert table.hits == 3
+
+
+def test_player_reuses_the_tree_below_the_position_reached():
+    player = MctsPlayer(number_of_searches_per_move=200)
+    state = _new_round(player)
+    controller = MatchController()
+    controller.perform_action(state, player.select_action(state, controller.get_valid_actions(state)))
+    while state.active_player is not player:
+        controller.perform_action(state, random.choice(controller.get_valid_actions(state)))
+    retained_node = mcts_module._find_node(player.mcts._root_node, zobrist_hash(state))
+
+    player.select_action(state, controller.get_valid_actions(state))
+
+    assert retained_node is not None
+    assert player.mcts._root_node is retained_node
+    assert retained_node.parent is None
+    assert retained_node.visit_count > 200
+    # The retained tree isn't pickled.
+    assert pickle.loads(pickle.dumps(player)).mcts._root_node is None
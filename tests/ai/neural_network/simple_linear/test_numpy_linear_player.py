@@ -0,0 +1,46 @@
+from pathlib import Path
+import random
+import subprocess
+import sys
+
+import numpy as np
+import torch
+
+from schnapsen.ai.neural_network.simple_linear.nn_linear_module import LinearModule
+from schnapsen.ai.neural_network.simple_linear.nn_linear_player import NNSimpleLinearPlayer
+from schnapsen.ai.neural_network.simple_linear.numpy_linear_player import NumpyLinearPlayer
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.match_controller import MatchController
+
+
+def test_matches_torch_player(tmp_path: Path):
+    torch.manual_seed(0)
+    random.seed(0)
+    torch_player = NNSimpleLinearPlayer()
+    torch_player.model = LinearModule(NUMBER_OF_FEATURES, 32, 30)
+    file = str(tmp_path / 'weights.npz')
+    torch_player.export_weights(file)
+    numpy_player = NumpyLinearPlayer(file=file)
+    numpy_player.load_model()
+
+    controller = MatchController()
+    encoder = StateEncoder()
+    for _ in range(5):
+        state = controller.get_new_match_state(RandomPlayer("Randy1"), RandomPlayer("Randy2"))
+        controller.reset_round_state(state)
+        while state.round_winner is None:
+            with torch.no_grad():
+                expected = torch_player.model(torch.from_numpy(encoder.encode(state))).numpy()
+            np.testing.assert_allclose(numpy_player.q_values(encoder.encode(state)), expected, rtol=1e-4, atol=1e-5)
+            assert numpy_player.select_action(state, None) == torch_player.select_action(state, None)
+            controller.perform_action(state, random.choice(controller.get_valid_actions(state)))
+
+
+def test_loads_without_torch():
+    script = ('import sys\n'
+              'from schnapsen.ai.neural_network.simple_linear.numpy_linear_player import NumpyLinearPlayer\n'
+              'NumpyLinearPlayer().load_model()\n'
+              'assert "torch" not in sys.modules\n')
+    subprocess.run([sys.executable, '-c', script], check=True, cwd=Path(__file__).parents[4])
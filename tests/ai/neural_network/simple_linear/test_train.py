@@ -1,5 +1,16 @@
+import multiprocessing
+import sys
+
+import pytest
+import torch
+
+from schnapsen.ai.neural_network.replay_memory import Transition
 from schnapsen.ai.neural_network.simple_linear import train
+from schnapsen.ai.neural_network.simple_linear.trainer import check_actors
+from schnapsen.ai.neural_network.simple_linear.trainer import SharedTransitionSlots
 from schnapsen.ai.neural_network.simple_linear.trainer import TrainConfig
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.core.actions import ALL_GAME_ACTIONS
 
 
 def test_train_integration():
@@ -13,3 +24,69 @@ def test_train_integration():
             update_model_on_disk=False   # Don't override local model file!
         )
     )
+
+
+def test_train_integration_vectorised():
+    train.train(
+        TrainConfig(
+            number_actions=30,
+            memory_size=50,
+            batch_size=10,
+            nb_training_loops_before_reference_model_update=20,
+            update_model_on_disk=False,
+            number_of_envs=4
+        )
+    )
+
+
+def test_train_integration_actor_processes():
+    train.train(
+        TrainConfig(
+            number_actions=60,
+            memory_size=50,
+            batch_size=10,
+            nb_training_loops_before_reference_model_update=50,
+            update_model_on_disk=False,
+            number_of_envs=2,
+            number_of_actors=2,
+            actor_sync_interval=10
+        )
+    )
+
+
+def test_train_integration_prioritised_replay():
+    train.train(
+        TrainConfig(
+            number_actions=30,
+            memory_size=50,
+            batch_size=10,
+            nb_training_loops_before_reference_model_update=20,
+            update_model_on_disk=False,
+            number_of_envs=4,
+            prioritised_replay=True
+        )
+    )
+
+
+def test_check_actors_raises_once_an_actor_exits():
+    actor = multiprocessing.Process(target=sys.exit, args=(3,))
+    actor.start()
+    actor.join()
+
+    with pytest.raises(RuntimeError, match=r'1 of 1 actor processes exited \(exit codes \[3\]\)'):
+        check_actors([actor])
+
+
+def test_shared_transition_slots_hand_batches_over_by_index():
+    context = multiprocessing.get_context('spawn')
+    slots = SharedTransitionSlots(context, number_of_slots=1, number_of_envs=2)
+    transitions = Transition(torch.rand(2, NUMBER_OF_FEATURES), torch.tensor([3, 5]), torch.rand(2, NUMBER_OF_FEATURES),
+                             torch.rand(2, len(ALL_GAME_ACTIONS)) > 0.5, torch.tensor([0.5, -1.0]))
+
+    slots.put(transitions, context.Event())
+    slot = slots.get(block=True, timeout=1.0)
+
+    for field, expected in zip(slots.batch(slot), transitions):
+        assert torch.equal(field, expected)
+    slots.release(slot)
+    assert slots.free_slots.get(timeout=1.0) == slot
@@ -0,0 +1,28 @@
+import random
+
+from schnapsen.ai.neural_network.action_masks import legal_action_mask
+from schnapsen.ai.neural_network.action_masks import legal_action_masks
+from schnapsen.ai.neural_network.action_masks import NUMBER_OF_ACTIONS
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.match_controller import MatchController
+
+
+def test_legal_action_masks():
+    random.seed(0)
+    controller = MatchController()
+    states = []
+    for _ in range(8):
+        state = controller.get_new_match_state(RandomPlayer("Randy1"), RandomPlayer("Randy2"))
+        controller.reset_round_state(state)
+        for _ in range(random.randrange(10)):
+            controller.perform_action(state, random.choice(controller.get_valid_actions(state)))
+        states.append(state)
+
+    masks = legal_action_masks(states)
+
+    assert masks.shape == (len(states), NUMBER_OF_ACTIONS)
+    for state, mask in zip(states, masks):
+        assert (legal_action_mask(state) == mask).all()
+        legal_actions = controller.get_valid_actions(state)
+        assert [ALL_GAME_ACTIONS[i] in legal_actions for i in range(NUMBER_OF_ACTIONS)] == mask.tolist()
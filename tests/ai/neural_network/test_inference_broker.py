@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from schnapsen.ai.neural_network.inference_broker import InferenceBroker
+from schnapsen.ai.neural_network.simple_linear.nn_linear_module import LinearModule
+from schnapsen.ai.neural_network.simple_linear.nn_linear_player import NNSimpleLinearPlayer
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core import match_helpers
+
+
+def test_concurrent_requests_are_batched():
+    torch.manual_seed(0)
+    model = LinearModule(NUMBER_OF_FEATURES, 16, 30)
+    inputs = np.random.default_rng(0).random((32, NUMBER_OF_FEATURES), dtype=np.float32)
+    # Release all the threads at once so their requests arrive together.
+    barrier = threading.Barrier(len(inputs))
+
+    def evaluate(row: np.ndarray) -> np.ndarray:
+        barrier.wait()
+        return broker.evaluate(row)
+
+    with InferenceBroker(model, max_batch_size=16, max_latency=0.05) as broker, \
+            ThreadPoolExecutor(max_workers=len(inputs)) as executor:
+        outputs = np.stack(list(executor.map(evaluate, inputs)))
+
+    with torch.no_grad():
+        np.testing.assert_allclose(outputs, model(torch.from_numpy(inputs)).numpy(), rtol=1e-5, atol=1e-6)
+    assert broker.number_of_inputs == len(inputs)
+    assert broker.number_of_batches < len(inputs) / 4
+
+
+def test_model_errors_reach_callers():
+    with InferenceBroker(LinearModule(3, 4, 2)) as broker, pytest.raises(RuntimeError):
+        broker.evaluate(np.zeros(5, dtype=np.float32))
+
+
+def test_threaded_matches_through_broker():
+    player = NNSimpleLinearPlayer()
+    player.model = LinearModule(NUMBER_OF_FEATURES, 16, 30)
+    opponent = RandomPlayer("Randy")
+    with InferenceBroker(player.model) as broker, ThreadPoolExecutor(max_workers=4) as executor:
+        player.broker = broker
+        futures = match_helpers.submit_automated_matches(executor, player, opponent, number_of_matches=20)
+        results = match_helpers.collect_automated_matches(player, opponent, futures)
+    assert results.number_of_matches_played == 20
+    assert broker.number_of_inputs > 0
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import numpy as np
+
+from schnapsen.ai.neural_network.record_dataset import record_batches
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core import match_helpers
+from schnapsen.core.actions import get_action_index
+from schnapsen.core.game_record import GameRecordWriter
+from schnapsen.core.game_record import read_rounds
+from schnapsen.core.game_record import replay_round
+
+
+def test_record_batches_stream_every_sample_shuffled(tmp_path: Path):
+    files = [str(tmp_path / f'{index}.sgr') for index in range(2)]
+    for index, file in enumerate(files):
+        with GameRecordWriter(file) as writer:
+            match_helpers.play_automated_matches(RandomPlayer("Randy1"), RandomPlayer("Randy2"), number_of_matches=3,
+                                                 seed=index, recorder=writer)
+
+    # Reference samples of player 1, in play order.
+    encoder = StateEncoder()
+    expected = []
+    for file in files:
+        for record in read_rounds(file):
+            for state, action in replay_round(record):
+                if state.active_player is state.players[0]:
+                    expected.append((encoder.encode(state).tobytes(), get_action_index(action)))
+
+    batches = list(record_batches(files, batch_size=16, shuffle_buffer_size=50, players=(0,), seed=1))
+
+    assert all(len(actions) == 16 for _, actions, _ in batches[:-1])
+    states = np.concatenate([states for states, _, _ in batches])
+    actions = np.concatenate([actions for _, actions, _ in batches])
+    legal_masks = np.concatenate([legal_masks for _, _, legal_masks in batches])
+    samples = [(state.tobytes(), action) for state, action in zip(states, actions.tolist())]
+    assert sorted(samples) == sorted(expected)
+    assert samples != expected
+    assert legal_masks[np.arange(len(actions)), actions].all()
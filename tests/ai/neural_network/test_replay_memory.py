@@ -0,0 +1,100 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from schnapsen.ai.neural_network.replay_memory import MemmapReplayMemory
+from schnapsen.ai.neural_network.replay_memory import PrioritisedReplayMemory
+from schnapsen.ai.neural_network.replay_memory import SumTree
+from schnapsen.ai.neural_network.replay_memory import TensorReplayMemory
+from schnapsen.ai.neural_network.replay_memory import Transition
+
+
+def _transitions(first: int, count: int) -> Transition:
+    # Transitions whose contents identify them by number.
+    ids = torch.arange(first, first + count)
+    return Transition(ids.float().view(-1, 1).repeat(1, 3), ids, ids.float().view(-1, 1).repeat(1, 3) + 0.5,
+                      (ids.view(-1, 1) % 2).repeat(1, 4).bool(), ids.float())
+
+
+def test_push_batch_wraps_around():
+    memory = TensorReplayMemory(capacity=5, state_size=3, number_of_actions=4)
+    memory.push_batch(_transitions(0, 3))
+    assert len(memory) == 3
+
+    memory.push_batch(_transitions(3, 4))
+    assert len(memory) == 5
+    # Transitions 0 and 1 have been overwritten by 5 and 6.
+    assert memory.actions.view(-1).tolist() == [5, 6, 2, 3, 4]
+    assert memory.rewards.tolist() == [5, 6, 2, 3, 4]
+
+
+def test_sample_is_batched_and_consistent():
+    memory = TensorReplayMemory(capacity=10, state_size=3, number_of_actions=4, state_dtype=torch.float16)
+    for transition in zip(*_transitions(0, 8)):
+        memory.push(*transition)
+
+    states, actions, next_states, next_legal_actions, rewards = memory.sample(16)
+
+    assert states.shape == (16, 3)
+    assert states.dtype == torch.float32
+    assert actions.shape == (16, 1)
+    assert actions.dtype == torch.long
+    assert next_legal_actions.shape == (16, 4)
+    assert next_legal_actions.dtype == torch.bool
+    assert rewards.shape == (16,)
+    assert torch.equal(states[:, 0], actions.view(-1).float())
+    assert torch.equal(next_states[:, 0], rewards + 0.5)
+    assert torch.equal(next_legal_actions[:, 0], actions.view(-1) % 2 == 1)
+
+
+def test_sum_tree_find_and_update():
+    tree = SumTree(5)
+    tree.update(np.arange(5), np.array([1.0, 0.0, 2.0, 3.0, 4.0]))
+    assert tree.total == 10
+    assert tree.find(np.array([0.0, 0.99, 1.0, 2.99, 3.0, 5.99, 6.0, 9.99])).tolist() == [0, 0, 2, 2, 3, 3, 4, 4]
+
+    tree.update(np.array([0, 4]), np.array([5.0, 0.0]))
+    assert tree.total == 10
+    assert tree.find(np.array([4.99, 5.0, 9.99])).tolist() == [0, 2, 3]
+
+
+def test_prioritised_sampling_follows_td_errors():
+    np.random.seed(0)
+    memory = PrioritisedReplayMemory(capacity=8, state_size=3, number_of_actions=4, alpha=1.0, beta=0.5,
+                                     beta_increment=0.25, epsilon=0.0)
+    memory.push_batch(_transitions(0, 8))
+    # New transitions all start at the maximum priority.
+    (states, *_), indices, weights = memory.sample_with_weights(8)
+    assert torch.equal(states[:, 0], indices.float())
+    assert torch.equal(weights, torch.ones(8))
+    assert memory.beta == 0.75
+
+    memory.update_priorities(torch.arange(8), torch.tensor([0.0, 0.0, 0.0, 0.0, 0.0, 0.0, -1.0, 3.0]))
+    _, indices, weights = memory.sample_with_weights(1000)
+    assert set(indices.tolist()) == {6, 7}
+    assert 0.7 < (indices == 7).float().mean() < 0.8
+    # Weights are (8 * probability) ** -beta, normalised so the rarer transition gets 1.
+    assert torch.allclose(weights[indices == 6], torch.tensor(1.0))
+    assert torch.allclose(weights[indices == 7], torch.tensor(3 ** -0.75))
+
+
+def test_memmap_memory_persists_and_reopens(tmp_path: Path):
+    path = str(tmp_path / 'memory')
+    memory = MemmapReplayMemory(path, capacity=5, state_size=3, number_of_actions=4, state_dtype=torch.float16)
+    memory.push_batch(_transitions(0, 7))
+    memory.flush()
+    del memory
+
+    memory = MemmapReplayMemory(path, capacity=5, state_size=3, number_of_actions=4, state_dtype=torch.float16)
+    assert len(memory) == 5
+    assert memory.position == 2
+    assert memory.actions.view(-1).tolist() == [5, 6, 2, 3, 4]
+    states, actions, next_states, next_legal_actions, rewards = memory.sample(16)
+    assert states.dtype == torch.float32
+    assert torch.equal(states[:, 0], actions.view(-1).float())
+    assert torch.equal(next_legal_actions[:, 0], actions.view(-1) % 2 == 1)
+
+    with pytest.raises(ValueError, match='states'):
+        MemmapReplayMemory(path, capacity=10, state_size=3, number_of_actions=4, state_dtype=torch.float16)
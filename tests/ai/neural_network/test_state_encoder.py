@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+import pytest
+
+from schnapsen.ai.neural_network.simple_linear.io_helpers import IOHelpers
+from schnapsen.ai.neural_network.state_encoder import NUMBER_OF_FEATURES
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.card_set import CardSet
+from schnapsen.core.hand import Hand
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.state import MatchState
+
+
+def _reference_encoding(state: MatchState) -> list:
+    # Straightforward per card encoding, as originally built by IOHelpers.
+    player_state = state.player_states[state.active_player]
+    opponent_state = state.player_states[state.get_other_player(state.active_player)]
+    features = []
+    for suit in [Suit.DIAMOND, Suit.CLUB, Suit.SPADE, Suit.HEART]:
+        for value in Value:
+            features += [suit / 3, value / state.round_point_limit,
+                         any(card.suit == suit and card.value == value for card in player_state.hand), False,
+                         any(card.suit == suit and card.value == value for card in player_state.cards_won),
+                         any(card.suit == suit and card.value == value for card in opponent_state.cards_won),
+                         state.leading_card in [Card(suit, value)]]
+    features += [1 if state.deck_closed else 0,
+                 (state.match_point_limit - player_state.round_points) / state.round_point_limit,
+                 (state.match_point_limit - opponent_state.round_points) / state.round_point_limit]
+    return features
+
+
+def _random_states(card_set_type: type, number_of_states: int) -> list:
+    controller = MatchController()
+    states = []
+    for _ in range(number_of_states):
+        state = controller.get_new_match_state(RandomPlayer("Randy1"), RandomPlayer("Randy2"), card_set_type)
+        controller.reset_round_state(state)
+        for _ in range(random.randrange(12)):
+            if state.round_winner is None:
+                controller.perform_action(state, random.choice(controller.get_valid_actions(state)))
+        states.append(state)
+    return states
+
+
+@pytest.mark.parametrize("card_set_type", [Hand, CardSet])
+def test_encoding_matches_reference(card_set_type: type):
+    random.seed(0)
+    encoder = StateEncoder()
+    states = _random_states(card_set_type, 10)
+
+    batch = encoder.encode_batch(states)
+    assert batch.shape == (len(states), NUMBER_OF_FEATURES)
+    batch_tensor = IOHelpers.create_inputs_from_game_states(states)
+    for state, row, tensor_row in zip(states, batch, batch_tensor):
+        expected = np.array(_reference_encoding(state), dtype=np.float32)
+        assert np.allclose(encoder.encode(state), expected)
+        assert np.allclose(row, expected)
+        assert np.allclose(tensor_row.numpy(), expected)
+        assert np.allclose(IOHelpers.create_input_from_game_state(state).numpy(), expected)
+
+
+def test_create_input_tensors_are_fresh():
+    random.seed(1)
+    state_1, state_2 = _random_states(Hand, 2)
+
+    tensor_1 = IOHelpers.create_input_from_game_state(state_1)
+    tensor_2 = IOHelpers.create_input_from_game_state(state_2)
+
+    assert np.allclose(tensor_1.numpy(), _reference_encoding(state_1))
+    assert tensor_1.data_ptr() != tensor_2.data_ptr()
@@ -0,0 +1,36 @@
+import random
+
+import numpy as np
+
+from schnapsen.ai.neural_network.action_masks import legal_action_masks
+from schnapsen.ai.neural_network.state_encoder import StateEncoder
+from schnapsen.ai.neural_network.vector_env import VectorMatchEnv
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.player import Player
+
+
+def test_vector_env_steps_and_resets():
+    random.seed(0)
+    learner = Player("learner", automated=False)
+    env = VectorMatchEnv(learner, [RandomPlayer("Randy1"), RandomPlayer("Randy2")], number_of_envs=6)
+    states, legal_masks = env.reset()
+    encoder = StateEncoder()
+
+    round_ends = 0
+    for _ in range(60):
+        assert all(state.active_player is learner for state in env.match_states)
+        assert np.array_equal(states, encoder.encode_batch(env.match_states))
+        assert np.array_equal(legal_masks, legal_action_masks(env.match_states))
+
+        actions = [ALL_GAME_ACTIONS[random.choice(np.flatnonzero(mask))] for mask in legal_masks]
+        result = env.step(actions)
+
+        assert result.next_states.shape == states.shape
+        assert result.rewards.shape == (6,)
+        # Environments that weren't reset carry straight on from the state reached.
+        assert np.array_equal(env.states[~result.round_ends], result.next_states[~result.round_ends])
+        round_ends += result.round_ends.sum()
+        states, legal_masks = env.states, env.legal_masks
+
+    assert round_ends > 0
@@ -0,0 +1,126 @@
+import random
+
+from schnapsen.ai.mcts.mcts import MCTS
+from schnapsen.ai.mcts.mcts import MctsPlayer
+from schnapsen.ai.perfect_information import can_solve
+from schnapsen.ai.perfect_information import CLOSE_DECK_ACTION
+from schnapsen.ai.perfect_information import compact_state
+from schnapsen.ai.perfect_information import legal_actions
+from schnapsen.ai.perfect_information import PerfectInformationSolver
+from schnapsen.ai.perfect_information import perform_action
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.actions import CLOSE_DECK_ACTION_MASK
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.state import MatchState
+
+
+def _closed_deck_state(seed: int) -> MatchState:
+    # Play at random (closing the deck when possible) until the deck is closed or exhausted.
+    random.seed(seed)
+    controller = MatchController()
+    state = controller.get_new_match_state(RandomPlayer("Randy"), RandomPlayer("Andy"))
+    controller.reset_round_state(state)
+    while not can_solve(state):
+        if state.round_winner is not None:
+            controller.reset_round_state(state)
+        actions = controller.get_valid_actions(state)
+        close_deck = Action(close_deck=True)
+        action = close_deck if close_deck in actions and seed % 2 else random.choice(actions)
+        controller.perform_action(state, action)
+    return state
+
+
+def _minimax(controller: MatchController, state: MatchState) -> int:
+    if state.round_winner is not None:
+        points = state.round_winner_match_points
+        return points if state.round_winner is state.active_player else -points
+    player = state.active_player
+    values = []
+    for action in controller.get_valid_actions(state):
+        undo_record = controller.perform_action(state, action, record_undo=True)
+        value = _minimax(controller, state)
+        values.append(value if state.active_player is player else -value)
+        controller.undo_action(state, undo_record)
+    return max(values)
+
+
+def test_compact_rules_match_match_controller():
+    controller = MatchController()
+    for seed in range(300):
+        random.seed(seed)
+        state = controller.get_new_match_state(RandomPlayer("Randy"), RandomPlayer("Andy"))
+        controller.reset_round_state(state)
+        compact = compact_state(state)
+        while True:
+            action_mask = controller.get_valid_action_mask(state)
+            actions = legal_actions(compact)
+            assert sorted(actions) == [index for index in range(len(ACTIONS)) if action_mask >> index & 1]
+
+            # Close the deck more often than at random, to cover closed deck rules.
+            if action_mask & CLOSE_DECK_ACTION_MASK and random.random() < 0.2:
+                action = CLOSE_DECK_ACTION_MASK.bit_length() - 1
+            else:
+                action = random.choice(actions)
+            player = state.active_player
+            controller.perform_action(state, ACTIONS[action])
+            compact = perform_action(compact, action)
+            if state.round_winner is not None:
+                sign = 1 if state.round_winner is player else -1
+                assert compact == sign * state.round_winner_match_points
+                break
+            assert compact == compact_state(state)
+
+
+def test_closed_deck_values_match_minimax():
+    controller = MatchController()
+    solver = PerfectInformationSolver()
+    for seed in range(20):
+        state = _closed_deck_state(seed)
+        expected = _minimax(controller, state.clone())
+
+        action, value = solver.solve(compact_state(state))
+        assert value == expected
+        # Solving from a fresh table gives the same value.
+        assert PerfectInformationSolver().solve(compact_state(state))[1] == expected
+
+        # The best action achieves the value.
+        assert action in legal_actions(compact_state(state))
+        child = state.clone()
+        controller.perform_action(child, ACTIONS[action])
+        child_value = _minimax(controller, child)
+        assert (child_value if child.active_player is state.active_player else -child_value) == expected
+
+
+def test_solver_without_closing_never_closes():
+    controller = MatchController()
+    solver = PerfectInformationSolver(depth=2, search_closing=False)
+    for seed in range(20):
+        random.seed(seed)
+        state = controller.get_new_match_state(RandomPlayer("Randy"), RandomPlayer("Andy"))
+        controller.reset_round_state(state)
+        compact = compact_state(state)
+        assert CLOSE_DECK_ACTION in legal_actions(compact)
+        assert solver.solve(compact)[0] != CLOSE_DECK_ACTION
+
+
+def test_mcts_solving_endgames_selects_legal_actions():
+    state = _closed_deck_state(1)
+    mcts = MCTS(match_controller=MatchController(), solve_endgames=True)
+
+    policy = mcts.search(state, number_of_searches=50)
+
+    actions = MatchController().get_valid_actions(state)
+    assert all(policy[index] == 0 for index, action in enumerate(ACTIONS) if action not in actions)
+
+
+def test_mcts_player_solving_endgames_selects_legal_actions():
+    state = _closed_deck_state(1)
+    player = MctsPlayer(number_of_searches_per_move=50, solve_endgames=True)
+    actions = MatchController().get_valid_actions(state)
+
+    assert player.select_action(state, actions) in actions
+    # Leaves were valued by the solver rather than rollouts.
+    assert player.mcts._endgame_solver is not None
+    assert MctsPlayer(number_of_searches_per_move=50).mcts.solve_endgames is False
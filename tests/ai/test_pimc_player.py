@@ -0,0 +1,41 @@
+import pickle
+import random
+
+import pytest
+
+from schnapsen.ai.perfect_information import CLOSE_DECK_ACTION
+from schnapsen.ai.pimc_player import PimcPlayer
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.match_helpers import play_automated_matches
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pimc_player_selects_legal_actions(workers: int):
+    random.seed(0)
+    player = PimcPlayer(number_of_determinisations=10, search_depth=2, workers=workers)
+    controller = MatchController()
+    state = controller.get_new_match_state(player, RandomPlayer("Randy"))
+    state.player_with_1st_deal = player
+    controller.reset_round_state(state)
+    legal_actions = controller.get_valid_actions(state)
+
+    assert player.select_action(state, legal_actions) in legal_actions
+    votes = player.action_votes(state)
+    # Closing the deck is voted for separately, by all determinisations or none.
+    assert votes[CLOSE_DECK_ACTION] in (0, 10)
+    assert sum(votes) - votes[CLOSE_DECK_ACTION] == 10
+
+    clone = pickle.loads(pickle.dumps(player))
+    assert clone._executor is None
+    assert clone._solver is None
+
+    player.close()
+    assert player._executor is None
+
+
+def test_pimc_player_plays_matches():
+    random.seed(0)
+    player = PimcPlayer(number_of_determinisations=5, search_depth=2)
+    results = play_automated_matches(player_1=player, player_2=RandomPlayer("Randy"), number_of_matches=2)
+    assert results.player1_wins + results.player2_wins == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from schnapsen.ai.better_player import BetterPlayer
+from schnapsen.ai.mcts.mcts import MctsPlayer
+from schnapsen.ai.player_registry import available_players
+from schnapsen.ai.player_registry import create_player
+from schnapsen.ai.player_registry import get_player_class
+
+
+def test_create_player_with_defaults_and_overrides():
+    player = create_player('better')
+    assert isinstance(player, BetterPlayer)
+    assert player.name == 'Betty'
+    assert create_player('better', name='Bob').name == 'Bob'
+    assert create_player('mcts', number_of_searches_per_move=5).number_of_searches == 5
+
+
+def test_every_registered_player_resolves():
+    for name in available_players():
+        assert isinstance(get_player_class(name), type)
+    assert get_player_class('mcts') is MctsPlayer
+
+
+def test_unknown_player():
+    with pytest.raises(ValueError, match='Available players'):
+        create_player('nobody')
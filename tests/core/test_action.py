@@ -1,3 +1,7 @@
+from dataclasses import FrozenInstanceError
+
+import pytest
+
 from schnapsen.core.action import Action
 from schnapsen.core.card import Card
 from schnapsen.core.card import Suit
@@ -33,3 +37,15 @@ def test_equality():
     assert action != action3
     assert action4a == action4b
     assert action4a != action5
+
+
+def test_hashable_and_frozen():
+    actions = {Action(card=Card(Suit.CLUB, Value.ACE)), Action(card=Card(Suit.CLUB, Value.ACE)),
+               Action(close_deck=True)}
+    assert len(actions) == 2
+    assert Card(Suit.CLUB, Value.ACE) in {Card(Suit.CLUB, Value.ACE)}
+
+    with pytest.raises(FrozenInstanceError):
+        Action(close_deck=True).swap_trump = True
+    with pytest.raises(FrozenInstanceError):
+        Card(Suit.CLUB, Value.ACE).value = Value.KING
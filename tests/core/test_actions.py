@@ -0,0 +1,56 @@
+import timeit
+
+import pytest
+
+from schnapsen.core.action import Action
+from schnapsen.core.actions import ACTIONS
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.actions import get_action_index
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+
+
+def _linear_action_index(action: Action) -> int:
+    # The original lookup, kept as the reference and benchmark baseline.
+    for key, value in ALL_GAME_ACTIONS.items():
+        if value == action:
+            return key
+
+
+def test_action_index_round_trip():
+    for index, action in ALL_GAME_ACTIONS.items():
+        assert ACTIONS[index] is action
+        # Look up with fresh (equal but not identical) instances.
+        card = None if action.card is None else Card(action.card.suit, action.card.value)
+        assert get_action_index(Action(card=card, declare_marriage=action.declare_marriage,
+                                       swap_trump=action.swap_trump, close_deck=action.close_deck)) == index
+
+
+def test_action_index_matches_linear_lookup():
+    assert len(ALL_GAME_ACTIONS) == 30
+    for index, action in ALL_GAME_ACTIONS.items():
+        assert get_action_index(action) == _linear_action_index(action) == index
+
+
+def test_unknown_action_index():
+    assert get_action_index(Action(card=Card(Suit.CLUB, Value.ACE), declare_marriage=True)) is None
+
+
+@pytest.mark.benchmark
+def test_action_index_benchmark():
+    actions = [Action(card=Card(Suit.CLUB, Value.ACE)), Action(card=Card(Suit.CLUB, Value.KING), declare_marriage=True),
+               Action(close_deck=True)]
+
+    def linear() -> None:
+        for action in actions:
+            _linear_action_index(action)
+
+    def lookup() -> None:
+        for action in actions:
+            get_action_index(action)
+
+    linear_time = min(timeit.repeat(linear, number=2000, repeat=3))
+    lookup_time = min(timeit.repeat(lookup, number=2000, repeat=3))
+
+    assert linear_time / lookup_time > 5
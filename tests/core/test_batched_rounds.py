@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.batched_rounds import BatchedRounds
+from schnapsen.core.batched_rounds import NO_CARD
+from schnapsen.core.batched_rounds import NO_PLAYER
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import CARDS
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.deck import Deck
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+
+
+def _assert_round_matches(rounds: BatchedRounds, i: int, state: MatchState) -> None:
+    # Compare row i of the batch with the equivalent MatchController state.
+    players = state.players
+    assert rounds.round_winner[i] == (NO_PLAYER if state.round_winner is None else players.index(state.round_winner))
+    assert rounds.active_player[i] == players.index(state.active_player)
+    assert rounds.leading_player[i] == players.index(state.leading_player)
+    assert rounds.first_dealer[i] == players.index(state.player_with_1st_deal)
+    assert rounds.leading_card[i] == (NO_CARD if state.leading_card is None else card_index(state.leading_card))
+    assert rounds.trump_card[i] == card_index(state.trump_card)
+    assert rounds.deck_closed[i] == state.deck_closed
+    assert rounds.deck_closer[i] == (NO_PLAYER if state.deck_closer is None else players.index(state.deck_closer))
+    assert list(rounds.deck[i, :rounds.deck_size[i]]) == [card_index(card) for card in state.deck]
+    for player_index, player in enumerate(players):
+        player_state = state.player_states[player]
+        assert rounds.hands[i, player_index] == cards_mask(player_state.hand)
+        assert rounds.cards_won[i, player_index] == cards_mask(player_state.cards_won)
+        assert rounds.round_points[i, player_index] == player_state.round_points
+        assert rounds.match_points[i, player_index] == player_state.match_points
+    if state.round_winner is not None:
+        assert rounds.round_winner_match_points[i] == state.round_winner_match_points
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_match_controller_move_for_move(seed: int):
+    number_of_rounds = 200
+    rounds = BatchedRounds(number_of_rounds, seed=seed)
+    rounds.reset()
+
+    controller = MatchController()
+    states = []
+    for i in range(number_of_rounds):
+        state = controller.get_new_match_state(Player("player_a", automated=False),
+                                               Player("player_b", automated=False))
+        state.player_with_1st_deal = state.players[rounds.first_dealer[i]]
+        controller.reset_round_state(state, deck=Deck([CARDS[card] for card in rounds.deck[i]]))
+        states.append(state)
+        _assert_round_matches(rounds, i, state)
+
+    while not np.all(rounds.done):
+        legal_action_bits = rounds.legal_action_bits()
+        actions = rounds.random_actions()
+        for i, state in enumerate(states):
+            if state.round_winner is None:
+                assert legal_action_bits[i] == controller.get_valid_action_mask(state)
+                controller.perform_action(state, ALL_GAME_ACTIONS[actions[i]])
+        rounds.step(actions)
+        for i, state in enumerate(states):
+            _assert_round_matches(rounds, i, state)
+
+    assert not rounds.legal_mask().any()
+
+
+def test_illegal_action_raises():
+    rounds = BatchedRounds(4, seed=0)
+    rounds.reset()
+    actions = rounds.random_actions()
+    # Play a card from the opponent's hand.
+    opponents_hand = int(rounds.hands[0, 1 - rounds.active_player[0]])
+    actions[0] = (opponents_hand & -opponents_hand).bit_length() - 1
+    with pytest.raises(ValueError, match="Illegal action"):
+        rounds.step(actions)
+
+
+def test_play_random_and_partial_reset():
+    rounds = BatchedRounds(1000, seed=3)
+    rounds.reset()
+    rounds.play_random()
+
+    assert rounds.done.all()
+    assert (rounds.round_winner_match_points >= 1).all()
+    assert (rounds.match_points.sum(axis=1) >= rounds.round_winner_match_points).all()
+
+    rounds.reset(rows=np.arange(10))
+    assert not rounds.done[:10].any()
+    assert rounds.done[10:].all()
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.action import Action
+from schnapsen.core.belief import follow_rule_exclusions
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.card_set import card_bit
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.card_set import CardSet
+from schnapsen.core.card_set import SUIT_MASKS
+from schnapsen.core.hand import Hand
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.zobrist import zobrist_hash
+
+
+def test_follow_rule_exclusions():
+    ten_of_hearts = Card(Suit.HEART, Value.TEN)
+    ace_of_hearts = Card(Suit.HEART, Value.ACE)
+
+    # Winning the hand breaks no rule.
+    assert follow_rule_exclusions(ten_of_hearts, ace_of_hearts, Suit.CLUB) == 0
+    # Following suit without winning shows there's no higher card of the suit.
+    assert follow_rule_exclusions(ten_of_hearts, Card(Suit.HEART, Value.KING), Suit.CLUB) == card_bit(ace_of_hearts)
+    # Trumping shows a void in the suit led.
+    assert follow_rule_exclusions(ten_of_hearts, Card(Suit.CLUB, Value.JACK), Suit.CLUB) == SUIT_MASKS[Suit.HEART]
+    # Discarding shows a void in both the suit led and trumps.
+    assert follow_rule_exclusions(ten_of_hearts, Card(Suit.SPADE, Value.JACK), Suit.CLUB) == (
+        SUIT_MASKS[Suit.HEART] | SUIT_MASKS[Suit.CLUB])
+
+
+@pytest.mark.parametrize("card_set_type", [Hand, CardSet])
+def test_beliefs_hold_and_samples_are_consistent(card_set_type: type):
+    controller = MatchController()
+    number_of_exclusions = 0
+    for seed in range(100):
+        random.seed(seed)
+        state = controller.get_new_match_state(RandomPlayer("Randy"), RandomPlayer("Andy"), card_set_type=card_set_type)
+        controller.reset_round_state(state)
+        while state.round_winner is None:
+            for position, player in enumerate(state.players):
+                belief = state.beliefs[position]
+                opponent_hand_mask = cards_mask(state.player_states[state.get_other_player(player)].hand)
+                assert belief.excluded_cards & opponent_hand_mask == 0
+                number_of_exclusions += belief.excluded_cards != 0
+
+                determinisation = state.clone()
+                controller.shuffle_imperfect_information(determinisation, player)
+                deck = determinisation.deck
+                hand = determinisation.player_states[state.get_other_player(player)].hand
+                assert len(deck) == len(state.deck)
+                assert cards_mask(deck) | cards_mask(hand) == cards_mask(state.deck) | opponent_hand_mask
+                assert cards_mask(hand) & belief.opponent_cards == opponent_hand_mask & belief.opponent_cards
+                assert cards_mask(hand) & belief.excluded_cards == 0
+                assert determinisation.zobrist_hash == zobrist_hash(determinisation)
+
+            legal_actions = controller.get_valid_actions(state)
+            # Close the deck more often than at random, to cover closed deck rules.
+            action = random.choice(legal_actions)
+            if Action(close_deck=True) in legal_actions and random.random() < 0.3:
+                action = Action(close_deck=True)
+            controller.perform_action(state, action)
+    assert number_of_exclusions > 0
+
+
+def test_swapped_trump_card_stays_in_hand():
+    controller = MatchController()
+    for seed in range(100):
+        random.seed(seed)
+        state = controller.get_new_match_state(RandomPlayer("Randy"), RandomPlayer("Andy"))
+        controller.reset_round_state(state)
+        if Action(swap_trump=True) in controller.get_valid_actions(state):
+            break
+    trump_card = state.trump_card
+    player = state.active_player
+    controller.perform_action(state, Action(swap_trump=True))
+
+    for _ in range(20):
+        determinisation = state.clone()
+        controller.shuffle_imperfect_information(determinisation, state.get_other_player(player))
+        assert determinisation.player_states[player].hand.has_card(trump_card)
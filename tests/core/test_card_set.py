@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core import match_helpers
+from schnapsen.core.actions import ALL_GAME_ACTIONS
+from schnapsen.core.card import Card
+from schnapsen.core.card import Suit
+from schnapsen.core.card import Value
+from schnapsen.core.card_set import ALL_CARDS_MASK
+from schnapsen.core.card_set import card_index
+from schnapsen.core.card_set import CARDS
+from schnapsen.core.card_set import cards_mask
+from schnapsen.core.card_set import CardSet
+from schnapsen.core.marriage import Marriage
+from schnapsen.core.match_controller import MatchController
+
+
+def test_bit_layout_matches_card_actions():
+    for index, card in enumerate(CARDS):
+        assert card_index(card) == index
+        assert ALL_GAME_ACTIONS[index].card == card
+
+
+def test_append_pop_and_membership():
+    card_set = CardSet()
+    card_set.append(Card(Suit.HEART, Value.ACE))
+    card_set.append(Card(Suit.CLUB, Value.JACK))
+
+    assert len(card_set) == 2
+    assert card_set.has_card(Card(Suit.HEART, Value.ACE))
+    assert Card(Suit.CLUB, Value.JACK) in card_set
+    assert Card(Suit.CLUB, Value.ACE) not in card_set
+
+    assert card_set.pop_card(Card(Suit.HEART, Value.ACE)) == Card(Suit.HEART, Value.ACE)
+    assert card_set == [Card(Suit.CLUB, Value.JACK)]
+    with pytest.raises(ValueError, match="not in hand"):
+        card_set.pop_card(Card(Suit.HEART, Value.ACE))
+
+
+def test_cards_of_same_suit():
+    card_set = CardSet([Card(Suit.DIAMOND, Value.JACK), Card(Suit.DIAMOND, Value.QUEEN),
+                        Card(Suit.DIAMOND, Value.ACE), Card(Suit.CLUB, Value.ACE)])
+
+    assert len(card_set.cards_of_same_suit(Suit.DIAMOND)) == 3
+    assert card_set.cards_of_same_suit(Suit.DIAMOND, Value.KING) == [Card(Suit.DIAMOND, Value.ACE)]
+    assert card_set.cards_of_same_suit(Suit.SPADE) == []
+
+
+def test_available_marriages():
+    card_set = CardSet([Card(Suit.SPADE, Value.KING), Card(Suit.CLUB, Value.QUEEN), Card(Suit.HEART, Value.KING),
+                        Card(Suit.CLUB, Value.KING), Card(Suit.SPADE, Value.QUEEN)])
+
+    marriages = card_set.available_marriages()
+    assert marriages == [Marriage(Card(Suit.CLUB, Value.QUEEN), Card(Suit.CLUB, Value.KING)),
+                         Marriage(Card(Suit.SPADE, Value.QUEEN), Card(Suit.SPADE, Value.KING))]
+
+
+def test_play_automated_match_with_card_sets():
+    random.seed(0)
+
+    for _ in range(5):
+        state = match_helpers.play_automated_match(
+            player_1=RandomPlayer("Randy1"), player_2=RandomPlayer("Randy2"), card_set_type=CardSet)
+        assert state.match_winner is not None
+        assert all(isinstance(player_state.hand, CardSet) for player_state in state.player_states.values())
+
+
+def test_card_conservation_through_round():
+    controller = MatchController()
+    number_of_exhausted_decks = 0
+    for seed in range(10):
+        random.seed(seed)
+        state = controller.get_new_match_state(RandomPlayer("Randy1"), RandomPlayer("Randy2"), card_set_type=CardSet)
+        controller.reset_round_state(state)
+
+        while state.round_winner is None:
+            controller.perform_action(state, random.choice(controller.get_valid_actions(state)))
+            mask = cards_mask(state.deck)
+            # Once the deck is exhausted the trump card is in a hand rather than on the table.
+            if len(state.deck) > 0:
+                mask |= cards_mask([state.trump_card])
+            else:
+                number_of_exhausted_decks += 1
+            for player_state in state.player_states.values():
+                assert mask & (player_state.hand.mask | player_state.cards_won.mask) == 0
+                mask |= player_state.hand.mask | player_state.cards_won.mask
+            if state.leading_card is not None:
+                mask |= cards_mask([state.leading_card])
+            assert mask == ALL_CARDS_MASK
+    assert number_of_exhausted_decks > 0
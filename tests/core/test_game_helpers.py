@@ -19,3 +19,15 @@ def test_play_automated_games():
         player_1=RandomPlayer("Randy1"),
         player_2=RandomPlayer("Randy2"),
         number_of_matches=1)
+
+
+def test_play_automated_matches_parallel_is_deterministic():
+    player_1 = RandomPlayer("Randy1")
+    player_2 = RandomPlayer("Randy2")
+
+    serial = match_helpers.play_automated_matches(player_1, player_2, number_of_matches=25, seed=7)
+    parallel = match_helpers.play_automated_matches(player_1, player_2, number_of_matches=25, workers=2, seed=7)
+
+    assert serial.number_of_matches_played == 25
+    assert (parallel.player1_wins, parallel.player2_wins) == (serial.player1_wins, serial.player2_wins)
+    assert parallel.player1 is player_1
@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core import match_helpers
+from schnapsen.core.game_record import GameRecordWriter
+from schnapsen.core.game_record import read_chunks
+from schnapsen.core.game_record import read_rounds
+from schnapsen.core.game_record import replay_round
+
+
+def test_recorded_matches_replay_exactly():
+    file = io.BytesIO()
+    with GameRecordWriter(file, rounds_per_chunk=7) as writer:
+        results = match_helpers.play_automated_matches(RandomPlayer("Randy1"), RandomPlayer("Randy2"),
+                                                       number_of_matches=20, seed=3, recorder=writer)
+    file.seek(0)
+    assert len(list(read_chunks(file))) > 1
+
+    file.seek(0)
+    rounds = list(read_rounds(file))
+    assert {record.match_index for record in rounds} == set(range(20))
+    match_wins = [0, 0]
+    for record in rounds:
+        # Replay raises if the round points or result diverge from the record.
+        replayed_actions = [action for _, action in replay_round(record)]
+        assert replayed_actions == record.actions
+        winner_match_points = record.match_points[record.round_winner] + record.round_winner_match_points
+        if winner_match_points >= 7:
+            match_wins[record.round_winner] += 1
+    assert match_wins == [results.player1_wins, results.player2_wins]
+
+
+def test_read_rejects_other_files():
+    with pytest.raises(ValueError, match='game record'):
+        list(read_chunks(io.BytesIO(b'not a record file')))
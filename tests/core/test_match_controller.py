@@ -3,12 +3,17 @@ import random
 import pytest
 
 from schnapsen.core.action import Action
+from schnapsen.core.actions import get_action_index
 from schnapsen.core.card import Card
 from schnapsen.core.card import Suit
 from schnapsen.core.card import Value
+from schnapsen.core.card_set import CardSet
 from schnapsen.core.deck import Deck
+from schnapsen.core.hand import Hand
 from schnapsen.core.match_controller import MatchController
 from schnapsen.core.player import Player
+from schnapsen.core.state import MatchState
+from schnapsen.core.state import UNDO_STATE_FIELDS
 
 
 def test_regression():
@@ -87,3 +92,87 @@ def test_regression():
     # Swap Trump
     # Close Deck
     # The various match point scenarios
+
+
+def _state_fingerprint(state: MatchState) -> tuple:
+    # Capture every piece of (mutable) match state as comparable plain values.
+    return (
+        tuple(getattr(state, field) for field in UNDO_STATE_FIELDS),
+        tuple((player_state.round_points, player_state.match_points, player_state.match_points_on_offer,
+               list(player_state.hand), list(player_state.cards_won))
+              for player_state in state.player_states.values()),
+        list(state.deck),
+        sorted((suit, info["player"].name, info["marriage"].points, info["marriage"].points_awarded)
+               for suit, info in state.marriages_info.items()),
+    )
+
+
+@pytest.mark.parametrize("card_set_type", [Hand, CardSet])
+def test_perform_and_undo_action(card_set_type: type):
+    # Every action applied with an undo record must be exactly revertible.
+    random.seed(2)
+    match_controller = MatchController()
+    state = match_controller.get_new_match_state(
+        player_1=Player(name="player_a", automated=False),
+        player_2=Player(name="player_b", automated=False),
+        card_set_type=card_set_type)
+    seen = set()
+
+    for _ in range(40):
+        match_controller.reset_round_state(state)
+        while state.round_winner is None:
+            legal_actions = match_controller.get_valid_actions(state)
+            # Try (and undo) every legal action before committing to one of them at random.
+            for action in legal_actions:
+                before = _state_fingerprint(state)
+                undo_record = match_controller.perform_action(state, action, record_undo=True)
+                if action.swap_trump:
+                    seen.add('swap_trump')
+                if action.close_deck:
+                    seen.add('close_deck')
+                if action.declare_marriage:
+                    seen.add('marriage')
+                if state.round_winner is not None:
+                    seen.add('round_win')
+                match_controller.undo_action(state, undo_record)
+                assert _state_fingerprint(state) == before
+            match_controller.perform_action(state, random.choice(legal_actions))
+
+    assert seen == {'swap_trump', 'close_deck', 'marriage', 'round_win'}
+
+
+def test_undo_stack():
+    random.seed(3)
+    match_controller = MatchController()
+    state = match_controller.get_new_match_state(
+        player_1=Player(name="player_a", automated=False),
+        player_2=Player(name="player_b", automated=False))
+    match_controller.reset_round_state(state)
+    start = _state_fingerprint(state)
+
+    undo_stack = []
+    while state.round_winner is None:
+        action = random.choice(match_controller.get_valid_actions(state))
+        undo_stack.append(match_controller.perform_action(state, action, record_undo=True))
+
+    while undo_stack:
+        match_controller.undo_action(state, undo_stack.pop())
+    assert _state_fingerprint(state) == start
+
+
+@pytest.mark.parametrize("card_set_type", [Hand, CardSet])
+def test_valid_action_mask_matches_valid_actions(card_set_type: type):
+    random.seed(4)
+    match_controller = MatchController()
+    state = match_controller.get_new_match_state(
+        player_1=Player(name="player_a", automated=False),
+        player_2=Player(name="player_b", automated=False),
+        card_set_type=card_set_type)
+
+    for _ in range(20):
+        match_controller.reset_round_state(state)
+        while state.round_winner is None:
+            legal_actions = match_controller.get_valid_actions(state)
+            expected_mask = sum(1 << get_action_index(action) for action in legal_actions)
+            assert match_controller.get_valid_action_mask(state) == expected_mask
+            match_controller.perform_action(state, random.choice(legal_actions))
@@ -0,0 +1,74 @@
+import random
+import timeit
+
+import pytest
+
+from schnapsen.ai.mcts.mcts import MctsPlayer
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.state import MatchState
+
+
+def _mid_round_state() -> MatchState:
+    random.seed(0)
+    controller = MatchController()
+    state = controller.get_new_match_state(MctsPlayer(number_of_searches_per_move=2), RandomPlayer("Randy"))
+    controller.reset_round_state(state)
+    for _ in range(3):
+        controller.perform_action(state, random.choice(controller.get_valid_actions(state)))
+    return state
+
+
+def test_clone_is_independent():
+    controller = MatchController()
+    state = _mid_round_state()
+    clone = state.clone()
+
+    # Players are shared, game collections are not.
+    assert clone.players[0] is state.players[0]
+    assert clone.active_player is state.active_player
+    for player in state.players:
+        assert clone.player_states[player] is not state.player_states[player]
+        assert clone.player_states[player].hand == state.player_states[player].hand
+        assert clone.player_states[player].hand is not state.player_states[player].hand
+    assert clone.deck == state.deck
+    assert clone.deck is not state.deck
+
+    hand_before = list(state.player_states[state.active_player].hand)
+    deck_before = list(state.deck)
+    points_before = {player: state.player_states[player].round_points for player in state.players}
+    while clone.round_winner is None:
+        controller.perform_action(clone, random.choice(controller.get_valid_actions(clone)))
+
+    assert list(state.player_states[state.active_player].hand) == hand_before
+    assert list(state.deck) == deck_before
+    assert {player: state.player_states[player].round_points for player in state.players} == points_before
+    assert state.round_winner is None
+
+
+def test_clone_is_equivalent():
+    controller = MatchController()
+    state = _mid_round_state()
+    clone = state.clone()
+    assert clone == state
+
+    # Playing the same actions on the state and its clone keeps them equal.
+    for seed in range(20):
+        random.seed(seed)
+        action = random.choice(controller.get_valid_actions(state))
+        assert action in controller.get_valid_actions(clone)
+        controller.perform_action(state, action)
+        controller.perform_action(clone, action)
+        assert clone == state
+        if state.round_winner is not None:
+            break
+
+
+@pytest.mark.benchmark
+def test_clone_benchmark_vs_deepcopy():
+    state = _mid_round_state()
+
+    deepcopy_time = min(timeit.repeat(state.copy, number=200, repeat=3))
+    clone_time = min(timeit.repeat(state.clone, number=200, repeat=3))
+
+    assert deepcopy_time / clone_time > 10
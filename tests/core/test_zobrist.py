@@ -0,0 +1,81 @@
+import itertools
+import random
+from typing import Optional
+
+import pytest
+
+from schnapsen.ai.random_player import RandomPlayer
+from schnapsen.core.action import Action
+from schnapsen.core.card_set import CardSet
+from schnapsen.core.hand import Hand
+from schnapsen.core.match_controller import MatchController
+from schnapsen.core.state import MatchState
+from schnapsen.core.zobrist import zobrist_hash
+
+
+def _new_round(seed: int, card_set_type: type = Hand) -> MatchState:
+    random.seed(seed)
+    controller = MatchController()
+    state = controller.get_new_match_state(RandomPlayer("Randy"), RandomPlayer("Andy"), card_set_type=card_set_type)
+    controller.reset_round_state(state)
+    return state
+
+
+@pytest.mark.parametrize("card_set_type", [Hand, CardSet])
+def test_incremental_hash_matches_full_hash(card_set_type: type):
+    controller = MatchController()
+    for seed in range(50):
+        state = _new_round(seed, card_set_type)
+        assert state.zobrist_hash == zobrist_hash(state)
+        undo_records = []
+        while state.round_winner is None:
+            previous_hash = state.zobrist_hash
+            action = random.choice(controller.get_valid_actions(state))
+            undo_records.append((controller.perform_action(state, action, record_undo=True), previous_hash))
+            assert state.zobrist_hash == zobrist_hash(state)
+            assert state.zobrist_hash != previous_hash
+
+        for undo_record, previous_hash in reversed(undo_records):
+            controller.undo_action(state, undo_record)
+            assert state.zobrist_hash == previous_hash
+
+
+def test_shuffle_imperfect_information_rehashes():
+    controller = MatchController()
+    state = _new_round(0)
+    controller.shuffle_imperfect_information(state, state.active_player)
+
+    assert state.zobrist_hash == zobrist_hash(state)
+
+
+def _play_tricks_won_by_leader(state: MatchState, tricks: list) -> Optional[MatchState]:
+    controller = MatchController()
+    state = state.clone()
+    leader = state.leading_player
+    for leading_card, following_card in tricks:
+        controller.perform_action(state, Action(card=leading_card))
+        controller.perform_action(state, Action(card=following_card))
+        if state.leading_player is not leader:
+            return None
+    return state
+
+
+def test_transpositions_hash_equally():
+    # Find two tricks the leader wins in either order, so both orders reach the same position.
+    state = _new_round(0)
+    leader_hand = list(state.player_states[state.leading_player].hand)
+    follower_hand = list(state.player_states[state.get_other_player(state.leading_player)].hand)
+    transpositions = []
+    for leading_cards in itertools.combinations(leader_hand, 2):
+        for following_cards in itertools.combinations(follower_hand, 2):
+            tricks = list(zip(leading_cards, following_cards))
+            state_1 = _play_tricks_won_by_leader(state, tricks)
+            state_2 = _play_tricks_won_by_leader(state, tricks[::-1])
+            if state_1 is not None and state_2 is not None:
+                transpositions.append((state_1, state_2))
+    assert transpositions
+
+    for state_1, state_2 in transpositions:
+        assert state_1.zobrist_hash == state_2.zobrist_hash
+    # Different tricks reach different positions.
+    assert len({state_1.zobrist_hash for state_1, _ in transpositions}) == len(transpositions)
@@ -1,6 +1,38 @@
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
 from schnapsen import tournament
 
 
 def test_tournament():
     # A poor test, but simply check it runs to completion for now!
     tournament.run_tournament(number_of_matches_per_battle=1)
+
+
+def test_tournament_parallel():
+    tournament.run_tournament(number_of_matches_per_battle=1, workers=2, seed=0)
+
+
+def test_tournament_without_nn_players_does_not_import_torch():
+    script = ('import sys\n'
+              'from schnapsen import tournament\n'
+              'tournament.run_tournament(number_of_matches_per_battle=1, player_names=("better", "random", "mcts"))\n'
+              'assert "torch" not in sys.modules\n')
+    subprocess.run([sys.executable, '-c', script], check=True, cwd=Path(__file__).parents[1])
+
+
+@pytest.mark.benchmark
+def test_startup_benchmark():
+    # Cold start of the tournament entry point vs importing the torch based NN player, which it used to.
+    def cold_import_time(module: str) -> float:
+        script = f'import time\nstart = time.perf_counter()\nimport {module}\nprint(time.perf_counter() - start)\n'
+        return min(float(subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                                        cwd=Path(__file__).parents[1]).stdout) for _ in range(3))
+
+    tournament_time = cold_import_time('schnapsen.tournament')
+    nn_player_time = cold_import_time('schnapsen.ai.neural_network.simple_linear.nn_linear_player')
+
+    assert nn_player_time / tournament_time > 3